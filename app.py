@@ -1,10 +1,10 @@
 from flask import Flask, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
+import atexit
 import os
 import json
 import threading
 import queue as thread_queue
-import time
 from datetime import datetime
 # 使用 MediaCrawler 爬虫
 try:
@@ -22,6 +22,15 @@ except ImportError as e:
     print("=" * 50)
     raise ImportError("MediaCrawler 爬虫依赖未安装，请先安装依赖") from e
 
+from crawl_checkpoint import CheckpointStore
+from crawl_coordinator import CrawlCoordinator
+from crawl_runner import CrawlRunner
+from distributed_crawl import DistributedCrawl
+from note_registry import NoteRegistry
+from user_store import UserStore
+from work_queue import open_work_queue
+from xhs_crawler.config_stub import CRAWL_WORKER_PROCESSES, WORK_QUEUE_URL
+
 app = Flask(__name__, static_folder='frontend', static_url_path='')
 CORS(app)
 
@@ -30,20 +39,45 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 USERS_DIR = os.path.join(DATA_DIR, 'users')
 KEYWORDS_DIR = os.path.join(DATA_DIR, 'keywords')
 COMMENTS_DIR = os.path.join(DATA_DIR, 'comments')
+CHECKPOINTS_DIR = os.path.join(DATA_DIR, 'checkpoints')
+NOTES_FILE = os.path.join(DATA_DIR, 'notes.json')
+
+# 爬取服务：由 init_services() 在开始提供服务时创建（见文件末尾与 _ensure_services）。
+# 多进程爬取以 spawn 启动工作进程，工作进程会以 __mp_main__ 重新导入本文件，导入时不能有副作用
+note_registry = None  # 帖子来源关键词：多个关键词搜到同一帖子时只抓一次评论，导出时列出全部来源关键词
+crawl_runner = None  # 爬取任务执行器：后台事件循环中运行完整爬取流程
+crawl_coordinator = None  # 多进程爬取：工作进程数大于 1 时 /api/crawl 把关键词分给多个工作进程，/api/status 汇总各进程进度
+distributed_crawl = None  # 多机分布式爬取：配置了共享工作队列时 /api/crawl 把关键词放入队列，由各机器上的工作者（python distributed_crawl.py）处理，本进程合并结果
+CRAWL_WORKERS = int(os.environ.get('XHS_CRAWL_WORKERS', CRAWL_WORKER_PROCESSES))
+WORK_QUEUE = os.environ.get('XHS_WORK_QUEUE', WORK_QUEUE_URL)
+_services_lock = threading.Lock()
+
 
-# 确保目录存在
-os.makedirs(USERS_DIR, exist_ok=True)
-os.makedirs(KEYWORDS_DIR, exist_ok=True)
-os.makedirs(COMMENTS_DIR, exist_ok=True)
+def init_services():
+    """创建数据目录与爬取服务（可重复调用，只创建一次）"""
+    global note_registry, crawl_runner, crawl_coordinator, distributed_crawl
+    with _services_lock:
+        if crawl_runner is not None:
+            return
+        os.makedirs(USERS_DIR, exist_ok=True)
+        os.makedirs(KEYWORDS_DIR, exist_ok=True)
+        os.makedirs(COMMENTS_DIR, exist_ok=True)
+        note_registry = NoteRegistry(NOTES_FILE)
+        if CRAWL_WORKERS > 1:
+            crawl_coordinator = CrawlCoordinator(USERS_DIR, workers=CRAWL_WORKERS)
+            atexit.register(crawl_coordinator.shutdown)
+        if WORK_QUEUE:
+            distributed_crawl = DistributedCrawl(open_work_queue(WORK_QUEUE), UserStore(USERS_DIR), notes=note_registry)
+            distributed_crawl.start()
+        crawl_runner = CrawlRunner(UserStore(USERS_DIR), CheckpointStore(CHECKPOINTS_DIR), notes=note_registry)
+        # 继续上次排队中/运行中的任务，不论以何种方式提供服务
+        crawl_runner.start()
 
-# 全局爬虫实例和状态
-crawler_status = {
-    'running': False,
-    'current_keyword': '',
-    'progress': 0,
-    'total_users': 0,
-    'message': ''
-}
+
+@app.before_request
+def _ensure_services():
+    # 以 WSGI 服务器等方式导入时，首个请求前创建
+    init_services()
 
 # Playwright 链接浏览器：用于在独立窗口中打开用户主页/帖子链接
 _link_browser_ready = threading.Event()
@@ -103,33 +137,93 @@ def delete_keyword(keyword):
 
 @app.route('/api/crawl', methods=['POST'])
 def start_crawl():
-    """开始爬取"""
-    global crawler_status
-    
-    if crawler_status['running']:
-        return jsonify({'error': '爬虫正在运行中'}), 400
-    
-    data = request.json
+    """开始爬取：任务加入队列，有空闲槽位时立即开始；启用多进程/分布式时关键词分给各工作进程/工作者"""
+    return _submit_crawl_job(request.json or {}, batch=True)
+
+@app.route('/api/status', methods=['GET'])
+def get_status():
+    """获取爬虫状态"""
+    if distributed_crawl is not None:
+        return jsonify(distributed_crawl.status())
+    if crawl_coordinator is not None:
+        return jsonify(crawl_coordinator.status())
+    return jsonify(crawl_runner.status())
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """所有爬取任务（最新的在前）及其状态、进度、吞吐量"""
+    return jsonify(crawl_runner.jobs())
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """提交一批关键词到任务队列，参数同 /api/crawl"""
+    return _submit_crawl_job(request.json or {})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """单个任务的状态"""
+    job = crawl_runner.job(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """取消排队中或运行中的任务"""
+    if not crawl_runner.cancel(job_id):
+        return jsonify({'error': '任务不存在或已结束'}), 404
+    return jsonify({'success': True})
+
+def _submit_crawl_job(data, batch=False):
     keywords = data.get('keywords', [])
     # 新增配置参数
     max_notes = data.get('max_notes', 100)  # 最多抓取的帖子数
     max_comments = data.get('max_comments', 100)  # 每个帖子最多抓取的评论数
     comment_filter_keywords = data.get('comment_filter_keywords', [])  # 评论过滤关键词
+    desc_filter_keywords = data.get('desc_filter_keywords', [])  # 主页简介过滤关键词
+    resume = bool(data.get('resume', False))  # 是否从上次的断点继续
+    incremental = bool(data.get('incremental', False))  # 是否只抓取上次之后的新帖子/新评论
+    keyword_weights = data.get('keyword_weights') or {}  # 关键词 -> 搜索请求权重，默认各关键词轮流
+    since_date = data.get('since_date')  # 截止日期 YYYY-MM-DD，更早的帖子和评论不抓取
+    cutoff = 0
+    if since_date:
+        try:
+            cutoff = int(datetime.strptime(since_date, '%Y-%m-%d').timestamp() * 1000)
+        except ValueError:
+            return jsonify({'error': '截止日期格式应为 YYYY-MM-DD'}), 400
     
     if not keywords:
         return jsonify({'error': '请至少添加一个关键词'}), 400
     
-    # 启动爬虫线程
-    thread = threading.Thread(target=run_crawler, args=(keywords, max_notes, max_comments, comment_filter_keywords))
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({'success': True, 'message': '爬虫已启动'})
+    if batch and distributed_crawl is not None:
+        # 分布式爬取：关键词放入共享工作队列（不支持关键词权重，断点由队列的重新投递代替）
+        try:
+            run_id = distributed_crawl.submit(
+                keywords, max_notes, max_comments, comment_filter_keywords, incremental, cutoff, desc_filter_keywords,
+            )
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'success': True, 'message': '已放入工作队列', 'job_id': run_id})
 
-@app.route('/api/status', methods=['GET'])
-def get_status():
-    """获取爬虫状态"""
-    return jsonify(crawler_status)
+    if batch and crawl_coordinator is not None:
+        # 多进程爬取：按关键词分给各工作进程（一次只运行一批，关键词权重不适用）
+        try:
+            run_id = crawl_coordinator.submit(
+                keywords, max_notes, max_comments, comment_filter_keywords, resume, incremental, cutoff,
+                desc_filter_keywords,
+            )
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'success': True, 'message': f'爬虫已启动（{CRAWL_WORKERS} 个工作进程）', 'job_id': run_id})
+
+    # 加入任务队列，由后台事件循环执行
+    status = crawl_runner.status()
+    slot_free = status['running_jobs'] + status['queued_jobs'] < crawl_runner.slots
+    job_id = crawl_runner.submit(
+        keywords, max_notes, max_comments, comment_filter_keywords, resume, incremental, cutoff, keyword_weights,
+        desc_filter_keywords,
+    )
+    return jsonify({'success': True, 'message': '爬虫已启动' if slot_free else '已加入任务队列', 'job_id': job_id})
 
 @app.route('/api/users', methods=['GET'])
 def get_users():
@@ -205,7 +299,7 @@ def export_users_excel():
 
     # 工作表2：评论明细
     ws2 = wb.create_sheet("评论明细", 1)
-    headers2 = ["用户ID", "昵称", "评论内容", "笔记标题", "帖子链接", "评论时间", "关键词"]
+    headers2 = ["用户ID", "昵称", "评论内容", "笔记标题", "帖子链接", "评论时间", "关键词", "命中过滤词"]
     for col, h in enumerate(headers2, 1):
         ws2.cell(row=1, column=col, value=h)
         ws2.cell(row=1, column=col).font = Font(bold=True)
@@ -225,9 +319,10 @@ def export_users_excel():
             ws2.cell(row=row, column=4, value=c.get("note_title", ""))
             ws2.cell(row=row, column=5, value=note_url)
             ws2.cell(row=row, column=6, value=c.get("comment_time_str", "") or "")
-            ws2.cell(row=row, column=7, value=c.get("keyword", ""))
+            ws2.cell(row=row, column=7, value=", ".join(note_registry.keywords(note_id)) or c.get("keyword", ""))
+            ws2.cell(row=row, column=8, value=", ".join(c.get("matched_keywords") or []))
             row += 1
-    for col in range(1, 8):
+    for col in range(1, 9):
         ws2.column_dimensions[get_column_letter(col)].width = 22
 
     from io import BytesIO
@@ -291,151 +386,9 @@ def open_in_browser():
         return jsonify({'success': False, 'error': '请求过多'}), 503
 
 
-def run_crawler(keywords, max_notes=100, max_comments=100, comment_filter_keywords=[]):
-    """运行爬虫（两级抓取）"""
-    global crawler_status
-    
-    crawler_status['running'] = True
-    crawler_status['total_users'] = 0
-    crawler_status['progress'] = 0
-    
-    try:
-        crawler = XHSCrawler()
-        crawler.init_browser()  # 初始化浏览器
-        total_keywords = len(keywords)
-        
-        for idx, keyword in enumerate(keywords):
-            crawler_status['current_keyword'] = keyword
-            crawler_status['progress'] = int((idx / total_keywords) * 100)
-            crawler_status['message'] = f'正在爬取关键词: {keyword} (帖子数: {max_notes}, 评论数: {max_comments})'
-            
-            # 第一级：搜索关键词，获取最新帖子
-            notes = crawler.search_notes_by_keyword(keyword, max_notes=max_notes)
-            print(f"[爬虫] 关键词「{keyword}」 共获取 {len(notes)} 个帖子")
-            if notes:
-                print("[爬虫] 帖子列表原始数据示例(第一条):", json.dumps(notes[0], ensure_ascii=False, indent=2))
-            
-            crawler_status['message'] = f'找到 {len(notes)} 个帖子，开始抓取评论...'
-            
-            # 第二级：对每个帖子抓取评论
-            for note_idx, note in enumerate(notes):
-                note_progress = int((note_idx / len(notes)) * 100) if notes else 0
-                crawler_status['message'] = f'正在处理帖子 {note_idx + 1}/{len(notes)}: {note.get("note_id", "")[:8]}...'
-                
-                # 抓取评论
-                comments_data = crawler.crawl_note_comments(
-                    note.get('note_id'),
-                    max_comments=max_comments,
-                    filter_keywords=comment_filter_keywords,
-                    xsec_token=note.get('xsec_token', ''),
-                    xsec_source=note.get('xsec_source', 'pc_search')
-                )
-                
-                # 控制台日志：本帖子评论条数 + 单条评论原始数据示例
-                print(f"[爬虫] 帖子 {note.get('note_id', '')[:12]}... 评论数: {len(comments_data)}")
-                if comments_data:
-                    print("[爬虫] 单条评论原始数据示例:", json.dumps(comments_data[0], ensure_ascii=False, indent=2))
-                
-                # 保存评论和用户信息
-                for comment_data in comments_data:
-                    user = comment_data.get('user', {})
-                    if user and user.get('user_id'):
-                        user_id = user['user_id']
-                        user_file = os.path.join(USERS_DIR, f"{user_id}.json")
-                        is_new_user = not os.path.exists(user_file)
-                        
-                        # 控制台日志：用户原始信息（新用户时打完整，老用户只打一条简短日志）
-                        if is_new_user:
-                            print(f"[爬虫] 新用户原始信息 user_id={user_id}:", json.dumps(user, ensure_ascii=False, indent=2))
-                        else:
-                            print(f"[爬虫] 已有用户追加评论 user_id={user_id} nickname={user.get('nickname', '')}")
-                        
-                        # 检查用户是否已存在，如果存在则更新评论列表
-                        if os.path.exists(user_file):
-                            with open(user_file, 'r', encoding='utf-8') as f:
-                                existing_user = json.load(f)
-                        else:
-                            existing_user = user.copy()
-                        
-                        # 添加评论信息
-                        if 'comments' not in existing_user:
-                            existing_user['comments'] = []
-                        
-                        # 评论发布时间：小红书 API 返回的 time 为毫秒时间戳（如 1771346050000）
-                        ts = comment_data.get('time') or 0
-                        if ts:
-                            sec = int(ts) / 1000 if int(ts) >= 1e12 else int(ts)
-                            comment_time_str = datetime.fromtimestamp(sec).strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            comment_time_str = ''
-                        
-                        existing_user['comments'].append({
-                            'comment_id': comment_data.get('comment_id'),
-                            'content': comment_data.get('content'),
-                            'note_id': note.get('note_id'),
-                            'note_title': note.get('title'),
-                            'note_xsec_token': note.get('xsec_token', ''),
-                            'note_xsec_source': note.get('xsec_source', ''),
-                            'keyword': keyword,
-                            'comment_time': ts,
-                            'comment_time_str': comment_time_str,
-                            'crawl_time': datetime.now().isoformat()
-                        })
-                        
-                        existing_user['keyword'] = keyword
-                        existing_user['crawl_time'] = datetime.now().isoformat()
-                        # 用户主页需 /user/profile/ 且带 xsec_token、xsec_source 才能正常跳转，用当前帖子参数
-                        xsec_source = note.get('xsec_source') or 'pc_note'
-                        xsec_token = note.get('xsec_token') or ''
-                        qs = f"xsec_source={xsec_source}"
-                        if xsec_token:
-                            qs = f"xsec_token={xsec_token}&{qs}"
-                        existing_user['user_url'] = f"https://www.xiaohongshu.com/user/profile/{user_id}?{qs}"
-                        
-                        # 若尚未有主页简介，则请求用户主页抓取简介
-                        if not (existing_user.get('desc') or existing_user.get('user_desc')):
-                            try:
-                                creator_info = crawler.get_creator_info(user_id, xsec_token, xsec_source)
-                                desc = XHSCrawler.get_creator_desc(creator_info)
-                                if desc:
-                                    existing_user['desc'] = desc
-                                time.sleep(1)  # 避免请求过快
-                            except Exception as e:
-                                print(f"[爬虫] 获取用户简介失败 user_id={user_id}: {e}")
-                        
-                        with open(user_file, 'w', encoding='utf-8') as f:
-                            json.dump(existing_user, f, ensure_ascii=False, indent=2)
-                        
-                        crawler_status['total_users'] += 1
-                
-                # 更新进度
-                keyword_progress = int((idx / total_keywords) * 100)
-                note_progress = int((note_idx / len(notes)) * 100) if notes else 0
-                crawler_status['progress'] = keyword_progress + int(note_progress / total_keywords)
-            
-            crawler_status['progress'] = int(((idx + 1) / total_keywords) * 100)
-        
-        crawler_status['message'] = f'爬取完成！共获取 {crawler_status["total_users"]} 个用户'
-        crawler_status['current_keyword'] = ''
-        
-    except Exception as e:
-        error_msg = str(e)
-        if "Playwright 浏览器未安装" in error_msg or "Executable doesn't exist" in error_msg:
-            crawler_status['message'] = '错误: Playwright 浏览器未安装。请运行 "playwright install chromium" 或 "安装依赖.bat"'
-        elif "等待登录超时" in error_msg:
-            crawler_status['message'] = '未在限定时间内完成登录。请先在小红书页面扫码/登录，再点击「开始爬取」。'
-        else:
-            crawler_status['message'] = f'爬取出错: {error_msg}'
-        import traceback
-        traceback.print_exc()
-    finally:
-        if 'crawler' in locals():
-            try:
-                crawler.close()  # 关闭浏览器
-            except:
-                pass
-        crawler_status['running'] = False
-        crawler_status['progress'] = 100
-
 if __name__ == '__main__':
+    # debug 模式下 reloader 父进程也会执行这里，只在实际提供服务的子进程中启动服务（继续上次未完成的任务）；
+    # 其他方式（WSGI 服务器等）由首个请求前的 init_services() 启动
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_services()
     app.run(debug=True, host='0.0.0.0', port=5000)
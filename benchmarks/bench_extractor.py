@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+XiaoHongShuExtractor 基准测试：
+1. 对比旧的正则提取与有界扫描提取 __INITIAL_STATE__ 的耗时
+2. 对比整棵状态树 decamelize 与只转换目标笔记子树的耗时
+3. fixtures/extractor 下各样本页面的端到端解析耗时
+
+用法：
+    python benchmarks/bench_extractor.py [--repeat 20]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from xhs_crawler.media_platform.xhs.extractor import XiaoHongShuExtractor, decamelize, find_initial_state
+
+
+def legacy_note_state(html):
+    """旧实现：贪婪正则 + 全局替换 undefined"""
+    return re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+
+
+def legacy_decamelize(data):
+    """旧实现：整棵树递归转换，每个 key 都重新计算"""
+    if isinstance(data, dict):
+        return {_CAMEL_BOUNDARY.sub("_", k).lower(): legacy_decamelize(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [legacy_decamelize(item) for item in data]
+    return data
+
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def legacy_note_detail(note_id, html):
+    state = legacy_note_state(html)
+    return legacy_decamelize(json.loads(state))["note"]["note_detail_map"][note_id]["note"]
+
+
+def _fake_note(i):
+    return {
+        "noteId": f"{i:024x}",
+        "title": f"笔记标题 {i}",
+        # 少量正文里出现 undefined 字样，旧实现会把它替换成 ""
+        "desc": "正文内容。" * 20 + (MENTION + "，还有 a,undefined,b" if i % 10 == 0 else ""),
+        "type": "normal",
+        "user": {"userId": f"{i:024x}", "nickname": f"用户{i}", "avatar": "https://sns-avatar.example/" + "a" * 80},
+        "interactInfo": {"likedCount": str(i * 3), "collectedCount": str(i), "commentCount": str(i % 50)},
+        "imageList": [{"urlDefault": "https://sns-img.example/" + "b" * 100, "width": 1080, "height": 1440}] * 4,
+        "tagList": [{"id": f"t{j}", "name": f"话题{j}", "type": "topic"} for j in range(5)],
+        "time": 1700000000000 + i,
+        "lastUpdateTime": 1700000000000 + i,
+        "ipLocation": "__UNDEFINED__",
+    }
+
+
+MENTION = "提到了 undefined 这个词"
+
+
+def build_page(note_count, minified, inline_script_after=False):
+    """构造接近真实结构的笔记/主页 HTML：多个脚本、大量 DOM，以及包含 undefined 的初始状态"""
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30}},
+        "user": {
+            "userPageData": {"basicInfo": {"nickname": "测试用户", "desc": "简介"}, "interactions": []},
+            "notes": [[_fake_note(i) for i in range(note_count)]],
+        },
+        "note": {"noteDetailMap": {_fake_note(0)["noteId"]: {"note": _fake_note(0)}}},
+    }
+    state_js = json.dumps(state, ensure_ascii=False, separators=(",", ":")).replace('"__UNDEFINED__"', "undefined")
+    # 页面中的 URL 斜杠以 \u002F 转义
+    state_js = state_js.replace("/", "\\u002F")
+    sep = "" if minified else "\n"
+    head = sep.join("<script>window.__cfg%d={a:1};</script>" % i for i in range(200))
+    body = sep.join("<div class=\"feeds-container\"><section class=\"note-item\">内容</section></div>" for _ in range(3000))
+    tail = sep.join("<script src=\"/static/chunk%d.js\"></script>" % i for i in range(50))
+    if inline_script_after:
+        # 同一行紧跟的内联脚本：旧的贪婪正则会一直匹配到它的 }</script>
+        tail = "<script>window.__SSR__={ready:true}</script>" + tail
+    return (
+        f"<!doctype html><html><head>{head}</head><body>{body}{sep}"
+        f"<script>window.__INITIAL_STATE__={state_js}</script>{sep}{tail}</body></html>"
+    )
+
+
+def bench(func, html, repeat):
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - begin) / repeat * 1000
+
+
+def check(func, html, expected_mentions):
+    """提取结果是否为合法 JSON，正文中的 undefined 字样是否被保留"""
+    try:
+        state = func(html)
+        json.loads(state, strict=False)
+    except Exception as e:
+        return f"error: {type(e).__name__}"
+    kept = state.count(MENTION)
+    return "ok" if kept == expected_mentions else f"corrupted {expected_mentions - kept} texts"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("note page (typical)", 30, dict(minified=False)),
+        ("profile page (large)", 300, dict(minified=False)),
+        ("profile page (large, minified)", 300, dict(minified=True)),
+        ("profile page (minified, inline script)", 300, dict(minified=True, inline_script_after=True)),
+    ]
+    scanner = lambda h: find_initial_state(h, '""')
+    print(f"{'fixture':40} {'size':>6} {'legacy':>9} {'scanner':>9} {'json.loads':>11}  legacy result / scanner result")
+    for name, note_count, options in cases:
+        html = build_page(note_count, **options)
+        # 第 0 条笔记同时出现在 user.notes 和 noteDetailMap 中
+        expected_mentions = len(range(0, note_count, 10)) + 1
+        legacy_ms = bench(legacy_note_state, html, args.repeat)
+        scanner_ms = bench(scanner, html, args.repeat)
+        state = scanner(html)
+        loads_ms = bench(json.loads, state, args.repeat)
+        print(
+            f"{name:40} {len(html) / 1024:5.0f}K {legacy_ms:7.2f}ms {scanner_ms:7.2f}ms {loads_ms:9.2f}ms  "
+            f"{check(legacy_note_state, html, expected_mentions)} / {check(scanner, html, expected_mentions)}"
+        )
+
+    extractor = XiaoHongShuExtractor()
+    note_id = _fake_note(0)["noteId"]
+    print()
+    print(f"{'fixture':40} {'size':>6} {'whole tree':>11} {'subtree':>9}  (json.loads + decamelize)")
+    for name, note_count, options in cases[:3]:
+        state = find_initial_state(build_page(note_count, **options), '""')
+        whole_ms = bench(lambda s: legacy_decamelize(json.loads(s)), state, args.repeat)
+        subtree_ms = bench(lambda s: decamelize(json.loads(s)["note"]["noteDetailMap"][note_id]["note"]), state, args.repeat)
+        print(f"{name:40} {len(state) / 1024:5.0f}K {whole_ms:9.2f}ms {subtree_ms:7.2f}ms")
+
+    print()
+    print(f"{'fixture':40} {'legacy':>9} {'extractor':>10}  (extract_note_detail_from_html end to end)")
+    for name, note_count, options in cases[:3]:
+        html = build_page(note_count, **options)
+        # 去掉正文中的 undefined 字样，否则旧实现直接解析失败，无法计时
+        html = html.replace("，还有 a,undefined,b", "").replace(MENTION, "")
+        legacy_ms = bench(lambda h: legacy_note_detail(note_id, h), html, args.repeat)
+        new_ms = bench(lambda h: extractor.extract_note_detail_from_html(note_id, h), html, args.repeat)
+        print(f"{name:40} {legacy_ms:7.2f}ms {new_ms:8.2f}ms")
+
+    bench_fixtures(extractor, args.repeat)
+
+
+def bench_fixtures(extractor, repeat):
+    """fixtures/extractor 中的脱敏样本（与 test_extractor.py 使用同一批页面）"""
+    from test_extractor import FIXTURES_DIR, NOTE_FIXTURES, PROFILE_FIXTURES, load_expected, load_html
+
+    if not os.path.isdir(FIXTURES_DIR):
+        return
+    print()
+    print(f"{'fixture':40} {'size':>6} {'extract':>9}")
+    for name in NOTE_FIXTURES + PROFILE_FIXTURES:
+        html = load_html(name)
+        if name in NOTE_FIXTURES:
+            note_id = load_expected(name)["note_id"]
+            elapsed_ms = bench(lambda h: extractor.extract_note_detail_from_html(note_id, h), html, repeat)
+        else:
+            elapsed_ms = bench(extractor.extract_creator_info_from_html, html, repeat)
+        print(f"{name:40} {len(html) / 1024:5.0f}K {elapsed_ms:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
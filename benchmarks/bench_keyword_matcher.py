@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+KeywordMatcher 基准测试：
+对比旧的 any(kw in content for kw in keywords) 与 KeywordMatcher 在不同过滤词数量下
+每条评论的匹配耗时（KeywordMatcher 额外做了 NFKC + casefold 归一化）
+
+用法：
+    python benchmarks/bench_keyword_matcher.py [--comments 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from xhs_crawler.tools.keyword_matcher import KeywordMatcher
+
+CHARS = (
+    "的一是在不了有和人这中大为上个我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说"
+    "产种面而方后多定行学法所得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使"
+    "点从业本去把性好应开它合还因由其些然前外天看原又么利比或但质气第向道命此变条只没结解问意建月公"
+)
+
+
+def fake_comment(rng):
+    """20-120 字的评论，夹杂少量英文和 emoji"""
+    text = "".join(rng.choice(CHARS) for _ in range(rng.randint(20, 120)))
+    if rng.random() < 0.2:
+        text += " PDF 有吗"
+    if rng.random() < 0.1:
+        text += "[笑哭R]"
+    return text
+
+
+def fake_keywords(rng, count):
+    keywords = set()
+    while len(keywords) < count:
+        keywords.add("".join(rng.choice(CHARS) for _ in range(rng.randint(2, 4))))
+    return list(keywords)
+
+
+def bench(func, comments):
+    begin = time.perf_counter()
+    for content in comments:
+        func(content)
+    return (time.perf_counter() - begin) / len(comments) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comments", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(45)
+    comments = [fake_comment(rng) for _ in range(args.comments)]
+    print(f"{'keywords':>8} {'legacy any()':>13} {'search':>9} {'find_all':>9} {'build':>9}  matched legacy / matcher")
+    for count in (5, 20, 64, 100, 300, 1000, 3000):
+        keywords = fake_keywords(rng, count)
+        begin = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_ms = (time.perf_counter() - begin) * 1000
+        legacy_us = bench(lambda c: any(kw in c for kw in keywords), comments)
+        search_us = bench(matcher.search, comments)
+        find_all_us = bench(matcher.find_all, comments)
+        legacy_matched = sum(any(kw in c for kw in keywords) for c in comments)
+        matched = sum(matcher.search(c) for c in comments)
+        print(
+            f"{count:8} {legacy_us:11.1f}us {search_us:7.1f}us {find_all_us:7.1f}us {build_ms:7.1f}ms  "
+            f"{legacy_matched} / {matched}"
+        )
+
+
+if __name__ == "__main__":
+    main()
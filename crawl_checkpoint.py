@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+爬取断点
+每个关键词一个 JSON 文件，记录搜索进度（search_id、下一页）、已完成的帖子，
+以及未完成帖子的评论游标；/api/crawl 传 resume=true 时从断点继续
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from xhs_crawler.media_platform.xhs.records import NoteRecord
+
+
+class KeywordCheckpoint:
+    """单个关键词的爬取进度"""
+
+    def __init__(self, keyword: str, data: Optional[Dict] = None):
+        data = data or {}
+        self.keyword = keyword
+        self.search_id: str = data.get('search_id', '')
+        self.next_page: int = data.get('next_page', 1)
+        self.search_done: bool = data.get('search_done', False)
+        self.found: int = data.get('found', 0)
+        self.done_note_ids: List[str] = data.get('done_note_ids', [])
+        # note_id -> 笔记信息 + 评论续抓游标 cursor + 游标之前已抓取的评论数 taken
+        self.pending_notes: Dict[str, Dict] = data.get('pending_notes', {})
+
+    @property
+    def completed(self) -> bool:
+        return self.search_done and not self.pending_notes
+
+    def pending_note_records(self) -> List[NoteRecord]:
+        return [
+            NoteRecord(
+                note_id=note_id,
+                title=info.get('title', ''),
+                desc=info.get('desc', ''),
+                xsec_token=info.get('xsec_token', ''),
+                xsec_source=info.get('xsec_source', 'pc_search'),
+                detail_loaded=info.get('detail_loaded', False),
+                comment_count=info.get('comment_count'),
+            )
+            for note_id, info in self.pending_notes.items()
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            'keyword': self.keyword,
+            'search_id': self.search_id,
+            'next_page': self.next_page,
+            'search_done': self.search_done,
+            'found': self.found,
+            'done_note_ids': self.done_note_ids,
+            'pending_notes': self.pending_notes,
+            'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+
+class CheckpointStore:
+    """断点文件读写；写入先写临时文件再替换，进程中途被杀也不会留下半个文件"""
+
+    def __init__(self, checkpoints_dir: str):
+        self.checkpoints_dir = checkpoints_dir
+        os.makedirs(checkpoints_dir, exist_ok=True)
+        # 定时上报（线程池）与任务结束时的保存可能同时进行：串行写入
+        self._lock = threading.Lock()
+
+    def path(self, keyword: str) -> str:
+        # 关键词可能包含文件名不允许的字符
+        digest = hashlib.sha1(keyword.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.checkpoints_dir, f"{digest}.json")
+
+    def load(self, keyword: str) -> Optional[KeywordCheckpoint]:
+        path = self.path(keyword)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[爬虫] 断点文件损坏，忽略 keyword={keyword}: {e}")
+            return None
+        return KeywordCheckpoint(keyword, data)
+
+    def save(self, checkpoint: KeywordCheckpoint):
+        path = self.path(checkpoint.keyword)
+        with self._lock:
+            # 临时文件名唯一，其他进程同时写同一断点也不会互相替换掉对方的临时文件
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=self.checkpoints_dir)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(checkpoint.to_dict(), f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    def clear(self, keyword: str):
+        try:
+            os.remove(self.path(keyword))
+        except FileNotFoundError:
+            pass
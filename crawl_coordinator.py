@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+多进程爬取协调器
+一个进程内的 JSON 解析、页面提取与保存只能用到一个 CPU 核；协调器把一批关键词分给 N 个工作进程，
+每个工作进程运行自己的 CrawlRunner（事件循环 + 爬虫适配器），结果写入共用的用户目录、断点、水位线与帖子来源文件。
+工作进程有空闲槽位时才向协调器领取下一个关键词，处理得快的进程自然多领；
+进程异常退出时其未完成的关键词转给其他进程从断点继续。各进程通过共享签名服务签名，不各自启动浏览器。
+不同关键词搜到的同一帖子通过本批次共用的帖子登记文件（NoteClaims）只抓一次评论。
+工作进程入口 _worker_main 在本模块中，不导入 app.py。
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from xhs_crawler.config_stub import SIGN_SERVER_ADDRESS
+from xhs_crawler_adapter import XHSCrawlerAdapter
+from crawl_runner import DEFAULT_JOB_SLOTS, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, CrawlRunner
+from note_registry import NoteClaims
+from user_store import UserStore
+
+# 工作进程上报各关键词任务状态的间隔（秒）
+WORKER_REPORT_INTERVAL = 1.0
+# 协调器检查工作进程存活的间隔（秒）
+WORKER_CHECK_INTERVAL = 1.0
+# 停止时等待工作进程保存断点并退出的时间（秒），超时则强制结束
+WORKER_SHUTDOWN_TIMEOUT = 30.0
+# 工作进程异常退出时，其关键词最多转给其他进程重试的次数（避免一个会导致崩溃的关键词拖垮所有进程）
+MAX_KEYWORD_RETRIES = 1
+# 关键词尚未分给任何工作进程
+KEYWORD_PENDING = 'pending'
+
+
+class CrawlCoordinator:
+    """把一批关键词分给多个工作进程爬取，汇总进度；同一时间只运行一批
+
+    每个关键词在工作进程中是一个独立的 CrawlRunner 任务，用户、断点、水位线和帖子来源
+    写入与单进程时相同的文件（读改写在跨进程文件锁内进行）
+    """
+
+    def __init__(
+        self,
+        users_dir: str,
+        workers: int = 2,
+        slots: int = DEFAULT_JOB_SLOTS,
+        crawler_factory: Callable[[], XHSCrawlerAdapter] = XHSCrawlerAdapter,
+        sign_server_address: Optional[str] = None,
+    ):
+        """
+        Args:
+            users_dir: 用户目录，断点、水位线等与单进程时一样存放在其旁边
+            workers: 工作进程数
+            slots: 每个工作进程同时爬取的关键词数
+            crawler_factory: 工作进程中创建爬虫适配器（需可被 pickle，即模块级的类或函数）
+            sign_server_address: 共享签名服务地址，未提供时读取环境变量 XHS_SIGN_SERVER 或配置
+        """
+        self.users_dir = users_dir
+        self.data_dir = os.path.dirname(users_dir)
+        self.workers = max(1, workers)
+        self.slots = max(1, slots)
+        self.crawler_factory = crawler_factory
+        self.sign_server_address = (
+            sign_server_address or os.environ.get("XHS_SIGN_SERVER", SIGN_SERVER_ADDRESS)
+        )
+        # 与 Flask/事件循环线程共存，fork 不安全；各平台统一用 spawn
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._run_id: Optional[str] = None
+        self._claims_path = ''
+        self._started_at = 0.0
+        self._finished_at = 0.0
+        self._message = ''
+        self._stopping = False
+        self._stop_requested_at = 0.0
+        self._events = None
+        # worker_id -> 进程 / 任务收件箱 / 已分配且未完成的关键词 / 还想领取的关键词数
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._inboxes: Dict[int, multiprocessing.Queue] = {}
+        self._assigned: Dict[int, Set[str]] = {}
+        self._wants: Dict[int, int] = {}
+        self._exited: Set[int] = set()
+        # 等待分配的 (关键词, 是否从断点继续)
+        self._pending: Deque[Tuple[str, bool]] = deque()
+        # 关键词 -> {'worker', 'state', 'status', 'retries'}，status 为工作进程上报的任务状态
+        self._keywords: Dict[str, Dict] = {}
+
+    @property
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def submit(
+        self,
+        keywords: List[str],
+        max_notes: int = 100,
+        max_comments: int = 100,
+        comment_filter_keywords: List[str] = [],
+        resume: bool = False,
+        incremental: bool = False,
+        cutoff: int = 0,
+        desc_filter_keywords: List[str] = [],
+    ) -> str:
+        """启动一批关键词的多进程爬取（线程安全），返回批次 ID；参数含义同 CrawlRunner.submit
+
+        已有批次在运行、或未配置共享签名服务时抛出 RuntimeError
+        """
+        if self.crawler_factory is XHSCrawlerAdapter and not self.sign_server_address:
+            raise RuntimeError('多进程爬取需要共享签名服务，请先启动签名服务并设置 XHS_SIGN_SERVER')
+        keywords = list(dict.fromkeys(keywords))
+        params = {
+            'max_notes': max_notes,
+            'max_comments': max_comments,
+            'comment_filter_keywords': list(comment_filter_keywords),
+            'incremental': incremental,
+            'cutoff': cutoff,
+            'desc_filter_keywords': list(desc_filter_keywords),
+        }
+        with self._lock:
+            if self.running:
+                raise RuntimeError('已有多进程爬取在运行')
+            self._run_id = uuid.uuid4().hex[:12]
+            self._claims_path = os.path.join(self.data_dir, 'workers', f'claims-{self._run_id}.jsonl')
+            self._started_at = time.monotonic()
+            self._finished_at = 0.0
+            self._message = '正在启动工作进程'
+            self._stopping = False
+            self._pending = deque((keyword, resume) for keyword in keywords)
+            self._keywords = {
+                keyword: {'worker': None, 'state': KEYWORD_PENDING, 'status': {}, 'retries': 0} for keyword in keywords
+            }
+            self._events = self._context.Queue()
+            self._processes, self._inboxes, self._assigned, self._wants = {}, {}, {}, {}
+            self._exited = set()
+            for worker_id in range(min(self.workers, len(keywords))):
+                self._start_worker(worker_id, params)
+            self._thread = threading.Thread(target=self._run, name="crawl-coordinator", daemon=True)
+            self._thread.start()
+            return self._run_id
+
+    def shutdown(self, timeout: float = WORKER_SHUTDOWN_TIMEOUT):
+        """停止当前批次：工作进程停止任务并保存断点（下次 resume 可继续），超时未退出的强制结束"""
+        with self._lock:
+            if not self.running:
+                return
+            self._request_stop('已停止')
+        self._thread.join(timeout + WORKER_CHECK_INTERVAL * 2)
+
+    def status(self) -> Dict:
+        """汇总各关键词的进度（兼容 CrawlRunner.status 的字段），另含各工作进程与各关键词的概况"""
+        with self._lock:
+            keywords = {keyword: dict(info) for keyword, info in self._keywords.items()}
+            workers = [
+                {
+                    'id': worker_id,
+                    'pid': process.pid,
+                    'alive': process.is_alive(),
+                    'keywords': sorted(self._assigned.get(worker_id, ())),
+                }
+                for worker_id, process in self._processes.items()
+            ]
+            message = self._message
+            run_id = self._run_id
+            elapsed = (self._finished_at or time.monotonic()) - self._started_at if self._started_at else 0.0
+        running = self.running
+        active = [keyword for keyword, info in keywords.items() if info['state'] == JOB_RUNNING]
+        waiting = [keyword for keyword, info in keywords.items() if info['state'] in (KEYWORD_PENDING, JOB_QUEUED)]
+        statuses = [info['status'] for info in keywords.values()]
+        progress = [
+            info['status'].get('progress', 0) if info['state'] in (KEYWORD_PENDING, JOB_QUEUED, JOB_RUNNING) else 100
+            for info in keywords.values()
+        ]
+        return {
+            'running': running,
+            'job_id': run_id,
+            'current_keyword': '、'.join(active),
+            'progress': int(sum(progress) / len(progress)) if progress else 0,
+            'total_users': sum(status.get('total_users', 0) for status in statuses),
+            'total_comments': sum(status.get('total_comments', 0) for status in statuses),
+            'message': message,
+            'notes_found': sum(status.get('notes_found', 0) for status in statuses),
+            'notes_done': sum(status.get('notes_done', 0) for status in statuses),
+            'elapsed': round(elapsed, 1),
+            'comments_per_sec': round(sum(keywords[keyword]['status'].get('comments_per_sec', 0.0) for keyword in active), 2),
+            'running_jobs': len(active),
+            'queued_jobs': len(waiting),
+            'workers': workers,
+            'shards': {
+                keyword: {
+                    'worker': info['worker'],
+                    'state': info['state'],
+                    'progress': info['status'].get('progress', 0),
+                    'total_users': info['status'].get('total_users', 0),
+                    'total_comments': info['status'].get('total_comments', 0),
+                    'message': info['status'].get('message', ''),
+                    'retries': info['retries'],
+                }
+                for keyword, info in keywords.items()
+            },
+        }
+
+    def _start_worker(self, worker_id: int, params: Dict):
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                worker_id, self.users_dir, self.sign_server_address, params, self.slots,
+                self.crawler_factory, self._claims_path, inbox, self._events,
+            ),
+            name=f"crawl-worker-{worker_id}",
+        )
+        process.start()
+        self._processes[worker_id] = process
+        self._inboxes[worker_id] = inbox
+        self._assigned[worker_id] = set()
+        self._wants[worker_id] = 0
+
+    def _run(self):
+        """协调线程：处理工作进程事件、分配关键词、检查进程存活，直到所有工作进程退出"""
+        while True:
+            try:
+                event = self._events.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                event = None
+            with self._lock:
+                if event is not None:
+                    self._handle_event(*event)
+                self._check_workers()
+                self._assign()
+                finished = all(
+                    info['state'] not in (KEYWORD_PENDING, JOB_QUEUED, JOB_RUNNING) for info in self._keywords.values()
+                )
+                if finished and not self._stopping:
+                    total_users = sum(info['status'].get('total_users', 0) for info in self._keywords.values())
+                    self._request_stop(
+                        f'爬取完成！{self._finished_count()}/{len(self._keywords)} 个关键词成功，共获取 {total_users} 个用户'
+                    )
+                if len(self._exited) == len(self._processes):
+                    break
+        # 进程退出前发出的最后几条状态
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                if event[0] == 'status':
+                    self._handle_event(*event)
+        for process in self._processes.values():
+            process.join(WORKER_SHUTDOWN_TIMEOUT)
+        with self._lock:
+            for inbox in self._inboxes.values():
+                inbox.close()
+            self._events.close()
+            for path in (self._claims_path, self._claims_path + '.lock'):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._finished_at = time.monotonic()
+            print(f"[协调器] 批次 {self._run_id} 结束: {self._message}")
+
+    def _handle_event(self, kind: str, worker_id: int, payload):
+        if kind == 'ready':
+            # 工作进程空出了 payload 个槽位
+            self._wants[worker_id] += payload
+        elif kind == 'status':
+            keyword, state, status = payload
+            info = self._keywords[keyword]
+            info.update(worker=worker_id, state=state, status=status)
+            if state not in (JOB_QUEUED, JOB_RUNNING):
+                self._assigned[worker_id].discard(keyword)
+                if not self._stopping:
+                    self._message = f'{self._finished_count()}/{len(self._keywords)} 个关键词已完成'
+        elif kind == 'exit':
+            self._on_worker_exit(worker_id)
+
+    def _check_workers(self):
+        for worker_id, process in self._processes.items():
+            if worker_id not in self._exited and not process.is_alive():
+                print(f"[协调器] 工作进程 {worker_id} 异常退出 (exitcode={process.exitcode})")
+                self._on_worker_exit(worker_id)
+        if self._stopping and time.monotonic() - self._stop_requested_at > WORKER_SHUTDOWN_TIMEOUT:
+            for worker_id, process in self._processes.items():
+                if worker_id not in self._exited and process.is_alive():
+                    print(f"[协调器] 工作进程 {worker_id} 未在 {WORKER_SHUTDOWN_TIMEOUT:.0f} 秒内退出，强制结束")
+                    process.terminate()
+
+    def _on_worker_exit(self, worker_id: int):
+        """工作进程退出：未完成的关键词重新排队，由其他进程从断点继续"""
+        if worker_id in self._exited:
+            return
+        self._exited.add(worker_id)
+        self._wants[worker_id] = 0
+        if not self._stopping:
+            for keyword in sorted(self._assigned[worker_id]):
+                info = self._keywords[keyword]
+                if info['retries'] >= MAX_KEYWORD_RETRIES:
+                    info['state'] = JOB_FAILED
+                    info['status'] = dict(info['status'], message='工作进程异常退出，已放弃该关键词')
+                    continue
+                info['retries'] += 1
+                info.update(worker=None, state=KEYWORD_PENDING)
+                self._pending.appendleft((keyword, True))
+        self._assigned[worker_id].clear()
+        if not self._stopping and len(self._exited) == len(self._processes) and self._pending:
+            # 没有存活的工作进程可接手
+            for keyword, _ in self._pending:
+                self._keywords[keyword]['state'] = JOB_FAILED
+            self._pending.clear()
+            self._message = '所有工作进程都已退出，剩余关键词未完成'
+            self._stopping = True
+
+    def _assign(self):
+        """把排队的关键词分给有空闲槽位的工作进程（先到先得）"""
+        if self._stopping:
+            return
+        for worker_id, wants in self._wants.items():
+            while wants and self._pending and worker_id not in self._exited:
+                keyword, resume = self._pending.popleft()
+                self._assigned[worker_id].add(keyword)
+                self._keywords[keyword].update(worker=worker_id, state=JOB_QUEUED)
+                self._inboxes[worker_id].put((keyword, resume))
+                wants -= 1
+            self._wants[worker_id] = wants
+
+    def _request_stop(self, message: str):
+        """通知所有工作进程停止（调用方持有 self._lock）"""
+        self._stopping = True
+        self._stop_requested_at = time.monotonic()
+        self._message = message
+        for worker_id, inbox in self._inboxes.items():
+            if worker_id not in self._exited:
+                inbox.put(None)
+
+    def _finished_count(self) -> int:
+        return sum(info['state'] == JOB_DONE for info in self._keywords.values())
+
+
+def _worker_main(
+    worker_id: int,
+    users_dir: str,
+    sign_server_address: str,
+    params: Dict,
+    slots: int,
+    crawler_factory: Callable[[], XHSCrawlerAdapter],
+    claims_path: str,
+    inbox,
+    events,
+):
+    """工作进程入口：领取关键词 → 提交给本进程的 CrawlRunner → 上报状态，直到收到停止消息"""
+    if sign_server_address:
+        os.environ['XHS_SIGN_SERVER'] = sign_server_address
+    jobs_file = os.path.join(os.path.dirname(users_dir), 'workers', f'jobs-{worker_id}.json')
+    if os.path.exists(jobs_file):
+        # 断点续爬由协调器按关键词安排，不继续上次遗留的任务
+        os.remove(jobs_file)
+    runner = CrawlRunner(
+        UserStore(users_dir), note_claims=NoteClaims(claims_path), crawler_factory=crawler_factory, slots=slots,
+        jobs_file=jobs_file,
+    )
+    running: Dict[str, str] = {}  # job_id -> 关键词
+    requested = 0
+    stopping = False
+    print(f"[协调器] 工作进程 {worker_id} 已启动 pid={os.getpid()}")
+    try:
+        while not stopping:
+            free = slots - len(running) - requested
+            if free > 0:
+                events.put(('ready', worker_id, free))
+                requested += free
+            deadline = time.monotonic() + WORKER_REPORT_INTERVAL
+            while True:
+                try:
+                    message = inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if message is None:
+                    stopping = True
+                    break
+                keyword, resume = message
+                requested -= 1
+                job_id = runner.submit([keyword], resume=resume, **params)
+                running[job_id] = keyword
+            for job_id, keyword in list(running.items()):
+                job = runner.job(job_id)
+                events.put(('status', worker_id, (keyword, job['state'], job['status'])))
+                if job['state'] not in (JOB_QUEUED, JOB_RUNNING):
+                    del running[job_id]
+    finally:
+        # 运行中的任务停止并保存断点
+        runner.shutdown()
+        for job_id, keyword in running.items():
+            job = runner.job(job_id)
+            events.put(('status', worker_id, (keyword, job['state'], job['status'])))
+        events.put(('exit', worker_id, None))
@@ -0,0 +1,891 @@
+# -*- coding: utf-8 -*-
+"""
+异步爬取任务执行器
+持有一个常驻后台线程的事件循环，整个 搜索 → 评论 → 用户主页 → 保存 流程都以协程运行；
+任务排队后按空闲槽位并行执行，Flask 只通过线程安全的 submit / jobs / status 与其交互
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from contextlib import aclosing
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from xhs_crawler.config_stub import (
+    ENABLE_GET_SUB_COMMENTS, KEYWORD_CONCURRENCY, SEARCH_REQUEST_INTERVAL, SUB_COMMENT_CONCURRENCY,
+    SUB_COMMENT_PAGE_SIZE,
+)
+from xhs_crawler.media_platform.xhs.pipeline import Pipeline, Stage
+from xhs_crawler.media_platform.xhs.records import CommentRecord, NoteRecord
+from xhs_crawler.media_platform.xhs.scheduler import FairScheduler
+from xhs_crawler.media_platform.xhs.watermark import NoteCommentState, Watermark
+from xhs_crawler.tools.keyword_matcher import KeywordMatcher
+from xhs_crawler_adapter import XHSCrawlerAdapter
+from crawl_checkpoint import CheckpointStore, KeywordCheckpoint
+from crawl_watermark import WatermarkStore
+from note_registry import NoteClaims, NoteRegistry
+from user_store import UserStore
+
+# 两次用户主页请求之间的间隔（秒），避免请求过快
+PROFILE_REQUEST_INTERVAL = 1.0
+# 同一帖子两页评论之间的间隔（秒）
+COMMENT_PAGE_INTERVAL = 1.0
+# 各阶段默认并发数；profile 受主页请求间隔限制，多开无益
+DEFAULT_STAGE_WORKERS = {
+    "search": KEYWORD_CONCURRENCY,  # 同时搜索的关键词数，搜索请求由 FairScheduler 轮流分配
+    "detail": 3,
+    "comments": 3,
+    "sub_comments": SUB_COMMENT_CONCURRENCY,  # 各一级评论的子评论并行展开
+    "profile": 1,
+    "persist": 2,
+}
+# 同时运行的任务数；各任务共用一个浏览器/签名器
+DEFAULT_JOB_SLOTS = 2
+# 任务队列文件中保留的已结束任务数
+MAX_FINISHED_JOBS = 100
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_PARTIAL = 'partial'  # 运行结束，但有阶段处理出错（如帖子评论抓取失败），出错的帖子留在断点中
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+
+class CrawlRunner:
+    """在后台事件循环中执行爬取任务
+
+    任务排队执行（队列保存在 jobs.json，服务重启后继续），最多 slots 个任务同时运行，
+    共用一个浏览器/签名器；关键词有重叠的任务不同时运行（断点按关键词保存）
+    """
+
+    def __init__(
+        self,
+        store: UserStore,
+        checkpoints: Optional[CheckpointStore] = None,
+        watermarks: Optional[WatermarkStore] = None,
+        notes: Optional[NoteRegistry] = None,
+        note_claims: Optional[NoteClaims] = None,
+        crawler_factory: Callable[[], XHSCrawlerAdapter] = XHSCrawlerAdapter,
+        stage_workers: Optional[Dict[str, int]] = None,
+        queue_size: int = 100,
+        fetch_note_detail: bool = False,
+        slots: int = DEFAULT_JOB_SLOTS,
+        jobs_file: Optional[str] = None,
+    ):
+        """
+        Args:
+            store: 用户数据存储
+            checkpoints: 断点存储，未提供时存放在用户目录旁的 checkpoints 目录
+            watermarks: 增量爬取水位线，未提供时存放在用户目录旁的 watermarks.json
+            notes: 帖子来源关键词登记，未提供时存放在用户目录旁的 notes.json
+            note_claims: 多进程爬取时各工作进程共用的帖子登记，不同进程的关键词搜到同一帖子时只抓一次评论
+            crawler_factory: 创建爬虫适配器
+            stage_workers: 覆盖各阶段并发数，如 {"comments": 5}
+            queue_size: 各阶段输入队列上限，下游处理不过来时上游在此等待
+            fetch_note_detail: 是否为仅由搜索结果构建的笔记补充详情（正文）
+            slots: 同时运行的任务数
+            jobs_file: 任务队列文件，未提供时为用户目录旁的 jobs.json
+        """
+        data_dir = os.path.dirname(store.users_dir)
+        self.store = store
+        self.checkpoints = checkpoints or CheckpointStore(os.path.join(data_dir, 'checkpoints'))
+        self.watermarks = watermarks or WatermarkStore(os.path.join(data_dir, 'watermarks.json'))
+        self.notes = notes or NoteRegistry(os.path.join(data_dir, 'notes.json'))
+        self.note_claims = note_claims
+        self.crawler_factory = crawler_factory
+        self.stage_workers = stage_workers or {}
+        self.queue_size = queue_size
+        self.fetch_note_detail = fetch_note_detail
+        self.slots = max(1, slots)
+        self.jobs_file = jobs_file or os.path.join(data_dir, 'jobs.json')
+        self._loop = None
+        self._loop_thread = None
+        self._start_lock = threading.Lock()
+        # job_id -> 任务记录（参数、状态、进度），按提交顺序排列；Flask 线程读取时加锁复制
+        self._jobs: Dict[str, Dict] = {}
+        self._jobs_lock = threading.Lock()
+        # submit（Flask 线程）与事件循环线程都会写任务队列文件：串行写入，且后取的快照后写
+        self._jobs_file_lock = threading.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}  # 运行中的任务
+        self._closing = False
+        # 所有任务共用的浏览器/签名器，队列空闲时关闭
+        self._crawler = None
+        self._crawler_lock = None
+        # 同一用户可能同时出现在多个帖子的评论中，读改写其 JSON 文件时需串行
+        self._user_locks: Dict[str, asyncio.Lock] = {}
+        self._profile_lock = None
+        self._load_jobs()
+
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        """首次使用时在后台线程中启动事件循环"""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="crawl-runner-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def start(self):
+        """启动后台事件循环，继续执行上次未完成的任务"""
+        self._get_event_loop().call_soon_threadsafe(self._dispatch)
+
+    def submit(
+        self,
+        keywords: List[str],
+        max_notes: int = 100,
+        max_comments: int = 100,
+        comment_filter_keywords: List[str] = [],
+        resume: bool = False,
+        incremental: bool = False,
+        cutoff: int = 0,
+        keyword_weights: Optional[Dict[str, int]] = None,
+        desc_filter_keywords: List[str] = [],
+    ) -> str:
+        """提交爬取任务到队列（线程安全），返回任务 ID
+
+        resume 为 True 时各关键词从上次的断点继续，否则丢弃旧断点重新爬取；
+        incremental 为 True 时只抓取上次水位线之后的新帖子/新评论；
+        cutoff 为绝对截止时间（毫秒时间戳），早于它的帖子和评论不再抓取；
+        keyword_weights 为各关键词分得搜索请求的权重（默认均为 1，轮流搜索）；
+        desc_filter_keywords 非空时只保存主页简介命中其中任一词的用户
+        """
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'state': JOB_QUEUED,
+            'params': {
+                'keywords': list(keywords),
+                'max_notes': max_notes,
+                'max_comments': max_comments,
+                'comment_filter_keywords': list(comment_filter_keywords),
+                'resume': resume,
+                'incremental': incremental,
+                'cutoff': cutoff,
+                'keyword_weights': dict(keyword_weights or {}),
+                'desc_filter_keywords': list(desc_filter_keywords),
+            },
+            'created_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+            'status': _new_job_status('排队中'),
+        }
+        with self._jobs_lock:
+            self._jobs[job['id']] = job
+        self._save_jobs()
+        self.start()
+        return job['id']
+
+    def cancel(self, job_id: str) -> bool:
+        """取消排队中或运行中的任务（线程安全），任务不存在或已结束时返回 False"""
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] not in (JOB_QUEUED, JOB_RUNNING):
+                return False
+            if job['state'] == JOB_QUEUED:
+                job['state'] = JOB_CANCELLED
+                job['finished_at'] = _now()
+                job['status'].update(running=False, message='任务已取消')
+        if job['state'] == JOB_CANCELLED:
+            self._save_jobs()
+        else:
+            self._get_event_loop().call_soon_threadsafe(self._cancel_task, job_id)
+        return True
+
+    def _cancel_task(self, job_id: str):
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    def jobs(self) -> List[Dict]:
+        """所有任务的快照，最新提交的在前（线程安全）"""
+        with self._jobs_lock:
+            return [_job_snapshot(job) for job in reversed(list(self._jobs.values()))]
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return _job_snapshot(job) if job is not None else None
+
+    def status(self) -> Dict:
+        """总体状态（兼容单任务时代的 /api/status）：运行中的第一个任务，没有则为最近的任务"""
+        with self._jobs_lock:
+            jobs = list(self._jobs.values())
+        running = [job for job in jobs if job['state'] == JOB_RUNNING]
+        queued = [job for job in jobs if job['state'] == JOB_QUEUED]
+        current = running[0] if running else (queued[0] if queued else (jobs[-1] if jobs else None))
+        status = dict(current['status']) if current else _new_job_status('')
+        status.update(
+            running=bool(running or queued),
+            job_id=current['id'] if current else None,
+            running_jobs=len(running),
+            queued_jobs=len(queued),
+        )
+        return status
+
+    def shutdown(self):
+        """停止所有任务与后台事件循环；运行中的任务保持排队状态，下次启动时从断点继续"""
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown_async(), self._loop)
+        try:
+            future.result(timeout=30)
+        except Exception as e:
+            print(f"[爬虫] 停止任务出错: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+        self._loop = None
+
+    async def _shutdown_async(self):
+        self._closing = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._close_crawler()
+
+    def _load_jobs(self):
+        """读取任务队列；上次运行中被中断的任务重新排队，并从断点继续"""
+        if not os.path.exists(self.jobs_file):
+            return
+        try:
+            with open(self.jobs_file, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[爬虫] 任务队列文件损坏，忽略: {e}")
+            return
+        for job in jobs:
+            # 旧版本的任务记录没有评论数
+            job['status'].setdefault('total_comments', job['status'].get('total_users', 0))
+            if job['state'] == JOB_RUNNING:
+                job['state'] = JOB_QUEUED
+                job['params']['resume'] = True
+                job['status'].update(running=False, message='服务重启，排队等待从断点继续')
+            self._jobs[job['id']] = job
+
+    def _save_jobs(self):
+        """写入任务队列文件（先写临时文件再替换）；已结束的任务只保留最近 MAX_FINISHED_JOBS 个"""
+        with self._jobs_file_lock:
+            with self._jobs_lock:
+                finished = [job_id for job_id, job in self._jobs.items() if job['state'] not in (JOB_QUEUED, JOB_RUNNING)]
+                for job_id in finished[:-MAX_FINISHED_JOBS or None]:
+                    del self._jobs[job_id]
+                snapshot = json.dumps([_job_snapshot(job) for job in self._jobs.values()], ensure_ascii=False)
+            os.makedirs(os.path.dirname(self.jobs_file) or '.', exist_ok=True)
+            tmp_path = self.jobs_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.jobs_file)
+
+    def _dispatch(self):
+        """空闲槽位上启动排队中的任务（在事件循环线程中调用）"""
+        if self._closing:
+            return
+        if self._crawler_lock is None:
+            self._crawler_lock = asyncio.Lock()
+            self._profile_lock = asyncio.Lock()
+        with self._jobs_lock:
+            running = [job for job in self._jobs.values() if job['state'] == JOB_RUNNING]
+            busy_keywords = {keyword for job in running for keyword in job['params']['keywords']}
+            started = []
+            for job in self._jobs.values():
+                if len(running) + len(started) >= self.slots:
+                    break
+                if job['state'] != JOB_QUEUED or busy_keywords & set(job['params']['keywords']):
+                    continue
+                job['state'] = JOB_RUNNING
+                job['started_at'] = _now()
+                job['status'].update(running=True, message='爬虫已启动')
+                busy_keywords.update(job['params']['keywords'])
+                started.append(job)
+            idle = not running and not started and not any(job['state'] == JOB_QUEUED for job in self._jobs.values())
+        for job in started:
+            task = asyncio.ensure_future(self._run_job(job))
+            self._tasks[job['id']] = task
+            task.add_done_callback(lambda _, job_id=job['id']: self._on_job_done(job_id))
+        if started:
+            self._save_jobs()
+        if idle and self._crawler is not None:
+            asyncio.ensure_future(self._close_crawler(idle_only=True))
+
+    def _on_job_done(self, job_id: str):
+        self._tasks.pop(job_id, None)
+        if not self._tasks:
+            self._user_locks.clear()
+        self._save_jobs()
+        self._dispatch()
+
+    async def _get_crawler(self):
+        """共用的爬虫适配器，首个任务启动时初始化浏览器（或连接签名服务）"""
+        async with self._crawler_lock:
+            if self._crawler is None:
+                crawler = self.crawler_factory()
+                # 笔记详情由 detail 阶段按需获取，搜索时不逐条请求
+                crawler.search_without_detail = True
+                try:
+                    await crawler.init_browser_async()  # 初始化浏览器
+                except BaseException:
+                    try:
+                        await crawler.close_async()
+                    except Exception:
+                        pass
+                    raise
+                self._crawler = crawler
+            return self._crawler
+
+    async def _close_crawler(self, idle_only: bool = False):
+        """关闭共用的爬虫适配器；idle_only 时仅在没有运行中的任务时关闭
+
+        关闭在 _crawler_lock 内进行：关闭期间开始的任务等它关完再创建新的浏览器，
+        不会有两个浏览器同时使用同一个用户配置目录
+        """
+        if self._crawler_lock is None:
+            return
+        async with self._crawler_lock:
+            if idle_only and self._tasks:
+                return  # 等锁期间已有新任务开始使用它
+            crawler, self._crawler = self._crawler, None
+            if crawler is not None:
+                try:
+                    await crawler.close_async()  # 关闭浏览器
+                except Exception:
+                    pass
+
+    async def _run_job(self, job_record: Dict):
+        """完整爬取流程：各阶段由有界队列串联，慢阶段（如用户主页）通过队列反压上游"""
+        params = job_record['params']
+        status = job_record['status']
+        keywords = params['keywords']
+        job = None
+        state = JOB_FAILED
+        try:
+            crawler = await self._get_crawler()
+            if not params['resume']:
+                # 丢弃上次运行留下的断点；本任务的断点在最终保存之后才按完成情况清除
+                for keyword in keywords:
+                    self.checkpoints.clear(keyword)
+            job = _CrawlJob(
+                self, crawler, status, keywords, params['max_notes'], params['max_comments'],
+                params['comment_filter_keywords'], params['resume'], params['incremental'],
+                params['cutoff'], params['keyword_weights'], params.get('desc_filter_keywords', []),
+            )
+            reporter = asyncio.create_task(job.report_forever())
+            try:
+                await job.pipeline.run({"search": list(keywords)})
+            finally:
+                # 等定时保存结束，再由下面 finally 写最终断点，旧快照不会晚于最终快照落盘
+                reporter.cancel()
+                await asyncio.wait([reporter])
+            job.report()
+
+            status['current_keyword'] = ''
+            if status['errors']:
+                # 出错的条目已被丢弃：有帖子完成时为部分完成，否则为失败；未完成的帖子留在断点中
+                state = JOB_PARTIAL if job.notes_done else JOB_FAILED
+                errors = '、'.join(f'{name} {count}' for name, count in status['errors'].items())
+                status['message'] = (
+                    f'爬取{"部分完成" if state == JOB_PARTIAL else "失败"}：共获取 {status["total_users"]} 个用户，'
+                    f'{len(job.in_flight)} 个帖子未完成（出错: {errors}），可从断点继续'
+                )
+            else:
+                status['message'] = f'爬取完成！共获取 {status["total_users"]} 个用户'
+                state = JOB_DONE
+
+        except asyncio.CancelledError:
+            if self._closing:
+                # 服务停止：任务保持排队，下次启动时从断点继续
+                state = JOB_QUEUED
+                params['resume'] = True
+                status['message'] = '服务停止，排队等待从断点继续'
+            else:
+                state = JOB_CANCELLED
+                status['message'] = '爬取已取消'
+        except Exception as e:
+            error_msg = str(e)
+            if "Playwright 浏览器未安装" in error_msg or "Executable doesn't exist" in error_msg:
+                status['message'] = '错误: Playwright 浏览器未安装。请运行 "playwright install chromium" 或 "安装依赖.bat"'
+            elif "等待登录超时" in error_msg:
+                status['message'] = '未在限定时间内完成登录。请先在小红书页面扫码/登录，再点击「开始爬取」。'
+            else:
+                status['message'] = f'爬取出错: {error_msg}'
+            state = JOB_FAILED
+            traceback.print_exc()
+        finally:
+            # 先写最终断点、再清除已完成的断点，最后才公布任务状态：
+            # 轮询 job()/status() 看到任务结束时断点文件已是最终状态
+            if job is not None:
+                try:
+                    await job.save_checkpoints()
+                    await job.save_watermarks()
+                    if state in (JOB_DONE, JOB_PARTIAL):
+                        # 任务完成后清除已完成关键词的断点，之后 resume 的任务重新爬取而不是直接跳过；
+                        # 有帖子出错未抓完的关键词保留断点
+                        for keyword, checkpoint in job.checkpoints.items():
+                            if checkpoint.completed:
+                                self.checkpoints.clear(keyword)
+                except Exception as e:
+                    print(f"[爬虫] 保存断点失败: {e}")
+            status['running'] = False
+            if state != JOB_QUEUED:
+                status['progress'] = 100
+                job_record['finished_at'] = _now()
+            with self._jobs_lock:
+                job_record['state'] = state
+
+    async def _fetch_creator_desc(self, crawler, user_id: str, note: NoteRecord) -> Optional[str]:
+        """请求用户主页获取简介；所有任务的主页请求串行并保持间隔，避免请求过快"""
+        async with self._profile_lock:
+            try:
+                creator_info = await crawler.get_creator_info_async(
+                    user_id, note.xsec_token, note.xsec_source or 'pc_note'
+                )
+                return XHSCrawlerAdapter.get_creator_desc(creator_info)
+            except Exception as e:
+                print(f"[爬虫] 获取用户简介失败 user_id={user_id}: {e}")
+                return None
+            finally:
+                await asyncio.sleep(PROFILE_REQUEST_INTERVAL)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _new_job_status(message: str) -> Dict:
+    return {
+        'running': False,
+        'current_keyword': '',
+        'progress': 0,
+        'total_users': 0,  # 保存了评论的用户数
+        'total_comments': 0,  # 保存的评论数
+        'message': message,
+        'notes_found': 0,
+        'notes_done': 0,
+        'elapsed': 0.0,
+        'comments_per_sec': 0.0,  # 每秒保存的评论数
+        'signer': {},  # 签名器健康状态：延迟分位数、失败率
+        'requests': {},  # 各类请求的并发上限（自动调节）、进行中请求数、平均耗时
+        'stages': {},  # 各阶段队列深度、吞吐量、利用率
+        'keywords': {},  # 各关键词已获得/等待中的搜索请求次数
+    }
+
+
+def _job_snapshot(job: Dict) -> Dict:
+    """任务记录的浅拷贝；嵌套的统计字典在更新时整体替换，浅拷贝即可安全地跨线程读取"""
+    return dict(job, params=dict(job['params']), status=dict(job['status']))
+
+
+class _NoteProgress:
+    """一个帖子在流水线中的进度
+
+    pages 记录已开始抓取的评论页 [起始游标, 未保存的评论数, 该页之前已抓取的评论数]，
+    断点中的续抓游标取第一页仍有未保存评论的页，保证崩溃后不丢评论（重复的评论在保存时去重）
+    """
+
+    __slots__ = ("keyword", "note", "start_cursor", "taken", "pages", "finished", "newest", "comment_state")
+
+    def __init__(self, keyword: str, note: NoteRecord, start_cursor: str = "", taken: int = 0):
+        self.keyword = keyword
+        self.note = note
+        self.start_cursor = start_cursor
+        self.taken = taken
+        self.pages = deque()
+        self.finished = False
+        self.newest = Watermark()  # 本次抓到的最新一级评论，帖子完成后写入水位线
+        self.comment_state: Optional[NoteCommentState] = None  # 评论数与游标，帖子完成后保存
+
+    def begin_page(self, cursor: str) -> list:
+        page = [cursor, 0, self.taken]
+        self.pages.append(page)
+        return page
+
+    def release(self, page: list):
+        page[1] -= 1
+        # 已全部保存的旧页不再影响续抓位置
+        while len(self.pages) > 1 and self.pages[0][1] <= 0:
+            self.pages.popleft()
+
+    @property
+    def done(self) -> bool:
+        return self.finished and all(page[1] <= 0 for page in self.pages)
+
+    def resume_point(self):
+        """(续抓游标, 该游标之前已抓取的评论数)"""
+        for cursor, pending, taken in self.pages:
+            if pending > 0:
+                return cursor, taken
+        if self.pages:
+            cursor, _, taken = self.pages[-1]
+            return cursor, taken
+        return self.start_cursor, self.taken
+
+    def to_checkpoint(self) -> Dict:
+        cursor, taken = self.resume_point()
+        return dict(self.note.to_dict(), detail_loaded=self.note.detail_loaded, cursor=cursor, taken=taken)
+
+
+class _CrawlJob:
+    """一次爬取任务的各阶段处理函数
+
+    search → detail → comments → sub_comments → profile → persist
+    每条评论经 profile 阶段（按需抓取主页简介）后交给 persist 阶段写入用户文件；
+    各关键词的搜索进度与未完成帖子的评论游标定期写入断点
+    """
+
+    def __init__(
+        self, runner: CrawlRunner, crawler, status: Dict, keywords, max_notes, max_comments, comment_filter_keywords,
+        resume=False, incremental=False, cutoff=0, keyword_weights=None, desc_filter_keywords=(),
+    ):
+        self.runner = runner
+        self.crawler = crawler
+        self.status = status  # 本任务的状态字典，/api/jobs/<id> 返回它的快照
+        self.started_at = time.monotonic()
+        self.keywords = keywords
+        self.max_notes = max_notes
+        self.max_comments = max_comments
+        # 过滤词编译一次，整个任务复用；命中的词随评论/用户一起保存
+        self.comment_matcher = KeywordMatcher(comment_filter_keywords)
+        self.desc_matcher = KeywordMatcher(desc_filter_keywords)
+        self.resume = resume
+        self.incremental = incremental
+        self.cutoff = cutoff
+        # 各关键词并发搜索，共用一个请求预算：同一时间一个搜索请求、请求间隔 SEARCH_REQUEST_INTERVAL，
+        # 按权重轮流分配，结果页多的关键词不会拖慢其他关键词
+        self.scheduler = FairScheduler(concurrency=1, interval=SEARCH_REQUEST_INTERVAL)
+        for keyword in keywords:
+            self.scheduler.register(keyword, (keyword_weights or {}).get(keyword, 1))
+        self.active_keywords: List[str] = []
+        # 关键词 -> 本次搜索到的最新帖子，关键词全部完成后写入水位线
+        self.newest_notes: Dict[str, Watermark] = {}
+        # 搜索已结束的关键词；关键词 -> [交给下游的帖子数, 已完成的帖子数]，用于计算进度
+        self.searched_keywords = set()
+        self.keyword_notes: Dict[str, List[int]] = {keyword: [0, 0] for keyword in keywords}
+        self.notes_found = 0
+        self.notes_done = 0
+        self.checkpoints: Dict[str, KeywordCheckpoint] = {}
+        # note_id -> 进行中的帖子
+        self.in_flight: Dict[str, _NoteProgress] = {}
+        # 本次任务已交给下游的帖子；其他关键词再搜到时只合并来源关键词，不重复抓评论
+        self.seen_notes = set()
+        # 本次任务中已确认过主页简介的用户，避免重复读文件/请求主页
+        self.desc_resolved: Dict[str, Optional[str]] = {}
+        # 本次任务中保存过评论的用户，用于统计用户数
+        self.saved_users = set()
+        workers = dict(DEFAULT_STAGE_WORKERS, **runner.stage_workers)
+        handlers = [
+            ("search", self.search),
+            ("detail", self.detail),
+            ("comments", self.comments),
+            ("sub_comments", self.sub_comments),
+            ("profile", self.profile),
+            ("persist", self.persist),
+        ]
+        self.pipeline = Pipeline([
+            Stage(name, handler, workers=workers[name], queue_size=runner.queue_size)
+            for name, handler in handlers
+        ])
+
+    def report(self):
+        """把各阶段队列深度/吞吐与整体进度写入任务状态"""
+        status = self.status
+        status['stages'] = self.pipeline.stats()
+        # 各阶段处理出错（条目被丢弃）的次数
+        status['errors'] = {name: stage['errors'] for name, stage in status['stages'].items() if stage['errors']}
+        status['signer'] = self.crawler.get_signer_stats()
+        status['requests'] = self.crawler.get_request_stats()
+        status['keywords'] = self.scheduler.stats()
+        # 进度 = 各关键词完成比例之和 / 关键词数；仍在搜索的关键词按 max_notes 个帖子计，
+        # 搜到新帖子时比例不下降，搜索结束后按实际帖子数计
+        shares = 0.0
+        for keyword in self.keywords:
+            found, done = self.keyword_notes[keyword]
+            total = found if keyword in self.searched_keywords else max(found, self.max_notes)
+            shares += done / total if total else 1
+        progress = int(shares / (len(self.keywords) or 1) * 100)
+        status['progress'] = max(status.get('progress', 0), progress)
+        elapsed = time.monotonic() - self.started_at
+        status['notes_found'] = self.notes_found
+        status['notes_done'] = self.notes_done
+        status['elapsed'] = round(elapsed, 1)
+        status['comments_per_sec'] = round(status['total_comments'] / elapsed, 2) if elapsed > 0 else 0.0
+
+    async def report_forever(self, interval: float = 1.0):
+        while True:
+            self.report()
+            # 取消时等本次保存写完再退出（线程池中的写入无法中途取消）
+            save = asyncio.ensure_future(self.save_checkpoints())
+            try:
+                await asyncio.shield(save)
+            except asyncio.CancelledError:
+                await asyncio.wait([save])
+                raise
+            await asyncio.sleep(interval)
+
+    async def save_checkpoints(self):
+        """把各关键词进度写入断点文件（在线程池中执行）"""
+        snapshots = []
+        for checkpoint in self.checkpoints.values():
+            checkpoint.pending_notes = {
+                note_id: progress.to_checkpoint()
+                for note_id, progress in self.in_flight.items()
+                if progress.keyword == checkpoint.keyword
+            }
+            snapshots.append(KeywordCheckpoint(checkpoint.keyword, checkpoint.to_dict()))
+        loop = asyncio.get_running_loop()
+        for snapshot in snapshots:
+            await loop.run_in_executor(None, self.runner.checkpoints.save, snapshot)
+
+    def _since(self, watermark: Watermark, incremental: Optional[bool] = None) -> Optional[Watermark]:
+        """本次翻页的停止位置：增量爬取时为上次的水位线，再叠加绝对截止时间"""
+        incremental = self.incremental if incremental is None else incremental
+        since = (watermark if incremental else Watermark()).with_cutoff(self.cutoff)
+        return since if since.time else None
+
+    async def save_watermarks(self):
+        """已完成关键词的最新帖子写入水位线（帖子的评论水位线在帖子完成时更新），并保存帖子来源"""
+        watermarks = self.runner.watermarks
+        for keyword, checkpoint in self.checkpoints.items():
+            if checkpoint.completed and keyword in self.newest_notes:
+                watermarks.update_keyword(keyword, self.newest_notes[keyword])
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, watermarks.save)
+        await loop.run_in_executor(None, self.runner.notes.save)
+
+    def _note_done(self, progress: _NoteProgress):
+        """帖子评论全部抓取并保存后记入断点"""
+        if self.in_flight.pop(progress.note.note_id, None) is None:
+            return
+        self.runner.watermarks.update_note(progress.note.note_id, progress.newest)
+        if progress.comment_state is not None:
+            self.runner.watermarks.update_comment_state(progress.note.note_id, progress.comment_state)
+        self.notes_done += 1
+        self.keyword_notes[progress.keyword][1] += 1
+        self.checkpoints[progress.keyword].done_note_ids.append(progress.note.note_id)
+
+    async def search(self, keyword: str, emit):
+        """第一级：搜索关键词，每页结果立即交给下游；续爬时先交出断点中未完成的帖子"""
+        status = self.status
+        self.active_keywords.append(keyword)
+        status['current_keyword'] = '、'.join(self.active_keywords)
+        status['message'] = f'正在爬取关键词: {status["current_keyword"]} (帖子数: {self.max_notes}, 评论数: {self.max_comments})'
+        try:
+            await self._search_keyword(keyword, emit)
+        finally:
+            self.active_keywords.remove(keyword)
+            status['current_keyword'] = '、'.join(self.active_keywords)
+
+    async def _search_keyword(self, keyword: str, emit):
+
+        checkpoint = self.runner.checkpoints.load(keyword) if self.resume else None
+        if checkpoint is None:
+            checkpoint = KeywordCheckpoint(keyword)
+        self.checkpoints[keyword] = checkpoint
+        if checkpoint.completed:
+            print(f"[爬虫] 关键词「{keyword}」 断点显示已完成，跳过")
+            self.searched_keywords.add(keyword)
+            return
+
+        for note in checkpoint.pending_note_records():
+            info = checkpoint.pending_notes[note.note_id]
+            await self._emit_note(emit, _NoteProgress(keyword, note, info.get('cursor', ''), info.get('taken', 0)))
+        if checkpoint.pending_notes:
+            print(f"[爬虫] 关键词「{keyword}」 从断点恢复 {len(checkpoint.pending_notes)} 个未完成帖子")
+
+        count = 0
+        if not checkpoint.search_done and checkpoint.found < self.max_notes:
+            def on_page(page: int, search_id: str):
+                checkpoint.search_id = search_id
+                checkpoint.next_page = page + 1
+
+            skip_note_ids = set(checkpoint.done_note_ids) | set(checkpoint.pending_notes)
+            async for note in self.crawler.iter_search_notes_async(
+                keyword,
+                max_notes=self.max_notes - checkpoint.found,
+                search_id=checkpoint.search_id or None,
+                start_page=checkpoint.next_page,
+                skip_note_ids=skip_note_ids,
+                on_page=on_page,
+                since=self._since(self.runner.watermarks.keyword(keyword)),
+                scheduler=self.scheduler,
+            ):
+                count += 1
+                checkpoint.found += 1
+                await self._emit_note(emit, _NoteProgress(keyword, note))
+        checkpoint.search_done = True
+        print(f"[爬虫] 关键词「{keyword}」 共获取 {count} 个帖子")
+        self.searched_keywords.add(keyword)
+
+    async def _emit_note(self, emit, progress: _NoteProgress):
+        note_id = progress.note.note_id
+        self.newest_notes.setdefault(progress.keyword, Watermark()).advance({'id': note_id})
+        self.runner.notes.add_keyword(note_id, progress.keyword)
+        duplicate = note_id in self.seen_notes
+        if not duplicate and self.runner.note_claims is not None:
+            # 多进程爬取：其他工作进程中的关键词可能已登记该帖子
+            duplicate = not await asyncio.get_running_loop().run_in_executor(
+                None, self.runner.note_claims.claim, note_id, progress.keyword
+            )
+        if duplicate:
+            print(f"[爬虫] 帖子 {note_id[:12]}... 已由其他关键词抓取，合并来源关键词「{progress.keyword}」")
+            done_note_ids = self.checkpoints[progress.keyword].done_note_ids
+            if note_id not in done_note_ids:
+                done_note_ids.append(note_id)
+            return
+        self.seen_notes.add(note_id)
+        self.notes_found += 1
+        self.keyword_notes[progress.keyword][0] += 1
+        self.in_flight[progress.note.note_id] = progress
+        await emit("detail", progress)
+
+    async def detail(self, progress: _NoteProgress, emit):
+        """按需补充笔记详情；仅由搜索结果构建且配置要求详情时才请求"""
+        if self.runner.fetch_note_detail and not progress.note.detail_loaded:
+            await self.crawler.load_note_detail_async(progress.note)
+        await emit("comments", progress)
+
+    async def comments(self, progress: _NoteProgress, emit):
+        """第二级：逐页抓取帖子一级评论；有更多子评论的交给 sub_comments 阶段"""
+        note = progress.note
+        state = progress.comment_state = self.runner.watermarks.comment_state(note.note_id)
+        # 上次已抓完的帖子有了新评论：新评论在最前面几页，全量爬取同样只翻到评论水位线为止
+        since = self._since(self.runner.watermarks.note(note.note_id), self.incremental or state.complete)
+        if not progress.start_cursor and state.unchanged(note.comment_count):
+            print(f"[爬虫] 帖子 {note.note_id[:12]}... 评论数未变化（{note.comment_count}），跳过")
+            progress.finished = True
+            self._note_done(progress)
+            return
+        count = 0
+        page_cursors = []  # 当前页的游标，由 on_page 记下
+
+        # 断点中的游标优先；否则从头翻到水位线为止，或全量爬取时从上次中途停下的游标继续（重复的评论保存时去重）
+        try:
+            async with aclosing(self.crawler.client.iter_note_comments(
+                note.note_id, note.xsec_token,
+                crawl_interval=COMMENT_PAGE_INTERVAL,
+                max_count=self.max_comments - progress.taken,
+                since=since,
+                state=state,
+                cursor=progress.start_cursor or None,
+                on_page=page_cursors.append,
+            )) as pages:
+                async for comments in pages:
+                    page = progress.begin_page(page_cursors.pop())
+                    for comment in comments:
+                        progress.newest.advance(comment)
+                    out_of_budget = False
+                    for comment in comments:
+                        if not self._take_budget(progress):
+                            out_of_budget = True
+                            break
+                        count += await self._emit_comment(emit, progress, page, comment)
+                        if ENABLE_GET_SUB_COMMENTS and comment.get("sub_comment_has_more"):
+                            page[1] += 1  # 子评论抓完前本页不算完成
+                            await emit("sub_comments", (progress, page, comment))
+                    if out_of_budget:
+                        break  # 子评论用完了配额，帖子记为未抓完
+            # 评论数与游标、是否抓完由 iter_note_comments 记入 state
+            state.comment_count = note.comment_count
+            # 出错时帖子保留在断点中，续爬时从最后的游标继续
+            progress.finished = True
+            if progress.done:
+                self._note_done(progress)
+        finally:
+            print(f"[爬虫] 帖子 {note.note_id[:12]}... 评论数: {count}")
+            self.status['message'] = f'已处理帖子 {self.notes_done}/{self.notes_found}: {note.note_id[:8]}...'
+
+    async def sub_comments(self, item, emit):
+        """逐页抓取一条一级评论下的子评论"""
+        progress, page, root_comment = item
+        note = progress.note
+        try:
+            async with aclosing(self.crawler.client.iter_sub_comments(
+                note.note_id, root_comment, note.xsec_token,
+                crawl_interval=COMMENT_PAGE_INTERVAL, num=SUB_COMMENT_PAGE_SIZE,
+            )) as pages:
+                async for comments in pages:
+                    for comment in comments:
+                        if not self._take_budget(progress):
+                            return
+                        await self._emit_comment(emit, progress, page, comment)
+        finally:
+            self._release(progress, page)
+
+    def _take_budget(self, progress: _NoteProgress) -> bool:
+        """每个帖子最多 max_comments 条评论（一级评论与子评论共用）"""
+        if progress.taken >= self.max_comments:
+            return False
+        progress.taken += 1
+        return True
+
+    def _release(self, progress: _NoteProgress, page: list):
+        progress.release(page)
+        if progress.done:
+            self._note_done(progress)
+
+    async def _emit_comment(self, emit, progress: _NoteProgress, page: list, raw_comment) -> int:
+        """原始评论转换为 CommentRecord，过滤后交给 profile 阶段；返回交出的条数"""
+        comment = CommentRecord.from_api(raw_comment)
+        if comment is None:
+            return 0
+        matched = []
+        if self.comment_matcher and comment.content:
+            matched = self.comment_matcher.find_all(comment.content)
+            if not matched:
+                return 0
+        page[1] += 1
+        await emit("profile", (progress, page, comment, matched))
+        return 1
+
+    async def profile(self, item, emit):
+        """用户尚无主页简介时请求用户主页（该阶段最慢，队列满时反压评论抓取）；按简介过滤用户"""
+        progress, page, comment, matched = item
+        user_id = comment.user.user_id
+        if user_id not in self.desc_resolved:
+            loop = asyncio.get_running_loop()
+            existing_user = await loop.run_in_executor(None, self.runner.store.load, user_id)
+            if existing_user is None or UserStore.needs_desc(existing_user):
+                desc = await self.runner._fetch_creator_desc(self.crawler, user_id, progress.note)
+            else:
+                desc = existing_user.get('desc') or existing_user.get('user_desc')
+            self.desc_resolved[user_id] = desc
+        desc = self.desc_resolved[user_id]
+        desc_matched = []
+        if self.desc_matcher:
+            desc_matched = self.desc_matcher.find_all(desc or '')
+            if not desc_matched:
+                self._release(progress, page)
+                return
+        await emit("persist", (progress, page, comment, matched, desc, desc_matched))
+
+    async def persist(self, item, emit):
+        """保存评论和用户信息；文件读写放到线程池，不阻塞事件循环"""
+        progress, page, comment, matched, desc, desc_matched = item
+        user = comment.user
+        loop = asyncio.get_running_loop()
+        lock = self.runner._user_locks.setdefault(user.user_id, asyncio.Lock())
+        async with lock:
+            _, is_new_user, added = await loop.run_in_executor(
+                None, self.runner.store.save_comment,
+                user, comment, progress.note, progress.keyword, matched, desc, desc_matched,
+            )
+        if not added:
+            # 已保存过的评论（断点续爬从中途的游标重翻一页等）不计数
+            self._release(progress, page)
+            return
+        # 控制台日志：用户原始信息（新用户时打完整，老用户只打一条简短日志）
+        if is_new_user:
+            print(f"[爬虫] 新用户原始信息 user_id={user.user_id}:", json.dumps(user.to_dict(), ensure_ascii=False, indent=2))
+        else:
+            print(f"[爬虫] 已有用户追加评论 user_id={user.user_id} nickname={user.nickname}")
+        self.status['total_comments'] += 1
+        if user.user_id not in self.saved_users:
+            self.saved_users.add(user.user_id)
+            self.status['total_users'] += 1
+        self._release(progress, page)
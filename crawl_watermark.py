@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+增量爬取水位线
+记录每个关键词已爬到的最新帖子、每个帖子已爬到的最新评论（时间 + ID），
+下次爬取时翻页到水位线即停止，只抓取新增内容；
+同时记录每个帖子上次的评论数与评论游标，评论数没变的帖子不再翻评论；
+多个爬取进程共用同一文件，保存时在文件锁内与文件中其他进程写入的水位线合并
+"""
+import json
+import os
+import threading
+from typing import Dict, Set
+
+from file_lock import FileLock
+from xhs_crawler.media_platform.xhs.watermark import NoteCommentState, Watermark
+
+
+class WatermarkStore:
+    """水位线保存在一个 JSON 文件中：{'keywords': {关键词: 水位线}, 'notes': {帖子 ID: 水位线 + 评论状态}}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._read()
+        # 本进程更新过、尚未写入文件的关键词/帖子
+        self._dirty: Dict[str, Set[str]] = {'keywords': set(), 'notes': set()}
+
+    def _read(self) -> Dict[str, Dict]:
+        data = {'keywords': {}, 'notes': {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                data['keywords'].update(saved.get('keywords', {}))
+                data['notes'].update(saved.get('notes', {}))
+            except (OSError, ValueError) as e:
+                print(f"[爬虫] 水位线文件损坏，忽略: {e}")
+        return data
+
+    def keyword(self, keyword: str) -> Watermark:
+        with self._lock:
+            return Watermark.from_dict(self._data['keywords'].get(keyword))
+
+    def note(self, note_id: str) -> Watermark:
+        with self._lock:
+            return Watermark.from_dict(self._data['notes'].get(note_id))
+
+    def comment_state(self, note_id: str) -> NoteCommentState:
+        with self._lock:
+            return NoteCommentState.from_dict(self._data['notes'].get(note_id))
+
+    def update_comment_state(self, note_id: str, state: NoteCommentState):
+        with self._lock:
+            self._data['notes'].setdefault(note_id, {}).update(state.to_dict())
+            self._dirty['notes'].add(note_id)
+
+    def update_keyword(self, keyword: str, watermark: Watermark):
+        self._update('keywords', keyword, watermark)
+
+    def update_note(self, note_id: str, watermark: Watermark):
+        self._update('notes', note_id, watermark)
+
+    def _update(self, kind: str, key: str, watermark: Watermark):
+        if not watermark.time:
+            return
+        with self._lock:
+            # 水位线只前进不后退
+            current = Watermark.from_dict(self._data[kind].get(key))
+            if current.is_new({'time': watermark.time, 'id': watermark.item_id}):
+                self._data[kind].setdefault(key, {}).update(watermark.to_dict())
+                self._dirty[kind].add(key)
+
+    def save(self):
+        """与文件中的内容合并后写入（先写临时文件再替换），其他进程写入的水位线同时读入内存"""
+        with FileLock(self.path + '.lock'):
+            merged = self._read()
+            with self._lock:
+                for kind, keys in self._dirty.items():
+                    for key in keys:
+                        merged[kind][key] = _merge_entry(merged[kind].get(key), self._data[kind][key])
+                    keys.clear()
+                self._data = merged
+                snapshot = json.dumps(merged, ensure_ascii=False)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+
+
+def _merge_entry(saved: Dict, own: Dict) -> Dict:
+    """文件中的记录叠加本进程的更新；水位线取两者中较新的（只前进不后退）"""
+    entry = dict(saved or {})
+    update = dict(own)
+    saved_is_newer = bool(saved and saved.get('time')) and Watermark.from_dict(own).is_new(
+        {'time': saved['time'], 'id': saved.get('id', '')}
+    )
+    if saved_is_newer:
+        update.pop('time', None)
+        update.pop('id', None)
+    entry.update(update)
+    return entry
@@ -0,0 +1,567 @@
+# -*- coding: utf-8 -*-
+"""
+多机分布式爬取
+中心节点（app.py）把一批关键词作为工作项放入共享工作队列（见 work_queue），各台机器上的工作者领取工作项：
+    keyword 项：搜索关键词，结果为帖子列表
+    note 项：抓取帖子评论及评论用户的主页简介，结果为评论列表
+中心节点的合并线程取回结果：keyword 结果登记帖子来源，并为每个帖子放入 note 项（同一批次内同一帖子只放一次，
+带上该帖子的评论水位线与评论状态）；note 结果写入用户存储、评论水位线与评论状态。评论按 ID 去重，重复投递不会重复保存。
+关键词水位线在其搜到的帖子全部合并后才前进，帖子工作项失败时下次增量爬取仍会搜到这些帖子。
+工作者只需能访问队列和签名服务，不需要访问中心节点的数据目录；加机器即可扩容。
+
+启动工作者（每台机器一个或多个进程）：
+    XHS_SIGN_SERVER=tcp://127.0.0.1:8765 python distributed_crawl.py --queue redis://queue-host:6379/0
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from contextlib import aclosing
+from typing import Callable, Dict, List, Optional
+
+from xhs_crawler.config_stub import WORK_QUEUE_URL
+from xhs_crawler.media_platform.xhs.records import CommentRecord, NoteRecord, UserRecord
+from xhs_crawler.media_platform.xhs.watermark import NoteCommentState, Watermark
+from xhs_crawler.tools.keyword_matcher import compile_keywords
+from xhs_crawler_adapter import XHSCrawlerAdapter
+from crawl_runner import PROFILE_REQUEST_INTERVAL
+from crawl_watermark import WatermarkStore
+from note_registry import NoteRegistry
+from user_store import UserStore
+from work_queue import DEFAULT_LEASE_SECONDS, ITEM_LEASED, ITEM_QUEUED, WorkItem, WorkQueue, open_work_queue
+
+# 工作者同时处理的工作项数
+DEFAULT_WORKER_CONCURRENCY = 2
+# 队列为空时工作者再次领取的间隔（秒）
+IDLE_POLL_INTERVAL = 2.0
+# 合并线程每次取回的结果数，以及没有结果时的轮询间隔（秒）
+MERGE_BATCH_SIZE = 50
+MERGE_POLL_INTERVAL = 1.0
+# 工作项类型
+KIND_KEYWORD = 'keyword'
+KIND_NOTE = 'note'
+
+
+class QueueWorker:
+    """从工作队列领取 keyword / note 工作项并处理，处理期间每隔租约的 1/3 续租一次
+
+    续租失败（租约已到期并被重新投递）时放弃当前工作项，由新领取的工作者重做
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        worker_id: Optional[str] = None,
+        crawler_factory: Callable[[], XHSCrawlerAdapter] = XHSCrawlerAdapter,
+        concurrency: int = DEFAULT_WORKER_CONCURRENCY,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ):
+        """
+        Args:
+            queue: 共享工作队列
+            worker_id: 工作者标识，默认为 主机名-进程号
+            crawler_factory: 创建爬虫适配器
+            concurrency: 同时处理的工作项数
+            lease_seconds: 租约时长（秒）
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.crawler_factory = crawler_factory
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.processed = 0
+        # user_id -> 主页简介，同一工作者不重复请求同一用户主页
+        self._desc_cache: Dict[str, Optional[str]] = {}
+        self._profile_lock = None
+        self._handlers = {KIND_KEYWORD: self._search_keyword, KIND_NOTE: self._crawl_note}
+
+    async def run_async(self, stop: Optional[asyncio.Event] = None, exit_when_idle: bool = False):
+        """持续领取并处理工作项，直到 stop 被设置（或 exit_when_idle 时队列为空）"""
+        stop = stop or asyncio.Event()
+        self._profile_lock = asyncio.Lock()
+        crawler = self.crawler_factory()
+        # 只需搜索结果中的标题与 xsec_token，不逐条请求笔记详情
+        crawler.search_without_detail = True
+        try:
+            await crawler.init_browser_async()
+            print(f"[分布式] 工作者 {self.worker_id} 已启动，并发 {self.concurrency}")
+            await asyncio.gather(*(self._work_loop(crawler, stop, exit_when_idle) for _ in range(self.concurrency)))
+        finally:
+            await crawler.close_async()
+            print(f"[分布式] 工作者 {self.worker_id} 已停止，共处理 {self.processed} 个工作项")
+
+    async def _work_loop(self, crawler, stop: asyncio.Event, exit_when_idle: bool):
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            item = await loop.run_in_executor(None, self.queue.lease, self.worker_id, self.lease_seconds)
+            if item is None:
+                if exit_when_idle:
+                    return
+                try:
+                    await asyncio.wait_for(stop.wait(), IDLE_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(crawler, item)
+
+    async def _process(self, crawler, item: WorkItem):
+        loop = asyncio.get_running_loop()
+        handler = self._handlers.get(item.kind)
+        if handler is None:
+            await loop.run_in_executor(None, self.queue.fail, item, f'未知的工作项类型: {item.kind}')
+            return
+        task = asyncio.ensure_future(handler(crawler, item))
+        heartbeat = asyncio.ensure_future(self._heartbeat(item, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if heartbeat.done():
+                return  # 租约已失效，已由心跳取消
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            await loop.run_in_executor(None, self.queue.fail, item, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        if await loop.run_in_executor(None, self.queue.complete, item, result):
+            self.processed += 1
+        else:
+            print(f"[分布式] 工作项 {item.item_id} 租约已失效，结果丢弃")
+
+    async def _heartbeat(self, item: WorkItem, task: asyncio.Future):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await loop.run_in_executor(None, self.queue.heartbeat, item, self.lease_seconds)
+            except Exception as e:
+                # 队列暂时不可用：继续处理，下个周期再续租
+                print(f"[分布式] 工作项 {item.item_id} 续租出错: {e}")
+                continue
+            if not renewed:
+                print(f"[分布式] 工作项 {item.item_id} 租约已失效，放弃处理")
+                task.cancel()
+                return
+
+    async def _search_keyword(self, crawler, item: WorkItem) -> Dict:
+        """keyword 项：搜索帖子，只返回帖子列表（由中心节点去重后放入 note 项）"""
+        payload = item.payload
+        keyword = payload['keyword']
+        notes = []
+        newest = Watermark()
+        async for note in crawler.iter_search_notes_async(
+            keyword, max_notes=payload['params']['max_notes'], since=_watermark(payload.get('since')),
+        ):
+            notes.append(dict(note.to_dict(), detail_loaded=note.detail_loaded))
+            newest.advance({'id': note.note_id})
+        print(f"[分布式] 关键词「{keyword}」 共获取 {len(notes)} 个帖子")
+        return {'keyword': keyword, 'notes': notes, 'newest': newest.to_dict()}
+
+    async def _crawl_note(self, crawler, item: WorkItem) -> Dict:
+        """note 项：抓取评论并请求评论用户的主页简介，按评论/简介过滤词过滤"""
+        payload = item.payload
+        params = payload['params']
+        note = NoteRecord(**payload['note'])
+        comment_matcher = compile_keywords(tuple(params['comment_filter_keywords']))
+        desc_matcher = compile_keywords(tuple(params['desc_filter_keywords']))
+        comments = []
+        newest = Watermark()
+        state = NoteCommentState.from_dict(payload.get('comment_state'))
+        async with aclosing(crawler.iter_note_comments_async(
+            note.note_id, note.xsec_token, params['max_comments'], params['comment_filter_keywords'],
+            _watermark(payload.get('since')), state,
+        )) as pages:
+            async for records in pages:
+                for comment in records:
+                    newest.advance({'id': comment.comment_id, 'time': comment.time})
+                    desc = await self._creator_desc(crawler, comment.user.user_id, note)
+                    desc_matched = desc_matcher.find_all(desc or '') if desc_matcher else []
+                    if desc_matcher and not desc_matched:
+                        continue
+                    comments.append({
+                        'comment': comment.to_dict(),
+                        'matched': comment_matcher.find_all(comment.content) if comment_matcher else [],
+                        'desc': desc,
+                        'desc_matched': desc_matched,
+                    })
+        state.comment_count = note.comment_count
+        print(f"[分布式] 帖子 {note.note_id[:12]}... 评论数: {len(comments)}")
+        return {
+            'keyword': payload['keyword'], 'note': payload['note'], 'comments': comments, 'newest': newest.to_dict(),
+            'comment_state': state.to_dict(),
+        }
+
+    async def _creator_desc(self, crawler, user_id: str, note: NoteRecord) -> Optional[str]:
+        """用户主页简介；主页请求串行并保持间隔"""
+        if user_id in self._desc_cache:
+            return self._desc_cache[user_id]
+        async with self._profile_lock:
+            if user_id not in self._desc_cache:
+                creator_info = await crawler.get_creator_info_async(user_id, note.xsec_token, note.xsec_source or 'pc_note')
+                self._desc_cache[user_id] = XHSCrawlerAdapter.get_creator_desc(creator_info) or None
+                await asyncio.sleep(PROFILE_REQUEST_INTERVAL)
+            return self._desc_cache[user_id]
+
+
+class DistributedCrawl:
+    """中心节点：提交批次、合并工作者提交的结果、汇总进度；同一时间只运行一批
+
+    批次状态保存在 state_file，服务重启后 start() 继续合并未完成的批次（工作项一直在队列中）
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        store: UserStore,
+        notes: Optional[NoteRegistry] = None,
+        watermarks: Optional[WatermarkStore] = None,
+        state_file: Optional[str] = None,
+        autostart: bool = True,
+    ):
+        """
+        Args:
+            queue: 共享工作队列
+            store: 用户数据存储
+            notes: 帖子来源关键词登记，未提供时存放在用户目录旁的 notes.json
+            watermarks: 增量爬取水位线，未提供时存放在用户目录旁的 watermarks.json
+            state_file: 批次状态文件，未提供时为用户目录旁的 distributed_run.json
+            autostart: submit() 时是否自动启动合并线程；为 False 时由调用方 start() 或手动 merge_once()
+        """
+        data_dir = os.path.dirname(store.users_dir)
+        self.queue = queue
+        self.store = store
+        self.notes = notes or NoteRegistry(os.path.join(data_dir, 'notes.json'))
+        self.watermarks = watermarks or WatermarkStore(os.path.join(data_dir, 'watermarks.json'))
+        self.state_file = state_file or os.path.join(data_dir, 'distributed_run.json')
+        self.autostart = autostart
+        self._lock = threading.Lock()
+        # 合并线程与手动调用的 merge_once()/_check_finished() 互斥，同一批结果不会被合并两次
+        self._merge_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._run: Optional[Dict] = self._load_run()
+
+    def start(self):
+        """启动合并线程，继续合并上次未完成的批次"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._merge_forever, name="distributed-merge", daemon=True)
+                self._thread.start()
+
+    def shutdown(self) -> bool:
+        """停止合并线程；工作项留在队列中，工作者继续处理，下次 start() 时合并其结果
+
+        须在 queue.close() 之前调用并完成：返回 False 表示合并线程仍未退出（正在合并一批结果），
+        此时不要关闭队列
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(MERGE_POLL_INTERVAL * 5)
+            if self._thread.is_alive():
+                return False
+        return True
+
+    def submit(
+        self,
+        keywords: List[str],
+        max_notes: int = 100,
+        max_comments: int = 100,
+        comment_filter_keywords: List[str] = [],
+        incremental: bool = False,
+        cutoff: int = 0,
+        desc_filter_keywords: List[str] = [],
+    ) -> str:
+        """把一批关键词放入工作队列（线程安全），返回批次 ID；参数含义同 CrawlRunner.submit
+
+        已有批次未完成时抛出 RuntimeError
+        """
+        params = {
+            'max_notes': max_notes,
+            'max_comments': max_comments,
+            'comment_filter_keywords': list(comment_filter_keywords),
+            'incremental': incremental,
+            'cutoff': cutoff,
+            'desc_filter_keywords': list(desc_filter_keywords),
+        }
+        with self._lock:
+            if self._run is not None and not self._run['finished_at']:
+                raise RuntimeError('已有分布式爬取批次未完成')
+            run_id = uuid.uuid4().hex[:12]
+            keywords = list(dict.fromkeys(keywords))
+            for keyword in keywords:
+                since = _since(self.watermarks.keyword(keyword), incremental, cutoff)
+                self.queue.put(run_id, KIND_KEYWORD, keyword, {'keyword': keyword, 'since': since, 'params': params})
+            self._run = {
+                'id': run_id,
+                'keywords': keywords,
+                'params': params,
+                'started_at': time.time(),
+                'finished_at': None,
+                'notes_found': 0,
+                'notes_done': 0,
+                'keywords_done': 0,
+                'total_comments': 0,
+                # 保存了评论的用户，用于统计用户数
+                'users': [],
+                # 关键词 -> {'newest': 本次搜到的最新帖子, 'notes': 尚未合并的帖子}，帖子全部合并后写入水位线
+                'keyword_notes': {},
+                'message': f'已放入工作队列，等待工作者领取（{len(keywords)} 个关键词）',
+            }
+            self._save_run()
+        if self.autostart:
+            self.start()
+        return run_id
+
+    def status(self) -> Dict:
+        """批次进度（兼容 CrawlRunner.status 的字段），queue 为队列中各状态的工作项数"""
+        with self._lock:
+            run = dict(self._run) if self._run else None
+        if run is None:
+            return {
+                'running': False, 'job_id': None, 'current_keyword': '', 'progress': 0, 'total_users': 0,
+                'total_comments': 0, 'message': '', 'running_jobs': 0, 'queued_jobs': 0, 'queue': {},
+            }
+        stats = self.queue.stats(run['id']) if not run['finished_at'] else {}
+        total = sum(stats.get(state, 0) for state in ('queued', 'leased', 'done', 'failed'))
+        finished = stats.get('done', 0) + stats.get('failed', 0)
+        elapsed = (run['finished_at'] or time.time()) - run['started_at']
+        return {
+            'running': not run['finished_at'],
+            'job_id': run['id'],
+            'current_keyword': '',
+            'progress': 100 if run['finished_at'] else int(finished / total * 100) if total else 0,
+            'total_users': _total_users(run),
+            'total_comments': run.get('total_comments', 0),
+            'message': run['message'],
+            'notes_found': run['notes_found'],
+            'notes_done': run['notes_done'],
+            'keywords_done': run['keywords_done'],
+            'elapsed': round(elapsed, 1),
+            'comments_per_sec': round(run.get('total_comments', 0) / elapsed, 2) if elapsed > 0 else 0.0,
+            'running_jobs': stats.get(ITEM_LEASED, 0),
+            'queued_jobs': stats.get(ITEM_QUEUED, 0),
+            'queue': stats,
+        }
+
+    def merge_once(self) -> int:
+        """取回一批结果合并到用户存储/帖子来源/水位线并确认，返回合并的结果数"""
+        with self._merge_lock:
+            results = self.queue.results(MERGE_BATCH_SIZE)
+            if not results:
+                return 0
+            for item, result in results:
+                if item.kind == KIND_KEYWORD:
+                    self._merge_keyword(item, result)
+                elif item.kind == KIND_NOTE:
+                    self._merge_note(item, result)
+            # 先落盘再确认：确认前中断时结果会再次合并（评论按 ID 去重）
+            self.notes.save()
+            self.watermarks.save()
+            self.queue.ack([item for item, _ in results])
+            with self._lock:
+                if self._run is not None:
+                    self._save_run()
+            return len(results)
+
+    def _merge_forever(self):
+        while not self._stop.is_set():
+            try:
+                merged = self.merge_once()
+                self._check_finished()
+            except Exception as e:
+                if self._stop.is_set():
+                    break  # 停止后队列可能已关闭，不再重试
+                print(f"[分布式] 合并结果出错: {e}")
+                traceback.print_exc()
+                merged = 0
+            if not merged:
+                self._stop.wait(MERGE_POLL_INTERVAL)
+
+    def _merge_keyword(self, item: WorkItem, result: Dict):
+        """登记帖子来源，为每个帖子放入 note 项；评论数没变的帖子不再放入
+
+        关键词水位线等这些帖子（包括其他关键词已放入的）全部合并后再写入，见 _note_merged
+        """
+        keyword = result['keyword']
+        params = item.payload['params']
+        queued = 0
+        waiting = []
+        with self._lock:
+            current = self._run is not None and self._run['id'] == item.run_id
+            keyword_notes = self._run.setdefault('keyword_notes', {}) if current else {}
+            # 本批次中已放入、尚未合并的帖子
+            unmerged = {note_id for entry in keyword_notes.values() for note_id in entry['notes']}
+        for note in result['notes']:
+            note_id = note['note_id']
+            self.notes.add_keyword(note_id, keyword)
+            comment_state = self.watermarks.comment_state(note_id)
+            if comment_state.unchanged(note.get('comment_count')):
+                print(f"[分布式] 帖子 {note_id[:12]}... 评论数未变化（{note.get('comment_count')}），跳过")
+                continue
+            # 上次已抓完的帖子有了新评论：全量爬取同样只翻到评论水位线为止（新评论在最前面几页）
+            since = _since(
+                self.watermarks.note(note_id), params['incremental'] or comment_state.complete, params['cutoff'],
+            )
+            payload = {
+                'keyword': keyword, 'note': note, 'since': since, 'params': params,
+                'comment_state': comment_state.to_dict(),
+            }
+            if self.queue.put(item.run_id, KIND_NOTE, note_id, payload):
+                queued += 1
+                waiting.append(note_id)
+            elif note_id in unmerged:
+                waiting.append(note_id)
+        newest = Watermark.from_dict(result['newest'])
+        if not current:
+            # 之前批次迟到的结果：其帖子工作项已随批次删除，不再等待
+            self.watermarks.update_keyword(keyword, newest)
+        elif waiting:
+            with self._lock:
+                keyword_notes[keyword] = {'newest': newest.to_dict(), 'notes': waiting}
+        else:
+            self.watermarks.update_keyword(keyword, newest)
+        print(f"[分布式] 关键词「{keyword}」 {len(result['notes'])} 个帖子，新放入 {queued} 个帖子工作项")
+        self._update_run(item.run_id, notes_found=queued, keywords_done=1)
+
+    def _merge_note(self, item: WorkItem, result: Dict):
+        note = NoteRecord(**result['note'])
+        keyword = result['keyword']
+        # 只统计新保存的评论：租约过期重投递或续爬时重复的评论被存储丢弃
+        saved_users = []
+        for entry in result['comments']:
+            data = entry['comment']
+            user = UserRecord(**data['user'])
+            comment = CommentRecord(data['comment_id'], note.note_id, data['content'], user, data['like_count'], data['time'])
+            _, _, added = self.store.save_comment(
+                user, comment, note, keyword, entry['matched'], entry['desc'], entry['desc_matched'],
+            )
+            if added:
+                saved_users.append(user.user_id)
+        self.watermarks.update_note(note.note_id, Watermark.from_dict(result['newest']))
+        if 'comment_state' in result:
+            self.watermarks.update_comment_state(note.note_id, NoteCommentState.from_dict(result['comment_state']))
+        self._note_merged(item.run_id, note.note_id)
+        with self._lock:
+            if self._run is not None and self._run['id'] == item.run_id:
+                users = self._run.setdefault('users', [])
+                seen = set(users)
+                for user_id in saved_users:
+                    if user_id not in seen:
+                        seen.add(user_id)
+                        users.append(user_id)
+        self._update_run(item.run_id, notes_done=1, total_comments=len(saved_users))
+
+    def _note_merged(self, run_id: str, note_id: str):
+        """帖子已合并：等待它的关键词中，帖子全部合并的写入关键词水位线"""
+        with self._lock:
+            if self._run is None or self._run['id'] != run_id:
+                return
+            keyword_notes = self._run.setdefault('keyword_notes', {})
+            for keyword, entry in list(keyword_notes.items()):
+                if note_id in entry['notes']:
+                    entry['notes'].remove(note_id)
+                if not entry['notes']:
+                    self.watermarks.update_keyword(keyword, Watermark.from_dict(entry['newest']))
+                    del keyword_notes[keyword]
+
+    def _update_run(self, run_id: str, **counts):
+        with self._lock:
+            if self._run is None or self._run['id'] != run_id:
+                return  # 之前批次迟到的结果：数据照常合并，不计入当前批次
+            for name, count in counts.items():
+                self._run[name] = self._run.get(name, 0) + count
+            self._run['message'] = (
+                f"{self._run['keywords_done']}/{len(self._run['keywords'])} 个关键词已搜索，"
+                f"帖子 {self._run['notes_done']}/{self._run['notes_found']}"
+            )
+
+    def _check_finished(self):
+        """队列中已没有待处理、处理中和未合并的工作项时批次结束，删除其工作项"""
+        with self._merge_lock:
+            with self._lock:
+                run = self._run
+                if run is None or run['finished_at']:
+                    return
+            stats = self.queue.stats(run['id'])
+            if stats[ITEM_QUEUED] or stats[ITEM_LEASED] or stats['unmerged']:
+                return
+            with self._lock:
+                run['finished_at'] = time.time()
+                failed = f"，{stats['failed']} 个工作项失败" if stats['failed'] else ''
+                # 还有帖子未合并（工作项失败）的关键词不写入水位线
+                waiting = run.get('keyword_notes', {})
+                if waiting:
+                    failed += f"，{len(waiting)} 个关键词有帖子未完成，未更新其水位线"
+                run['message'] = f"爬取完成！共获取 {_total_users(run)} 个用户{failed}"
+                self._save_run()
+            self.queue.purge(run['id'])
+            print(f"[分布式] 批次 {run['id']} 结束: {run['message']}")
+
+    def _load_run(self) -> Optional[Dict]:
+        if not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[分布式] 批次状态文件损坏，忽略: {e}")
+            return None
+
+    def _save_run(self):
+        """写入批次状态文件（先写临时文件再替换；调用方持有 self._lock）"""
+        snapshot = json.dumps(self._run, ensure_ascii=False)
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.state_file)
+
+
+def _since(watermark: Watermark, incremental: bool, cutoff: int) -> Optional[Dict]:
+    """翻页停止位置：增量爬取时为上次的水位线，再叠加绝对截止时间；不限制时为 None"""
+    since = (watermark if incremental else Watermark()).with_cutoff(cutoff)
+    return since.to_dict() if since.time else None
+
+
+def _total_users(run: Dict) -> int:
+    return len(run.get('users', ()))
+
+
+def _watermark(data: Optional[Dict]) -> Optional[Watermark]:
+    return Watermark.from_dict(data) if data else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分布式爬取工作者：从共享工作队列领取关键词/帖子工作项')
+    parser.add_argument(
+        '--queue', default=os.environ.get('XHS_WORK_QUEUE', WORK_QUEUE_URL),
+        help='工作队列地址，如 redis://host:6379/0 或 sqlite:///data/work_queue.db（默认读取环境变量 XHS_WORK_QUEUE）',
+    )
+    parser.add_argument('--worker-id', default=None, help='工作者标识，默认为 主机名-进程号')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_WORKER_CONCURRENCY, help='同时处理的工作项数')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='租约时长（秒）')
+    parser.add_argument('--exit-when-idle', action='store_true', help='队列为空时退出')
+    args = parser.parse_args()
+    if not args.queue:
+        parser.error('请通过 --queue 或环境变量 XHS_WORK_QUEUE 指定工作队列地址')
+
+    queue = open_work_queue(args.queue)
+    worker = QueueWorker(queue, args.worker_id, concurrency=args.concurrency, lease_seconds=args.lease)
+    print(f"[分布式] 连接工作队列 {args.queue}")
+    try:
+        asyncio.run(worker.run_async(exit_when_idle=args.exit_when_idle))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
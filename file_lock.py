@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+跨进程文件锁
+多进程爬取时各工作进程共用用户目录、水位线和帖子来源文件，
+读改写这些文件前先对旁边的 .lock 文件加锁（POSIX 用 fcntl.flock，Windows 用 msvcrt.locking）
+"""
+import os
+import threading
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 锁文件路径 -> 线程锁：同一进程内的线程先在这里排队，再去竞争文件锁
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+
+class FileLock:
+    """排它锁，同时在进程间和同一进程的线程间互斥；不可重入
+
+        with FileLock(path + '.lock'):
+            data = load(path)
+            ...
+            save(path, data)
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._thread_lock = _thread_lock(self.path)
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _lock_fd(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fd, self._fd = self._fd, None
+        try:
+            _unlock_fd(fd)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+
+def _lock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    # LK_LOCK 重试约 10 秒后抛出 OSError，持锁时间都很短，继续等待即可
+    while True:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
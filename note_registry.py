@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+帖子来源登记
+相关关键词经常搜到同一个帖子，帖子只在第一次出现时抓取评论，
+之后命中的关键词合并到该帖子的来源关键词中（跨多次爬取累积保存）；
+多个爬取进程共用同一文件，保存时在文件锁内与文件中其他进程登记的来源合并
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Set
+
+from file_lock import FileLock
+
+
+class NoteRegistry:
+    """帖子 ID -> 命中的关键词列表，保存在一个 JSON 文件中"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._keywords: Dict[str, List[str]] = self._read()
+        # 本进程新登记过来源、尚未写入文件的帖子
+        self._dirty: Set[str] = set()
+
+    def _read(self) -> Dict[str, List[str]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[爬虫] 帖子来源文件损坏，忽略: {e}")
+            return {}
+
+    def add_keyword(self, note_id: str, keyword: str) -> bool:
+        """登记帖子被关键词命中，返回是否为新增的来源"""
+        with self._lock:
+            keywords = self._keywords.setdefault(note_id, [])
+            if keyword in keywords:
+                return False
+            keywords.append(keyword)
+            self._dirty.add(note_id)
+            return True
+
+    def keywords(self, note_id: str) -> List[str]:
+        with self._lock:
+            return list(self._keywords.get(note_id, ()))
+
+    def save(self):
+        """与文件中的内容合并后写入（先写临时文件再替换），其他进程登记的来源同时读入内存"""
+        with FileLock(self.path + '.lock'):
+            merged = self._read()
+            with self._lock:
+                for note_id in self._dirty:
+                    keywords = merged.setdefault(note_id, [])
+                    keywords.extend(keyword for keyword in self._keywords[note_id] if keyword not in keywords)
+                self._dirty.clear()
+                self._keywords = merged
+                snapshot = json.dumps(merged, ensure_ascii=False)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+
+
+class NoteClaims:
+    """多进程爬取中帖子 -> 负责抓取其评论的关键词，各工作进程共用一个文件
+
+    每个关键词是不同进程中的独立任务，任务内的去重看不到其他进程；关键词交出帖子前先在这里登记，
+    先登记的关键词抓取评论，其他关键词只合并来源。文件只追加，在文件锁内读入其他进程新登记的部分再写入
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._owners: Dict[str, str] = {}
+        self._offset = 0  # 已读入的文件长度
+
+    def _read_new(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        self._offset += len(data)
+        for line in data.decode('utf-8').splitlines():
+            note_id, keyword = json.loads(line)
+            self._owners.setdefault(note_id, keyword)
+
+    def claim(self, note_id: str, keyword: str) -> bool:
+        """登记由 keyword 抓取帖子评论，返回帖子是否归 keyword 抓取（新登记，或此前已由它登记，如断点续爬）"""
+        with self._lock:
+            owner = self._owners.get(note_id)
+        if owner is not None:
+            return owner == keyword
+        with FileLock(self.path + '.lock'):
+            with self._lock:
+                self._read_new()
+                owner = self._owners.get(note_id)
+                if owner is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps([note_id, keyword], ensure_ascii=False) + '\n')
+                    owner = self._owners[note_id] = keyword
+        return owner == keyword
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+评论翻页的续爬与跳过规则：NoteCommentState.unchanged、游标/是否抓完的记录、
+增量爬取翻到水位线即停，以及已抓完的帖子有了新评论时从最新一页翻到水位线（不从上次最后一页继续）
+
+运行：python -m pytest -q test_comment_state.py
+"""
+import asyncio
+import os
+from contextlib import aclosing
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from crawl_watermark import WatermarkStore
+from xhs_crawler.media_platform.xhs import core
+from xhs_crawler.media_platform.xhs.client import XiaoHongShuClient
+from xhs_crawler.media_platform.xhs.watermark import NoteCommentState, Watermark
+
+
+def comment(number):
+    """第 number 条评论：ID 前 8 位十六进制为创建时间（秒），越新的 number 越大"""
+    return {"id": f"{0x65000000 + number:08x}c{number:015d}", "content": f"c{number}"}
+
+
+def numbers(comments):
+    return [int(comment["content"][1:]) for comment in comments]
+
+
+class ThreadClient(XiaoHongShuClient):
+    """只替换 get_note_comments：评论从新到旧分页，游标为上一页最后一条评论的 ID（评论增加后游标不变）"""
+
+    def __init__(self, count, page_size=2):
+        self.governor = None
+        self.page_size = page_size
+        self.comments = [comment(number) for number in range(count, 0, -1)]
+        self.requested = []
+
+    def add(self, count):
+        newest = len(self.comments)
+        self.comments[:0] = [comment(number) for number in range(newest + count, newest, -1)]
+
+    async def get_note_comments(self, note_id, xsec_token, cursor=""):
+        self.requested.append(cursor)
+        ids = [comment["id"] for comment in self.comments]
+        start = ids.index(cursor) + 1 if cursor else 0
+        page = self.comments[start:start + self.page_size]
+        return {
+            "comments": page,
+            "has_more": start + self.page_size < len(self.comments),
+            "cursor": page[-1]["id"] if page else "",
+        }
+
+
+def crawl(client, **kwargs):
+    async def main():
+        comments = []
+        async with aclosing(client.iter_note_comments("n", "t", crawl_interval=0, **kwargs)) as pages:
+            async for page in pages:
+                comments.extend(page)
+        return comments
+
+    return asyncio.run(main())
+
+
+def test_unchanged():
+    assert NoteCommentState(4, "x", complete=True).unchanged(4)
+    assert NoteCommentState(4, "x", complete=True).unchanged(3)
+    assert not NoteCommentState(4, "x", complete=True).unchanged(5)
+    # 上次没抓完，或评论数未知时都要抓
+    assert not NoteCommentState(4, "x", complete=False).unchanged(4)
+    assert not NoteCommentState(4, "x", complete=True).unchanged(None)
+    assert not NoteCommentState().unchanged(0)
+    assert NoteCommentState.from_dict(NoteCommentState(4, "x", True).to_dict()).unchanged(4)
+
+
+def test_full_crawl_records_cursor_and_end():
+    client = ThreadClient(5)
+    state = NoteCommentState()
+
+    assert numbers(crawl(client, state=state)) == [5, 4, 3, 2, 1]
+
+    assert state.complete
+    assert state.cursor == comment(2)["id"]  # 最后一页的游标
+
+
+def test_max_count_stops_early_and_resumes_at_cursor():
+    client = ThreadClient(6)
+    state = NoteCommentState()
+
+    assert numbers(crawl(client, state=state, max_count=3)) == [6, 5, 4]
+    assert not state.complete
+    assert state.cursor == comment(5)["id"]
+
+    # 下次从停下的那一页继续（重复的评论由保存时去重）
+    client.requested.clear()
+    assert numbers(crawl(client, state=state)) == [4, 3, 2, 1]
+    assert client.requested[0] == comment(5)["id"]
+    assert state.complete
+
+
+def test_closing_early_marks_incomplete():
+    client = ThreadClient(6)
+    state = NoteCommentState(complete=True)
+
+    async def main():
+        async with aclosing(client.iter_note_comments("n", "t", crawl_interval=0, state=state)) as pages:
+            async for _ in pages:
+                break
+
+    asyncio.run(main())
+    assert not state.complete
+
+
+def test_incremental_crawl_stops_at_watermark():
+    client = ThreadClient(9)
+    since = Watermark()
+    since.advance(comment(5))
+    state = NoteCommentState(9, "", complete=True)
+
+    assert numbers(crawl(client, since=since, state=state)) == [9, 8, 7, 6]
+    # 第 3 页（5、4）已没有新评论，不再请求后面的页
+    assert len(client.requested) == 3
+    assert state.complete
+
+
+def test_incremental_crawl_cut_short_marks_incomplete():
+    client = ThreadClient(9)
+    since = Watermark()
+    since.advance(comment(2))
+    state = NoteCommentState(9, "", complete=True)
+
+    assert numbers(crawl(client, since=since, state=state, max_count=3)) == [9, 8, 7]
+
+    # 没翻到水位线：记下停下的位置，下次全量爬取从这里继续
+    assert not state.complete
+    assert state.cursor == comment(8)["id"]
+
+
+def test_complete_thread_does_not_resume_at_last_page():
+    client = ThreadClient(4)
+    state = NoteCommentState(4, comment(3)["id"], complete=True)
+
+    # 没有水位线时从最新一页重新翻，而不是只翻上次的最后一页
+    assert numbers(crawl(client, state=state)) == [4, 3, 2, 1]
+    assert client.requested[0] == ""
+
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.config, "CRAWLER_MAX_SLEEP_SEC", 0)
+    monkeypatch.setattr(core.config, "CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES", 100)
+    monkeypatch.setattr(core.config, "ENABLE_GET_COMMENTS", True)
+    return core.XiaoHongShuCrawler(comment_states=WatermarkStore(os.path.join(tmp_path, "watermarks.json")))
+
+
+def test_complete_thread_that_grew_fetches_new_comments(crawler):
+    client = crawler.xhs_client = ThreadClient(4)
+    asyncio.run(crawler.get_comments("n", "t", comment_count=4))
+    state = crawler.comment_states.comment_state("n")
+    assert (state.comment_count, state.complete) == (4, True)
+
+    # 评论数未变：跳过
+    client.requested.clear()
+    asyncio.run(crawler.get_comments("n", "t", comment_count=4))
+    assert client.requested == []
+
+    # 帖子多了两条评论：新评论在最前面，从最新一页翻到上次的水位线
+    client.add(2)
+    fetched = []
+    fetch = client.get_note_all_comments
+
+    async def get_note_all_comments(*args, **kwargs):
+        comments = await fetch(*args, **kwargs)
+        fetched.extend(comments)
+        return comments
+
+    client.get_note_all_comments = get_note_all_comments
+    asyncio.run(crawler.get_comments("n", "t", comment_count=6))
+
+    assert numbers(fetched) == [6, 5]
+    assert client.requested == ["", comment(5)["id"]]
+    state = crawler.comment_states.comment_state("n")
+    assert (state.comment_count, state.complete) == (6, True)
+    assert crawler.comment_states.note("n").item_id == comment(6)["id"]
+
+
+def test_batch_saves_comment_states_and_skips_unchanged_notes(crawler):
+    client = crawler.xhs_client = ThreadClient(4)
+    asyncio.run(crawler.batch_get_note_comments(["n"], ["t"], [4]))
+
+    # 批次结束后评论状态已写入文件，下次运行读到同样的状态
+    saved = WatermarkStore(crawler.comment_states.path).comment_state("n")
+    assert (saved.comment_count, saved.complete) == (4, True)
+
+    client.requested.clear()
+    asyncio.run(crawler.batch_get_note_comments(["n"], ["t"], [4]))
+    assert client.requested == []
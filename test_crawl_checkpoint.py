@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+爬取断点单元测试：KeywordCheckpoint / CheckpointStore 读写往返，
+resume 任务从断点中的搜索页、已完成帖子和评论游标继续，以及任务完成后清除断点
+
+运行：python -m pytest -q test_crawl_checkpoint.py
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import crawl_runner
+from crawl_checkpoint import CheckpointStore, KeywordCheckpoint
+from crawl_runner import JOB_CANCELLED, JOB_DONE, JOB_RUNNING, CrawlRunner
+from user_store import UserStore
+from xhs_crawler.media_platform.xhs.client import XiaoHongShuClient
+from xhs_crawler.media_platform.xhs.records import NoteRecord
+
+
+class FakeClient(XiaoHongShuClient):
+    """每个帖子两页评论，记下请求的 (note_id, cursor)"""
+
+    def __init__(self):
+        self.governor = None
+        self.requested = []
+
+    async def get_note_comments(self, note_id, xsec_token, cursor=""):
+        self.requested.append((note_id, cursor))
+        numbers, has_more = ([3, 2], True) if not cursor else ([1], False)
+        comments = [
+            {"id": f"{note_id}-c{number}", "note_id": note_id, "content": "hi", "user_info": {"user_id": f"u{number}"}}
+            for number in numbers
+        ]
+        return {"comments": comments, "has_more": has_more, "cursor": "p2" if has_more else ""}
+
+
+class FakeAdapter:
+    """每页一个搜索结果，关键词 k 第 n 页为 k-(n-1)；gate 未放行时每页之后阻塞"""
+
+    gate = None  # threading.Event
+    instances = []
+
+    def __init__(self):
+        self.client = FakeClient()
+        self.searched = []
+        FakeAdapter.instances.append(self)
+
+    async def init_browser_async(self):
+        pass
+
+    async def close_async(self):
+        pass
+
+    async def iter_search_notes_async(
+        self, keyword, max_notes, search_id=None, start_page=1, skip_note_ids=None, on_page=None,
+        since=None, scheduler=None,
+    ):
+        self.searched.append((keyword, search_id, start_page, sorted(skip_note_ids or ())))
+        count = 0
+        for page in range(start_page, 4):
+            note_id = f"{keyword}-{page - 1}"
+            if count >= max_notes:
+                return
+            if note_id not in (skip_note_ids or ()):
+                count += 1
+                yield NoteRecord(note_id, title="t", xsec_token="x")
+            if on_page:
+                on_page(page, search_id or "sid")
+            while FakeAdapter.gate is not None and not FakeAdapter.gate.is_set():
+                await asyncio.sleep(0.01)
+
+    async def get_creator_info_async(self, user_id, xsec_token, xsec_source):
+        return {}
+
+    def get_signer_stats(self):
+        return {}
+
+    def get_request_stats(self):
+        return {}
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_runner, "PROFILE_REQUEST_INTERVAL", 0)
+    monkeypatch.setattr(crawl_runner, "COMMENT_PAGE_INTERVAL", 0)
+    monkeypatch.setattr(crawl_runner, "SEARCH_REQUEST_INTERVAL", 0)
+    monkeypatch.setattr(FakeAdapter, "instances", [])
+    runner = CrawlRunner(
+        UserStore(str(tmp_path / "users")), CheckpointStore(str(tmp_path / "checkpoints")), crawler_factory=FakeAdapter,
+    )
+    yield runner
+    runner.shutdown()
+
+
+def run(runner, keywords, **kwargs):
+    job_id = runner.submit(keywords, **kwargs)
+    wait_for(lambda: runner.job(job_id)["state"] == JOB_DONE)
+    return runner.job(job_id)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    checkpoint = KeywordCheckpoint("护肤/美妆")
+    checkpoint.search_id, checkpoint.next_page, checkpoint.found = "sid", 3, 2
+    checkpoint.done_note_ids.append("n1")
+    checkpoint.pending_notes["n2"] = dict(
+        NoteRecord("n2", title="t", xsec_token="x", comment_count=5).to_dict(), detail_loaded=False, cursor="p2", taken=2,
+    )
+    store.save(checkpoint)
+
+    loaded = store.load("护肤/美妆")
+    assert (loaded.search_id, loaded.next_page, loaded.found, loaded.search_done) == ("sid", 3, 2, False)
+    assert loaded.done_note_ids == ["n1"]
+    assert loaded.pending_notes["n2"]["cursor"] == "p2"
+    [note] = loaded.pending_note_records()
+    assert (note.note_id, note.xsec_token, note.comment_count, note.detail_loaded) == ("n2", "x", 5, False)
+    assert not loaded.completed
+
+    loaded.search_done, loaded.pending_notes = True, {}
+    assert loaded.completed
+    assert store.load("其他") is None
+    store.clear("护肤/美妆")
+    assert store.load("护肤/美妆") is None
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    with open(store.path("a"), "w") as f:
+        f.write("{")
+    assert store.load("a") is None
+
+
+def test_resume_continues_from_page_done_notes_and_cursor(runner):
+    checkpoint = KeywordCheckpoint("a")
+    checkpoint.search_id, checkpoint.next_page, checkpoint.found = "sid", 3, 2
+    checkpoint.done_note_ids.append("a-0")
+    checkpoint.pending_notes["a-1"] = dict(
+        NoteRecord("a-1", xsec_token="x").to_dict(), detail_loaded=False, cursor="p2", taken=2,
+    )
+    runner.checkpoints.save(checkpoint)
+
+    job = run(runner, ["a"], resume=True)
+
+    adapter = FakeAdapter.instances[-1]
+    # 搜索从断点中的 search_id 与下一页继续，跳过已完成和未完成的帖子
+    assert adapter.searched == [("a", "sid", 3, ["a-0", "a-1"])]
+    # 未完成的帖子从评论游标继续；已完成的帖子不再抓取
+    requested = adapter.client.requested
+    assert ("a-1", "p2") in requested and ("a-1", "") not in requested
+    assert not any(note_id == "a-0" for note_id, _ in requested)
+    assert job["status"]["notes_done"] == 2  # a-1 与 a-2
+    assert runner.store.load("u1") is not None
+
+
+def test_without_resume_checkpoint_is_discarded(runner):
+    checkpoint = KeywordCheckpoint("a")
+    checkpoint.next_page, checkpoint.search_done = 3, True
+    runner.checkpoints.save(checkpoint)
+
+    run(runner, ["a"])
+
+    assert FakeAdapter.instances[-1].searched == [("a", None, 1, [])]
+
+
+def test_interrupted_run_saves_checkpoint_and_completion_clears_it(runner, monkeypatch):
+    monkeypatch.setattr(FakeAdapter, "gate", threading.Event())
+    job_id = runner.submit(["a"])
+    wait_for(lambda: runner.job(job_id)["status"]["notes_done"] == 1)
+    assert runner.job(job_id)["state"] == JOB_RUNNING
+    runner.cancel(job_id)
+    wait_for(lambda: runner.job(job_id)["state"] == JOB_CANCELLED)
+
+    checkpoint = runner.checkpoints.load("a")
+    assert (checkpoint.search_id, checkpoint.next_page, checkpoint.done_note_ids) == ("sid", 2, ["a-0"])
+    assert not checkpoint.completed
+
+    FakeAdapter.gate.set()
+    job = run(runner, ["a"], resume=True)
+
+    assert FakeAdapter.instances[-1].searched[-1] == ("a", "sid", 2, ["a-0"])
+    assert job["status"]["notes_done"] == 2
+    # 任务完成：断点已清除，下次 resume 重新爬取
+    assert runner.checkpoints.load("a") is None
+
+
+def test_completed_keyword_is_skipped_on_resume(runner):
+    checkpoint = KeywordCheckpoint("a")
+    checkpoint.search_done = True
+    runner.checkpoints.save(checkpoint)
+
+    job = run(runner, ["a", "b"], resume=True)
+
+    # 中断前已完成的关键词不再搜索；两个关键词都完成后断点清除
+    assert [search[0] for search in FakeAdapter.instances[-1].searched] == ["b"]
+    assert job["status"]["progress"] == 100
+    assert runner.checkpoints.load("a") is None and runner.checkpoints.load("b") is None
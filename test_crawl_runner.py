@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+CrawlRunner 任务队列单元测试（用假的爬虫适配器，不启动浏览器）：jobs.json 持久化、
+重启后运行中/排队中的任务重新排队并从断点继续、取消任务、空闲关闭浏览器期间开始的任务不会另开浏览器，
+评论数只统计实际保存的评论、进度不倒退，
+以及阶段处理出错时任务为部分完成/失败并报告出错数
+
+运行：python -m pytest -q test_crawl_runner.py
+"""
+import asyncio
+import json
+import shutil
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import crawl_runner
+from crawl_runner import (
+    JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_PARTIAL, JOB_QUEUED, JOB_RUNNING, CrawlRunner, _CrawlJob, _new_job_status,
+)
+from user_store import UserStore
+from xhs_crawler.media_platform.xhs.client import XiaoHongShuClient
+from xhs_crawler.media_platform.xhs.records import NoteRecord
+
+
+def comment(note_id, number):
+    return {
+        "id": f"{note_id}-c{number}", "note_id": note_id, "content": "hi",
+        "user_info": {"user_id": f"u{number}", "nickname": f"user{number}"},
+    }
+
+
+class FakeClient(XiaoHongShuClient):
+    """每个帖子两页评论；第二页重复了第一页的最后一条（接口分页重叠）"""
+
+    def __init__(self):
+        self.governor = None
+
+    async def get_note_comments(self, note_id, xsec_token, cursor=""):
+        if not cursor:
+            return {"comments": [comment(note_id, 3), comment(note_id, 2)], "has_more": True, "cursor": "p2"}
+        return {"comments": [comment(note_id, 2), comment(note_id, 1)], "has_more": False, "cursor": ""}
+
+
+class FakeAdapter:
+    """假的爬虫适配器：关键词 k 的搜索结果为 k-0 … k-(notes-1)；gate 未放行时搜索阻塞"""
+
+    notes = 2
+    gate = None  # threading.Event
+    close_delay = 0.0
+    opened = []  # 各次创建的适配器
+    max_open = 0
+    closing = None  # threading.Event，close_async 开始时置位
+
+    def __init__(self):
+        self.client = FakeClient()
+        self.open = False
+        self.searched = []
+        FakeAdapter.opened.append(self)
+
+    async def init_browser_async(self):
+        self.open = True
+        FakeAdapter.max_open = max(FakeAdapter.max_open, sum(adapter.open for adapter in FakeAdapter.opened))
+
+    async def close_async(self):
+        if FakeAdapter.closing is not None:
+            FakeAdapter.closing.set()
+        await asyncio.sleep(FakeAdapter.close_delay)
+        self.open = False
+
+    async def iter_search_notes_async(
+        self, keyword, max_notes, search_id=None, start_page=1, skip_note_ids=None, on_page=None,
+        since=None, scheduler=None,
+    ):
+        self.searched.append((keyword, start_page, sorted(skip_note_ids or ())))
+        count = 0
+        for number in range(start_page - 1, self.notes):  # 每页一个帖子
+            note_id = f"{keyword}-{number}"
+            if count >= max_notes:
+                return
+            if note_id in (skip_note_ids or ()):
+                continue
+            count += 1
+            yield NoteRecord(note_id, title="t", xsec_token="x")
+            if on_page:
+                on_page(number + 1, "sid")
+            while FakeAdapter.gate is not None and not FakeAdapter.gate.is_set():
+                await asyncio.sleep(0.01)
+
+    async def get_creator_info_async(self, user_id, xsec_token, xsec_source):
+        return {"basicInfo": {"desc": ""}}
+
+    def get_signer_stats(self):
+        return {}
+
+    def get_request_stats(self):
+        return {}
+
+
+@pytest.fixture
+def runner_factory(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_runner, "PROFILE_REQUEST_INTERVAL", 0)
+    monkeypatch.setattr(crawl_runner, "COMMENT_PAGE_INTERVAL", 0)
+    monkeypatch.setattr(crawl_runner, "SEARCH_REQUEST_INTERVAL", 0)
+    monkeypatch.setattr(FakeAdapter, "opened", [])
+    monkeypatch.setattr(FakeAdapter, "max_open", 0)
+    runners = []
+
+    def make(**kwargs):
+        runner = CrawlRunner(UserStore(str(tmp_path / "users")), crawler_factory=FakeAdapter, **kwargs)
+        runners.append(runner)
+        return runner
+
+    yield make
+    for runner in runners:
+        runner.shutdown()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def state(runner, job_id):
+    return runner.job(job_id)["state"]
+
+
+def saved_jobs(runner):
+    with open(runner.jobs_file, encoding="utf-8") as f:
+        return {job["id"]: job for job in json.load(f)}
+
+
+def test_jobs_persisted_and_requeued_after_restart(runner_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(FakeAdapter, "gate", threading.Event())
+    runner = runner_factory(slots=1)
+    first = runner.submit(["a"], max_notes=2)
+    wait_for(lambda: runner.job(first)["status"]["notes_done"] == 1)
+    second = runner.submit(["b"], max_notes=2)
+
+    # 单槽位：第二个任务排队；任务队列已写入 jobs.json
+    jobs = saved_jobs(runner)
+    assert (jobs[first]["state"], jobs[second]["state"]) == (JOB_RUNNING, JOB_QUEUED)
+    assert jobs[second]["params"]["keywords"] == ["b"]
+
+    # 模拟进程崩溃：运行中的任务在 jobs.json 里仍是 running
+    crashed = str(tmp_path / "crashed-jobs.json")
+    shutil.copy(runner.jobs_file, crashed)
+    runner.shutdown()
+
+    restarted = runner_factory(jobs_file=crashed, slots=1)
+    job = restarted.job(first)
+    assert job["state"] == JOB_QUEUED
+    assert job["params"]["resume"]
+    assert restarted.job(second)["state"] == JOB_QUEUED
+
+    FakeAdapter.gate.set()
+    restarted.start()
+    wait_for(lambda: state(restarted, second) == JOB_DONE)
+    assert state(restarted, first) == JOB_DONE
+
+    # 从断点继续：已完成的帖子跳过，不从头搜索
+    adapter = FakeAdapter.opened[-1]
+    assert ("a", 2, ["a-0"]) in adapter.searched
+    assert restarted.job(first)["status"]["notes_done"] == 1
+    assert set(saved_jobs(restarted)) == {first, second}
+
+
+def test_shutdown_keeps_running_job_queued(runner_factory, monkeypatch):
+    monkeypatch.setattr(FakeAdapter, "gate", threading.Event())
+    runner = runner_factory()
+    job_id = runner.submit(["a"])
+    wait_for(lambda: state(runner, job_id) == JOB_RUNNING)
+    runner.shutdown()
+
+    job = saved_jobs(runner)[job_id]
+    assert job["state"] == JOB_QUEUED
+    assert job["params"]["resume"]
+
+
+def test_cancel(runner_factory, monkeypatch):
+    monkeypatch.setattr(FakeAdapter, "gate", threading.Event())
+    runner = runner_factory(slots=1)
+    running = runner.submit(["a"])
+    queued = runner.submit(["b"])
+    wait_for(lambda: state(runner, running) == JOB_RUNNING)
+
+    # 排队中的任务立即取消并写盘
+    assert runner.cancel(queued)
+    assert state(runner, queued) == JOB_CANCELLED
+    assert saved_jobs(runner)[queued]["state"] == JOB_CANCELLED
+
+    assert runner.cancel(running)
+    wait_for(lambda: state(runner, running) == JOB_CANCELLED)
+    assert runner.job(running)["status"]["message"] == "爬取已取消"
+    wait_for(lambda: saved_jobs(runner)[running]["state"] == JOB_CANCELLED)
+
+    # 已结束或不存在的任务
+    assert not runner.cancel(running)
+    assert not runner.cancel("missing")
+
+
+def test_job_started_while_idle_browser_closes_waits_for_close(runner_factory, monkeypatch):
+    monkeypatch.setattr(FakeAdapter, "close_delay", 0.3)
+    monkeypatch.setattr(FakeAdapter, "closing", threading.Event())
+    runner = runner_factory()
+    first = runner.submit(["a"])
+    wait_for(lambda: state(runner, first) == JOB_DONE)
+    # 队列空闲，浏览器正在关闭时提交新任务
+    FakeAdapter.closing.wait(5)
+    second = runner.submit(["b"])
+    wait_for(lambda: state(runner, second) == JOB_DONE)
+
+    assert len(FakeAdapter.opened) == 2
+    assert FakeAdapter.max_open == 1
+
+
+def test_total_comments_counts_saved_comments_only(runner_factory):
+    runner = runner_factory()
+    job_id = runner.submit(["a"], max_notes=2)
+    wait_for(lambda: state(runner, job_id) == JOB_DONE)
+
+    status = runner.job(job_id)["status"]
+    # 每个帖子 3 条不同的评论，重叠的那条只保存一次
+    assert status["total_comments"] == 6
+    assert status["total_users"] == 3
+    assert status["progress"] == 100
+    user = runner.store.load("u2")
+    assert sorted(c["comment_id"] for c in user["comments"]) == ["a-0-c2", "a-1-c2"]
+
+
+class FailingClient(FakeClient):
+    """failing 中的帖子抓评论时出错"""
+
+    failing = ()
+
+    async def get_note_comments(self, note_id, xsec_token, cursor=""):
+        if note_id in self.failing:
+            raise RuntimeError("comments unavailable")
+        return await super().get_note_comments(note_id, xsec_token, cursor)
+
+
+class FailingAdapter(FakeAdapter):
+    def __init__(self):
+        super().__init__()
+        self.client = FailingClient()
+
+
+@pytest.mark.parametrize("failing, expected", [(["a-1"], JOB_PARTIAL), (["a-0", "a-1"], JOB_FAILED)])
+def test_stage_errors_mark_job_partial_or_failed(runner_factory, monkeypatch, failing, expected):
+    monkeypatch.setattr(FailingClient, "failing", failing)
+    runner = runner_factory()
+    runner.crawler_factory = FailingAdapter
+    job_id = runner.submit(["a"], max_notes=2)
+    wait_for(lambda: state(runner, job_id) not in (JOB_QUEUED, JOB_RUNNING))
+
+    job = runner.job(job_id)
+    assert job["state"] == expected
+    assert job["status"]["errors"] == {"comments": len(failing)}
+    assert f"{len(failing)} 个帖子未完成" in job["status"]["message"]
+    # 出错的帖子留在断点中，resume 时重新抓取
+    assert sorted(runner.checkpoints.load("a").pending_notes) == failing
+
+
+def test_progress_does_not_go_backwards(runner_factory):
+    runner = runner_factory()
+    status = _new_job_status("")
+    job = _CrawlJob(runner, FakeAdapter(), status, ["a", "b"], 4, 10, [], False, False, 0, {}, [])
+    history = []
+
+    def step(keyword, found=0, done=0, searched=False):
+        job.keyword_notes[keyword][0] += found
+        job.keyword_notes[keyword][1] += done
+        if searched:
+            job.searched_keywords.add(keyword)
+        job.report()
+        history.append(status["progress"])
+
+    step("a", found=2)
+    step("a", done=2)  # 关键词 a 还在搜索：按 4 个帖子计
+    step("a", found=1)  # 搜到新帖子，进度不下降
+    step("a", searched=True)  # 搜索结束：2/3
+    step("a", done=1)  # a 完成
+    step("b", searched=True)  # b 没有搜到帖子
+    assert history == [0, 25, 25, 33, 50, 100]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+增量爬取水位线单元测试：Watermark 按 ID 中的时间戳与 ID 比较新旧（is_new / any_new / advance），
+WatermarkStore 只前进不后退、保存时与其他进程写入的水位线合并，以及帖子评论状态的保存
+
+运行：python -m pytest -q test_crawl_watermark.py
+"""
+import json
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from crawl_watermark import WatermarkStore
+from xhs_crawler.media_platform.xhs.watermark import NoteCommentState, Watermark, item_time, object_id_time
+
+
+def item(seconds, suffix="a"):
+    """ID 前 8 位十六进制为创建时间（秒）的帖子/评论"""
+    return {"id": f"{seconds:08x}{suffix * 16}"}
+
+
+T1, T2, T3 = 0x65000001, 0x65000002, 0x65000003
+
+
+def watermark_at(seconds, suffix="a"):
+    watermark = Watermark()
+    watermark.advance(item(seconds, suffix))
+    return watermark
+
+
+def test_object_id_time():
+    assert object_id_time(item(T1)["id"]) == T1 * 1000
+    assert object_id_time("short") == 0
+    assert object_id_time("zzzzzzzz" + "a" * 16) == 0
+    assert object_id_time(None) == 0
+
+
+def test_item_time_prefers_explicit_time():
+    assert item_time({"create_time": 1700000000}) == 1700000000000  # 秒转毫秒
+    assert item_time({"time": 1700000000123, "id": item(T1)["id"]}) == 1700000000123
+    assert item_time(item(T2)) == T2 * 1000
+    assert item_time({"note_id": item(T3)["id"]}) == T3 * 1000
+
+
+def test_is_new():
+    watermark = watermark_at(T2, "b")
+    assert (watermark.time, watermark.item_id) == (T2 * 1000, item(T2, "b")["id"])
+
+    assert Watermark().is_new(item(T1))  # 没有水位线时都是新的
+    assert watermark.is_new(item(T3))
+    assert not watermark.is_new(item(T1))
+    # 同一秒内按 ID 比较
+    assert watermark.is_new(item(T2, "c"))
+    assert not watermark.is_new(item(T2, "b"))
+    assert not watermark.is_new(item(T2, "a"))
+    # 时间未知的保留，宁可多抓也不提前停止
+    assert watermark.is_new({"id": "unknown"})
+
+
+def test_any_new():
+    watermark = watermark_at(T2)
+    assert not watermark.any_new([item(T2), item(T1)])
+    assert watermark.any_new([item(T1), item(T3)])
+    # 没有时间的条目（如搜索结果中的推荐词）不算新内容
+    assert not watermark.any_new([{"id": "hot-query"}, item(T1)])
+    assert not watermark.any_new([])
+
+
+def test_advance_only_moves_forward():
+    watermark = watermark_at(T2)
+    watermark.advance(item(T1))
+    watermark.advance({"id": "unknown"})
+    assert watermark.item_id == item(T2)["id"]
+    watermark.advance(item(T3))
+    assert watermark.item_id == item(T3)["id"]
+
+
+def test_with_cutoff():
+    watermark = watermark_at(T2)
+    assert watermark.with_cutoff(0) is watermark
+    assert watermark.with_cutoff(T1 * 1000) is watermark
+    cutoff = watermark.with_cutoff(T3 * 1000)
+    assert cutoff.is_new(item(T3, "b"))
+    assert not cutoff.is_new(item(T2))
+
+
+def test_store_updates_only_forward_and_persists(tmp_path):
+    path = str(tmp_path / "watermarks.json")
+    store = WatermarkStore(path)
+    store.update_keyword("k", watermark_at(T2))
+    store.update_keyword("k", watermark_at(T1))
+    store.update_keyword("k", Watermark())  # 本次没有搜到帖子
+    store.update_note("n", watermark_at(T3))
+    store.save()
+
+    reloaded = WatermarkStore(path)
+    assert reloaded.keyword("k").item_id == item(T2)["id"]
+    assert reloaded.note("n").item_id == item(T3)["id"]
+    assert not reloaded.keyword("other").time
+
+
+def test_save_merges_with_other_processes(tmp_path):
+    path = str(tmp_path / "watermarks.json")
+    first, second = WatermarkStore(path), WatermarkStore(path)
+    first.update_keyword("a", watermark_at(T1))
+    first.update_note("n", watermark_at(T3))
+    second.update_keyword("b", watermark_at(T2))
+    second.update_note("n", watermark_at(T2))  # 比 first 保存的旧
+    second.update_comment_state("n", NoteCommentState(5, "cursor", complete=True))
+
+    first.save()
+    second.save()
+
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert set(saved["keywords"]) == {"a", "b"}
+    # 帖子水位线取较新的，评论状态与水位线存在同一条记录中
+    assert saved["notes"]["n"]["id"] == item(T3)["id"]
+    assert (saved["notes"]["n"]["comment_count"], saved["notes"]["n"]["complete"]) == (5, True)
+    # 保存时读入了其他进程的水位线
+    assert second.keyword("a").item_id == item(T1)["id"]
+    assert second.note("n").item_id == item(T3)["id"]
+
+
+def test_comment_state_round_trip(tmp_path):
+    path = str(tmp_path / "watermarks.json")
+    store = WatermarkStore(path)
+    assert store.comment_state("n").to_dict() == NoteCommentState().to_dict()
+    store.update_note("n", watermark_at(T1))
+    store.update_comment_state("n", NoteCommentState(3, "c1", complete=False))
+    store.save()
+
+    reloaded = WatermarkStore(path)
+    state = reloaded.comment_state("n")
+    assert (state.comment_count, state.cursor, state.complete) == (3, "c1", False)
+    # 评论状态与水位线互不覆盖
+    assert reloaded.note("n").item_id == item(T1)["id"]
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "watermarks.json"
+    path.write_text("{", encoding="utf-8")
+    store = WatermarkStore(str(path))
+    assert not store.keyword("k").time
+    store.update_keyword("k", watermark_at(T1))
+    store.save()
+    assert WatermarkStore(str(path)).keyword("k").item_id == item(T1)["id"]
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+DistributedCrawl 单元测试：工作者与中心节点在同一进程中通过 SQLite 队列运行，
+检查关键词水位线等其帖子全部合并后才前进、帖子的评论状态随结果保存，评论数未变的帖子下次跳过，以及已保存过的评论不计入评论数
+
+运行：python -m pytest -q test_distributed_crawl.py
+"""
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import distributed_crawl
+from distributed_crawl import DistributedCrawl, QueueWorker
+from user_store import UserStore
+from work_queue import SQLiteWorkQueue
+from xhs_crawler.media_platform.xhs.records import CommentRecord, NoteRecord, UserRecord
+
+# 帖子 ID 的前 8 位十六进制是创建时间（秒），水位线按它比较
+N1, N2, N3 = "65000001" + "a" * 16, "65000002" + "a" * 16, "65000003" + "a" * 16
+SEARCH = {"a": [N2, N1], "b": [N3, N2]}
+
+
+class FakeCrawler:
+    """按 SEARCH 返回搜索结果；每个帖子一页评论，failing 中的帖子抓评论时出错"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.crawled = []
+
+    async def init_browser_async(self):
+        pass
+
+    async def close_async(self):
+        pass
+
+    async def iter_search_notes_async(self, keyword, max_notes, since=None):
+        for note_id in SEARCH[keyword]:
+            yield NoteRecord(note_id, xsec_token="t", detail_loaded=False, comment_count=1)
+
+    async def iter_note_comments_async(self, note_id, xsec_token, max_comments, filter_keywords, since, state):
+        self.crawled.append(note_id)
+        if note_id in self.failing:
+            raise RuntimeError("comments unavailable")
+        state.cursor, state.complete = "last", True
+        yield [CommentRecord(note_id + "-c", note_id, "hi", UserRecord(f"u-{note_id[7]}"))]
+
+    async def get_creator_info_async(self, user_id, xsec_token, xsec_source):
+        return {}
+
+
+def run_until_done(central, crawler):
+    """工作者处理完队列中的工作项 → 中心节点合并（会放入新的 note 项），直到批次结束"""
+    queue = central.queue
+    while central.status()["running"]:
+        asyncio.run(QueueWorker(queue, "w1", crawler_factory=lambda: crawler).run_async(exit_when_idle=True))
+        while central.merge_once():
+            pass
+        central._check_finished()
+
+
+@pytest.fixture
+def central(tmp_path, monkeypatch):
+    monkeypatch.setattr(distributed_crawl, "PROFILE_REQUEST_INTERVAL", 0)
+    queue = SQLiteWorkQueue(os.path.join(tmp_path, "queue.db"), max_deliveries=1)
+    # 不启动合并线程：由 run_until_done 在测试线程中合并
+    central = DistributedCrawl(queue, UserStore(os.path.join(tmp_path, "users")), autostart=False)
+    yield central
+    assert central.shutdown()
+    queue.close()
+
+
+def test_keyword_watermark_waits_for_its_notes(central):
+    central.submit(["a", "b"], incremental=True)
+
+    run_until_done(central, FakeCrawler(failing=[N3]))
+
+    # a 的帖子都已合并；b 的帖子 N3 失败，水位线不前进，下次增量爬取仍会搜到 N3
+    assert central.watermarks.keyword("a").item_id == N2
+    assert not central.watermarks.keyword("b").time
+    status = central.status()
+    assert "1 个关键词有帖子未完成" in status["message"]
+    assert (status["notes_found"], status["notes_done"]) == (3, 2)
+    assert (status["total_users"], status["total_comments"]) == (2, 2)
+
+
+def test_comment_state_is_saved_and_unchanged_notes_are_skipped(central):
+    crawler = FakeCrawler()
+    central.submit(["a"])
+    run_until_done(central, crawler)
+
+    state = central.watermarks.comment_state(N1)
+    assert (state.comment_count, state.cursor, state.complete) == (1, "last", True)
+
+    # 评论数没有变化的帖子不再放入 note 项
+    crawler.crawled.clear()
+    central.submit(["a", "b"])
+    run_until_done(central, crawler)
+
+    assert crawler.crawled == [N3]
+    assert central.watermarks.keyword("b").item_id == N3
+
+
+def test_total_comments_counts_saved_comments_only(central):
+    crawler = FakeCrawler()
+    central.submit(["a"])
+    run_until_done(central, crawler)
+
+    # 评论数变化后重新抓取，抓到的评论都已保存过，不再计数
+    class GrownCrawler(FakeCrawler):
+        async def iter_search_notes_async(self, keyword, max_notes, since=None):
+            async for note in super().iter_search_notes_async(keyword, max_notes, since):
+                note.comment_count = 2
+                yield note
+
+    central.submit(["a"])
+    run_until_done(central, GrownCrawler())
+
+    status = central.status()
+    assert (status["notes_done"], status["total_users"], status["total_comments"]) == (2, 0, 0)
+
+
+def test_merge_thread_stops_on_shutdown(central):
+    central.start()
+    central.submit(["a"])
+
+    assert central.shutdown()
+    assert not central._thread.is_alive()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+XiaoHongShuExtractor 回归测试
+使用 fixtures/extractor 下脱敏后的笔记页/用户主页（small / typical / huge）校验解析结果，
+并通过 record_property 记录每个样本的解析耗时与内存峰值
+
+运行：python -m pytest -q test_extractor.py
+导出耗时/内存：python -m pytest -q test_extractor.py -o junit_family=xunit1 --junitxml=extractor.xml
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from xhs_crawler.media_platform.xhs.extractor import XiaoHongShuExtractor, shutdown_executors
+from xhs_crawler_adapter import XHSCrawlerAdapter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "extractor")
+NOTE_FIXTURES = ["note_small", "note_typical", "note_huge"]
+PROFILE_FIXTURES = ["profile_small", "profile_typical", "profile_huge"]
+
+
+def load_html(name):
+    """读取样本页面，huge 样本以 gzip 存储"""
+    path = os.path.join(FIXTURES_DIR, name + ".html")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    with gzip.open(path + ".gz", "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_expected(name):
+    with open(os.path.join(FIXTURES_DIR, name + ".expected.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def measure(record_property, func, *args):
+    """执行一次解析，记录耗时（ms）与 tracemalloc 内存峰值（KB）"""
+    begin = time.perf_counter()
+    result = func(*args)
+    record_property("parse_ms", round((time.perf_counter() - begin) * 1000, 3))
+
+    # 耗时与内存分开测量，tracemalloc 本身会显著拖慢解析
+    tracemalloc.start()
+    try:
+        func(*args)
+        record_property("peak_kb", tracemalloc.get_traced_memory()[1] // 1024)
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return XiaoHongShuExtractor()
+
+
+@pytest.mark.parametrize("name", NOTE_FIXTURES)
+def test_extract_note_detail(name, extractor, record_property):
+    html = load_html(name)
+    expected = load_expected(name)
+    record_property("html_kb", len(html) // 1024)
+
+    note = measure(record_property, extractor.extract_note_detail_from_html, expected["note_id"], html)
+
+    assert note == expected["note"]
+
+
+def test_extract_note_detail_without_state(extractor):
+    # 出现验证码或笔记不存在时页面中没有 noteDetailMap
+    assert extractor.extract_note_detail_from_html("0" * 24, load_html("note_captcha")) is None
+
+
+def test_extract_note_detail_unknown_note(extractor):
+    assert extractor.extract_note_detail_from_html("0" * 24, load_html("note_small")) is None
+
+
+@pytest.mark.parametrize("name", PROFILE_FIXTURES)
+def test_extract_creator_info(name, extractor, record_property):
+    html = load_html(name)
+    expected = load_expected(name)
+    record_property("html_kb", len(html) // 1024)
+
+    creator_info = measure(record_property, extractor.extract_creator_info_from_html, html)
+
+    assert creator_info == expected["creator_info"]
+    assert XHSCrawlerAdapter.get_creator_desc(creator_info) == expected["desc"]
+
+
+def test_get_creator_desc_fallbacks():
+    assert XHSCrawlerAdapter.get_creator_desc(None) == ""
+    assert XHSCrawlerAdapter.get_creator_desc({"userInfo": {"desc": " a "}}) == "a"
+    assert XHSCrawlerAdapter.get_creator_desc({"desc": "b"}) == "b"
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_extract_in_pool_matches_inline(pool):
+    extractor = XiaoHongShuExtractor(pool=pool, pool_workers=1, inline_max_chars=0)
+    note_expected = load_expected("note_typical")
+    profile_expected = load_expected("profile_typical")
+
+    async def extract():
+        return await asyncio.gather(
+            extractor.extract_note_detail_async(note_expected["note_id"], load_html("note_typical")),
+            extractor.extract_creator_info_async(load_html("profile_typical")),
+        )
+
+    try:
+        note, creator_info = asyncio.run(extract())
+    finally:
+        shutdown_executors()
+    assert note == note_expected["note"]
+    assert creator_info == profile_expected["creator_info"]
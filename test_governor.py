@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+ConcurrencyGovernor 单元测试：通道/全局并发上限、AIMD 增减、冷却时间、hold 节奏，
+以及评论翻页只由 crawl_interval 控制节奏（不会被 governor 再等一次）
+
+运行：python -m pytest -q test_governor.py
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from tenacity import RetryError, Future as AttemptFuture
+
+from xhs_crawler.media_platform.xhs import core
+from xhs_crawler.media_platform.xhs.client import XiaoHongShuClient
+from xhs_crawler.media_platform.xhs.exception import DataFetchError, IPBlockError
+from xhs_crawler.media_platform.xhs.governor import ConcurrencyGovernor, is_throttle_error
+
+
+def run_requests(governor, lanes, duration=0.01):
+    """每个 (lane) 发一个持续 duration 秒的请求；返回各通道及全局同时进行的最大请求数"""
+    active = {}
+    peak = {}
+
+    async def request(lane):
+        async with governor.slot(lane):
+            for key in (lane, "global"):
+                active[key] = active.get(key, 0) + 1
+                peak[key] = max(peak.get(key, 0), active[key])
+            await asyncio.sleep(duration)
+            for key in (lane, "global"):
+                active[key] -= 1
+
+    async def main():
+        await asyncio.gather(*(request(lane) for lane in lanes))
+
+    asyncio.run(main())
+    return peak
+
+
+async def throttled_request(governor, lane):
+    with pytest.raises(IPBlockError):
+        async with governor.slot(lane):
+            raise IPBlockError("blocked")
+
+
+def test_lane_limit():
+    governor = ConcurrencyGovernor({"detail": 2, "comments": 3}, global_limit=10)
+
+    peak = run_requests(governor, ["detail"] * 6 + ["comments"] * 6)
+
+    assert peak["detail"] == 2
+    assert peak["comments"] == 3
+    assert governor.stats()["detail"]["granted"] == 6
+
+
+def test_global_limit_across_lanes():
+    governor = ConcurrencyGovernor({"detail": 3, "comments": 3}, global_limit=4)
+
+    peak = run_requests(governor, ["detail"] * 5 + ["comments"] * 5)
+
+    assert peak["global"] == 4
+
+
+def test_unknown_lane_is_bounded_globally():
+    governor = ConcurrencyGovernor({}, global_limit=2)
+
+    peak = run_requests(governor, ["media"] * 5)
+
+    assert peak["media"] == 2
+
+
+def test_full_lane_does_not_block_other_lanes():
+    governor = ConcurrencyGovernor({"profile": 1, "comments": 3}, global_limit=10)
+    order = []
+
+    async def request(lane, duration):
+        async with governor.slot(lane):
+            order.append(lane)
+            await asyncio.sleep(duration)
+
+    async def main():
+        await asyncio.gather(
+            request("profile", 0.05), request("profile", 0.01), request("comments", 0.01), request("comments", 0.01),
+        )
+
+    asyncio.run(main())
+
+    # 第二个 profile 请求在等，排在它后面的 comments 请求先执行
+    assert order == ["profile", "comments", "comments", "profile"]
+
+
+def test_throttle_halves_lane_and_global_limit():
+    governor = ConcurrencyGovernor({"detail": 4}, global_limit=8, cooldown=0)
+
+    asyncio.run(throttled_request(governor, "detail"))
+
+    stats = governor.stats()
+    assert stats["detail"]["limit"] == 2
+    assert stats["global"]["limit"] == 4
+    assert stats["detail"]["throttled"] == 1
+
+
+def test_burst_of_throttles_is_one_signal():
+    governor = ConcurrencyGovernor({"detail": 4}, global_limit=8, cooldown=60)
+
+    async def main():
+        for _ in range(3):
+            await throttled_request(governor, "detail")
+
+    asyncio.run(main())
+
+    assert governor.stats()["detail"]["limit"] == 2
+    assert governor.stats()["detail"]["throttled"] == 3
+
+
+def test_additive_increase_back_to_max():
+    governor = ConcurrencyGovernor({"detail": 4}, global_limit=8, cooldown=0)
+
+    async def main():
+        await throttled_request(governor, "detail")
+        await throttled_request(governor, "detail")
+        limits = [governor.stats()["detail"]["limit"]]
+        for _ in range(12):
+            async with governor.slot("detail"):
+                pass
+            limits.append(governor.stats()["detail"]["limit"])
+        return limits
+
+    limits = asyncio.run(main())
+
+    # 4 → 2 → 1，之后每次成功 +1/limit：约每个窗口 +1，最终回到上限且不超过
+    assert limits[0] == 1
+    assert limits == sorted(limits)
+    assert limits[1] == 2 and limits[3] == 2
+    assert limits[-1] == 4
+    assert governor._lanes["detail"].limit == 4.0
+
+
+def test_non_throttle_error_does_not_decrease():
+    governor = ConcurrencyGovernor({"detail": 4}, global_limit=8, cooldown=0)
+
+    async def main():
+        with pytest.raises(DataFetchError):
+            async with governor.slot("detail"):
+                raise DataFetchError("bad response")
+
+    asyncio.run(main())
+
+    assert governor.stats()["detail"]["limit"] == 4
+    assert governor.stats()["detail"]["throttled"] == 0
+
+
+def test_slow_lane_is_decreased_alone():
+    governor = ConcurrencyGovernor({"detail": 4, "comments": 4}, global_limit=8, target_latency=0.01, cooldown=0)
+
+    run_requests(governor, ["detail"], duration=0.03)
+
+    stats = governor.stats()
+    assert stats["detail"]["limit"] == 2
+    assert stats["detail"]["latency_ewma_ms"] >= 30
+    assert stats["comments"]["limit"] == 4
+    assert stats["global"]["limit"] == 8
+
+
+def test_throttle_wrapped_in_retry_error():
+    attempt = AttemptFuture(3)
+    attempt.set_exception(IPBlockError("blocked"))
+
+    assert is_throttle_error(RetryError(attempt))
+    assert is_throttle_error(IPBlockError("blocked"))
+    assert not is_throttle_error(DataFetchError("bad response"))
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    governor = ConcurrencyGovernor({"detail": 1}, global_limit=4)
+
+    async def main():
+        async def hold(duration):
+            async with governor.slot("detail"):
+                await asyncio.sleep(duration)
+
+        first = asyncio.ensure_future(hold(0.02))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(hold(0))
+        await asyncio.sleep(0)
+        assert governor.stats()["global"]["waiting"] == 1
+        waiting.cancel()
+        await asyncio.gather(first, waiting, return_exceptions=True)
+        await asyncio.wait_for(hold(0), 1)
+
+    asyncio.run(main())
+
+    stats = governor.stats()
+    assert stats["detail"]["in_flight"] == 0
+    assert stats["global"]["waiting"] == 0
+
+
+def test_hold_paces_lane_without_delaying_caller():
+    hold = 0.05
+    governor = ConcurrencyGovernor({"detail": 1}, global_limit=4, hold={"detail": hold})
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        returned = []
+        for _ in range(3):
+            begin = loop.time()
+            async with governor.slot("detail"):
+                granted = loop.time()
+            returned.append((granted - begin, loop.time() - granted))
+        await asyncio.sleep(hold * 1.5)
+        return returned
+
+    returned = asyncio.run(main())
+
+    waits, latencies = zip(*returned)
+    # 请求结束即返回；同一通道的下一个请求等 hold 之后才获得名额
+    assert all(latency < hold / 2 for latency in latencies)
+    assert waits[0] < hold / 2
+    assert all(wait >= hold * 0.9 for wait in waits[1:])
+    assert governor.stats()["detail"]["in_flight"] == 0
+
+
+class PagedCommentsClient(XiaoHongShuClient):
+    """只替换签名请求 get：按游标返回评论页并记录每页请求的时间"""
+
+    def __init__(self, governor, pages):
+        self.governor = governor
+        self.pages = pages
+        self.requested_at = []
+
+    async def get(self, uri, params=None):
+        self.requested_at.append(asyncio.get_running_loop().time())
+        page = int(params["cursor"] or 0)
+        return {
+            "has_more": page + 1 < self.pages,
+            "cursor": str(page + 1),
+            "comments": [{"id": f"c{page}", "content": "", "sub_comment_has_more": False}],
+        }
+
+
+def test_comment_pages_are_paced_once(monkeypatch):
+    interval = 0.05
+    monkeypatch.setattr(core.config, "CRAWLER_MAX_SLEEP_SEC", interval)
+    client = PagedCommentsClient(core.XiaoHongShuCrawler().governor, pages=5)
+
+    async def main():
+        return [comments async for comments in client.iter_note_comments("n", "t", crawl_interval=interval)]
+
+    pages = asyncio.run(main())
+
+    assert len(pages) == 5
+    gaps = [later - earlier for earlier, later in zip(client.requested_at, client.requested_at[1:])]
+    # 每页间隔一个 crawl_interval，而不是 crawl_interval + hold
+    assert all(interval * 0.9 <= gap < interval * 1.6 for gap in gaps), gaps
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+KeywordMatcher 单元测试：重叠关键词、大小写/全半角归一、空关键词，
+以及少量关键词（子串查找）与大量关键词（Aho-Corasick 自动机）两条路径结果一致
+
+运行：python -m pytest -q test_keyword_matcher.py
+"""
+import pytest
+
+from xhs_crawler.tools import keyword_matcher
+from xhs_crawler.tools.keyword_matcher import KeywordMatcher, compile_keywords, normalize_text
+
+
+@pytest.fixture(params=["substring", "automaton"])
+def path(request, monkeypatch):
+    """两条匹配路径各跑一遍：automaton 时把子串查找的关键词数上限设为 0"""
+    if request.param == "automaton":
+        monkeypatch.setattr(keyword_matcher, "SUBSTRING_SCAN_MAX_KEYWORDS", 0)
+    return request.param
+
+
+def test_overlapping_keywords(path):
+    matcher = KeywordMatcher(["he", "she", "his", "hers"])
+
+    assert matcher.find_all("ushers") == ["she", "he", "hers"]
+    assert matcher.find_all("this") == ["his"]
+    assert matcher.search("ushers")
+    assert not matcher.search("hi")
+
+
+def test_keyword_inside_another(path):
+    matcher = KeywordMatcher(["链接", "求链接", "链接地址"])
+
+    # 按首次出现的起始位置排序，起始位置相同时按关键词顺序
+    assert matcher.find_all("求链接地址") == ["求链接", "链接", "链接地址"]
+    assert matcher.find_all("有链接吗") == ["链接"]
+
+
+def test_order_of_first_occurrence(path):
+    matcher = KeywordMatcher(["bc", "abcd", "x"])
+
+    assert matcher.find_all("x abcd bc x") == ["x", "abcd", "bc"]
+
+
+def test_fail_links_after_partial_match(path):
+    matcher = KeywordMatcher(["abcd", "bce"])
+
+    # abc 之后遇到 e：沿失败链接回到 bc 继续匹配
+    assert matcher.find_all("abce") == ["bce"]
+    assert matcher.find_all("aabcd") == ["abcd"]
+
+
+def test_case_and_width_folding(path):
+    matcher = KeywordMatcher(["ＰＤＦ", "Hello"])
+
+    assert normalize_text("ＰＤＦ") == "pdf"
+    assert matcher.find_all("求pdf，hello") == ["ＰＤＦ", "Hello"]
+    assert matcher.find_all("ＨＥＬＬＯ Pdf") == ["Hello", "ＰＤＦ"]
+    # 返回构造时传入的原始写法
+    assert matcher.keywords == ["ＰＤＦ", "Hello"]
+
+
+def test_blank_and_duplicate_keywords_are_dropped(path):
+    matcher = KeywordMatcher(["", "  ", None, "abc", "ABC", "ａｂｃ"])
+
+    assert len(matcher) == 1
+    assert matcher.keywords == ["abc"]
+    assert matcher.find_all("xABCx") == ["abc"]
+
+
+def test_empty_matcher_and_text(path):
+    empty = KeywordMatcher([])
+
+    assert not empty
+    assert empty.find_all("anything") == []
+    assert not empty.search("anything")
+    assert KeywordMatcher(["a"]).find_all("") == []
+    assert not KeywordMatcher(["a"]).search("")
+
+
+def test_paths_agree_on_many_keywords(monkeypatch):
+    keywords = [f"词{i}" for i in range(50)] + ["词1词", "1词2"]
+    texts = ["词1词2词3", "无关内容", "词49和词4", "ｘ词10ｙ"]
+    matcher = KeywordMatcher(keywords)
+    by_automaton = [matcher.find_all(text) for text in texts]
+
+    monkeypatch.setattr(keyword_matcher, "SUBSTRING_SCAN_MAX_KEYWORDS", len(keywords))
+    by_substring = [matcher.find_all(text) for text in texts]
+
+    assert by_automaton == by_substring
+    assert by_automaton[0] == ["词1", "词1词", "1词2", "词2", "词3"]
+
+
+def test_compile_keywords_is_cached():
+    assert compile_keywords(("a", "b")) is compile_keywords(("a", "b"))
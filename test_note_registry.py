@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+NoteClaims 单元测试：多进程爬取中同一帖子只归先登记的关键词抓取
+
+运行：python -m pytest -q test_note_registry.py
+"""
+import os
+
+from note_registry import NoteClaims
+
+
+def test_first_keyword_claims_note(tmp_path):
+    # 两个实例共用一个文件，相当于两个工作进程
+    path = os.path.join(tmp_path, 'workers', 'claims.jsonl')
+    first, second = NoteClaims(path), NoteClaims(path)
+
+    assert first.claim('n1', '减脂')
+    assert not second.claim('n1', '健身')
+    assert second.claim('n2', '健身')
+    assert not first.claim('n2', '减脂')
+
+
+def test_owner_claims_again_after_restart(tmp_path):
+    path = os.path.join(tmp_path, 'claims.jsonl')
+    NoteClaims(path).claim('n1', '减脂')
+
+    # 关键词在另一个进程中从断点继续，仍负责它登记过的帖子
+    restarted = NoteClaims(path)
+    assert restarted.claim('n1', '减脂')
+    assert not restarted.claim('n1', '健身')
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+PagePrefetcher 单元测试：预取下一页、crawl_interval 与处理时间重叠、提前停止时取消预取、
+被丢弃的预取页的异常不外抛，
+以及关键词搜索不请求（包括预取）超出帖子数预算的页
+
+运行：python -m pytest -q test_pagination.py
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from xhs_crawler.media_platform.xhs import core
+from xhs_crawler.media_platform.xhs.pagination import PagePrefetcher, cursor_of
+from xhs_crawler.media_platform.xhs.scheduler import FairScheduler
+
+
+class FakePages:
+    """按页码游标返回 pages 页，记录每页请求的开始/结束/取消"""
+
+    def __init__(self, pages, latency=0.0, fail_on=None):
+        self.pages = pages
+        self.latency = latency
+        self.fail_on = fail_on
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    async def fetch(self, cursor):
+        page = int(cursor or 0)
+        self.started.append(page)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        if page == self.fail_on:
+            raise RuntimeError(f"page {page} failed")
+        self.finished.append(page)
+        return {"has_more": page + 1 < self.pages, "cursor": str(page + 1), "items": [page]}
+
+
+def test_cursor_of():
+    assert cursor_of(None) is None
+    assert cursor_of({"has_more": False, "cursor": "x"}) is None
+    assert cursor_of({"has_more": True, "cursor": "x"}) == "x"
+    assert cursor_of({"has_more": True}) == ""
+
+
+def test_yields_every_page_and_tracks_cursor():
+    source = FakePages(4)
+
+    async def consume():
+        seen = []
+        async with PagePrefetcher(source.fetch, "", cursor_of) as pages:
+            async for page in pages:
+                seen.append((pages.cursor, page["items"][0]))
+        return seen
+
+    assert asyncio.run(consume()) == [("", 0), ("1", 1), ("2", 2), ("3", 3)]
+    assert source.started == [0, 1, 2, 3]
+
+
+def test_next_page_is_requested_while_consumer_processes():
+    source = FakePages(3, latency=0.01)
+
+    async def consume():
+        started_while_processing = []
+        async with PagePrefetcher(source.fetch, "", cursor_of) as pages:
+            async for page in pages:
+                await asyncio.sleep(0.02)  # 处理本页
+                started_while_processing.append(list(source.started))
+        return started_while_processing
+
+    # 处理第 N 页时第 N+1 页已经发出
+    assert asyncio.run(consume()) == [[0, 1], [0, 1, 2], [0, 1, 2]]
+
+
+def test_crawl_interval_overlaps_processing():
+    source = FakePages(5)
+    interval = 0.05
+
+    async def consume():
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+        arrived = []
+        async with PagePrefetcher(source.fetch, "", cursor_of, crawl_interval=interval) as pages:
+            async for _ in pages:
+                arrived.append(loop.time() - begin)
+                await asyncio.sleep(interval)  # 处理时间与请求间隔相同
+        return arrived
+
+    arrived = asyncio.run(consume())
+    gaps = [later - earlier for earlier, later in zip(arrived, arrived[1:])]
+    # 每页间隔约为一个 interval，而不是 处理时间 + interval
+    assert all(interval * 0.9 <= gap < interval * 1.6 for gap in gaps), gaps
+    # 第一页不等待
+    assert arrived[0] < interval / 2
+
+
+def test_next_cursor_ends_pagination():
+    source = FakePages(10)
+
+    def first_two(page, cursor):
+        return cursor_of(page) if page["items"][0] < 1 else None
+
+    async def consume():
+        async with PagePrefetcher(source.fetch, "", first_two) as pages:
+            return [page["items"][0] async for page in pages]
+
+    assert asyncio.run(consume()) == [0, 1]
+    assert source.started == [0, 1]
+
+
+def test_early_exit_cancels_prefetch():
+    source = FakePages(5, latency=0.05)
+
+    async def consume():
+        async with PagePrefetcher(source.fetch, "", cursor_of) as pages:
+            async for page in pages:
+                await asyncio.sleep(0.01)  # 第 1 页的预取已发出
+                break
+        await asyncio.sleep(0.1)
+
+    asyncio.run(consume())
+    assert source.finished == [0]
+    assert source.cancelled == [1]
+
+
+def test_aclose_discards_error_of_prefetched_page():
+    source = FakePages(5, fail_on=1)
+
+    async def consume():
+        async with PagePrefetcher(source.fetch, "", cursor_of) as pages:
+            async for page in pages:
+                await asyncio.sleep(0.01)  # 预取的第 1 页在此期间失败
+                break
+        return page
+
+    assert asyncio.run(consume())["items"] == [0]
+    assert source.started == [0, 1]
+
+
+def test_error_of_consumed_page_propagates():
+    source = FakePages(5, fail_on=2)
+
+    async def consume():
+        seen = []
+        async with PagePrefetcher(source.fetch, "", cursor_of) as pages:
+            async for page in pages:
+                seen.append(page["items"][0])
+        return seen
+
+    with pytest.raises(RuntimeError, match="page 2 failed"):
+        asyncio.run(consume())
+
+
+def test_cancelling_caller_during_aclose_propagates():
+    release = asyncio.Event()
+
+    async def slow_to_cancel(cursor):
+        if not cursor:
+            return {"has_more": True, "cursor": "1"}
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await release.wait()  # 预取请求收尾需要时间
+            raise
+
+    async def main():
+        pages = PagePrefetcher(slow_to_cancel, "", cursor_of)
+        await pages.__anext__()  # 第 2 页开始预取
+        closing = asyncio.ensure_future(pages.aclose())
+        await asyncio.sleep(0.01)
+        closing.cancel()  # 调用方自己在 aclose 期间被取消
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.wait([closing])
+        return closing
+
+    closing = asyncio.run(main())
+    assert closing.cancelled()
+
+
+def test_aclose_without_iterating():
+    source = FakePages(3)
+
+    async def consume():
+        pages = PagePrefetcher(source.fetch, "", cursor_of)
+        await pages.aclose()
+        return [page async for page in pages]
+
+    # 关闭后不再发出请求
+    assert asyncio.run(consume()) == []
+    assert source.started == []
+
+
+@pytest.mark.parametrize("max_notes_count, start_page, expected", [(10, 1, []), (20, 1, [1]), (40, 1, [1, 2]), (40, 2, [2, 3])])
+def test_search_requests_no_page_beyond_budget(monkeypatch, max_notes_count, start_page, expected):
+    class SearchClient:
+        def __init__(self):
+            self.pages = []
+
+        async def get_note_by_keyword(self, keyword, search_id, page, sort):
+            self.pages.append(page)
+            return {"items": [], "has_more": True}
+
+    monkeypatch.setattr(core.config, "ENABLE_GET_COMMENTS", False)
+    crawler = core.XiaoHongShuCrawler()
+    client = crawler.xhs_client = SearchClient()
+
+    asyncio.run(crawler.search_keyword("k", FairScheduler(concurrency=1), start_page, max_notes_count))
+
+    # 每页 20 条：预算内的页才请求，最后一页之后也不预取下一页
+    assert client.pages == expected
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+PlaywrightSigner 单元测试（用假的签名页，不启动浏览器）：签名超时、window.mnsv2 缺失时重新打开签名页后重试、
+执行出错但页面可用时直接重试、连续超时后先恢复页面、页面关闭时新建页面、没有签名页时报错，
+客户端为每个请求生成独立的签名请求头，
+以及核心爬虫中一个帖子签名超时只跳过该帖子
+
+运行：python -m pytest -q test_playwright_sign.py
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from xhs_crawler.media_platform.xhs import core
+from xhs_crawler.media_platform.xhs.client import XiaoHongShuClient
+from xhs_crawler.media_platform.xhs.exception import SignError, SignTimeoutError
+from xhs_crawler.media_platform.xhs.playwright_sign import PlaywrightSigner
+from xhs_crawler.media_platform.xhs.scheduler import FairScheduler
+
+MNSV2_READY = "typeof window.mnsv2 === 'function'"
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(self, mode="blank")
+        self.pages.append(page)
+        return page
+
+
+class FakePage:
+    """mode 为 ok（正常签名）、hang（所有调用都卡住）、missing（没有 window.mnsv2）、
+    raise（签名时执行出错一次，如页面跳转中）、blank（新页面，还没打开小红书）；goto 后变为 after_goto"""
+
+    def __init__(self, context=None, mode="ok", after_goto="ok"):
+        self.context = context or FakeContext()
+        self.mode = mode
+        self.after_goto = after_goto
+        self.closed = False
+        self.visited = []
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, timeout=None):
+        self.visited.append(url)
+        self.mode = self.after_goto
+
+    async def evaluate(self, expression):
+        if self.mode == "hang":
+            await asyncio.sleep(10)
+        if expression == "() => window.localStorage":
+            return {"b1": "b1-value"}
+        if expression == MNSV2_READY:
+            return self.mode in ("ok", "raise")
+        if self.mode == "raise":
+            self.mode = "ok"
+            raise RuntimeError("Execution context was destroyed")
+        if self.mode in ("missing", "blank"):
+            return None
+        return "x3-signature"
+
+
+def sign(signer, uri="/api/sns/web/v1/search/notes"):
+    return asyncio.run(signer.sign(uri, {"keyword": "k"}, a1="a1"))
+
+
+def test_requires_page():
+    with pytest.raises(ValueError):
+        PlaywrightSigner(None)
+    with pytest.raises(ValueError, match="playwright_page"):
+        XiaoHongShuClient(headers={}, cookie_dict={})
+
+
+def test_sign_ok():
+    page = FakePage()
+    signer = PlaywrightSigner(page, timeout=0.5)
+
+    signs = sign(signer)
+
+    assert signs["x-s"].startswith("XYS_")
+    assert set(signs) == {"x-s", "x-t", "x-s-common", "x-b3-traceid"}
+    stats = signer.stats()
+    assert (stats["total"], stats["failures"], stats["recoveries"]) == (1, 0, 0)
+    assert page.visited == []
+
+
+def test_signed_headers_are_per_request():
+    class CountingSigner:
+        page = None
+        count = 0
+
+        async def sign(self, uri, data, a1, method):
+            CountingSigner.count += 1
+            x_s = f"s{CountingSigner.count}"
+            await asyncio.sleep(0)
+            return {"x-s": x_s, "x-t": "t", "x-s-common": "c", "x-b3-traceid": "b"}
+
+    client = XiaoHongShuClient(headers={"Cookie": "a1=a1"}, cookie_dict={"a1": "a1"}, signer=CountingSigner())
+
+    async def sign_two():
+        return await asyncio.gather(client._pre_headers("/a", params={}), client._pre_headers("/b", params={}))
+
+    first, second = asyncio.run(sign_two())
+
+    # 并发请求（及其重试）各自带自己的签名，不写入共用的 client.headers
+    assert {first["X-S"], second["X-S"]} == {"s1", "s2"}
+    assert first["Cookie"] == second["Cookie"] == "a1=a1"
+    assert client.headers == {"Cookie": "a1=a1"}
+
+
+def test_timeout_raises_without_recovering():
+    page = FakePage(mode="hang")
+    signer = PlaywrightSigner(page, timeout=0.05)
+
+    with pytest.raises(SignTimeoutError):
+        sign(signer)
+
+    # 单次超时不重新打开页面，直接交给调用方重试
+    assert page.visited == []
+    stats = signer.stats()
+    assert (stats["failures"], stats["consecutive_failures"], stats["recoveries"]) == (1, 1, 0)
+
+
+def test_repeated_timeouts_recover_page_first():
+    page = FakePage(mode="hang")
+    signer = PlaywrightSigner(page, timeout=0.05)
+    for _ in range(PlaywrightSigner.RECOVER_AFTER_FAILURES):
+        with pytest.raises(SignTimeoutError):
+            sign(signer)
+
+    # 连续超时后先重新打开签名页，再签名
+    signs = sign(signer)
+
+    assert signs["x-s"].startswith("XYS_")
+    assert page.visited == [signer.index_url]
+    stats = signer.stats()
+    assert (stats["consecutive_failures"], stats["recoveries"]) == (0, 1)
+
+
+def test_missing_mnsv2_recovers_and_retries():
+    page = FakePage(mode="missing")
+    signer = PlaywrightSigner(page, timeout=0.5)
+
+    signs = sign(signer)
+
+    assert signs["x-s"].startswith("XYS_")
+    assert page.visited == [signer.index_url]
+    stats = signer.stats()
+    assert (stats["total"], stats["failures"], stats["recoveries"]) == (1, 0, 1)
+
+
+def test_evaluate_error_retries_on_ready_page():
+    page = FakePage(mode="raise")
+    signer = PlaywrightSigner(page, timeout=0.5)
+
+    signs = sign(signer)
+
+    # window.mnsv2 仍可用：不重新打开页面，直接重试
+    assert signs["x-s"].startswith("XYS_")
+    assert page.visited == []
+    stats = signer.stats()
+    assert (stats["total"], stats["failures"], stats["recoveries"]) == (1, 0, 0)
+
+
+def test_recover_failure_raises_sign_error():
+    page = FakePage(mode="missing", after_goto="missing")
+    signer = PlaywrightSigner(page, timeout=0.5)
+
+    with pytest.raises(SignError, match="still missing"):
+        sign(signer)
+
+    stats = signer.stats()
+    assert (stats["failures"], stats["recoveries"]) == (1, 1)
+
+
+def test_closed_page_is_recreated():
+    page = FakePage()
+    page.closed = True
+    signer = PlaywrightSigner(page, timeout=0.5)
+
+    signs = sign(signer)
+
+    assert signs["x-s"].startswith("XYS_")
+    [new_page] = page.context.pages
+    assert signer.page is new_page
+    assert new_page.visited == [signer.index_url]
+
+
+def test_sign_timeout_on_one_note_skips_only_that_note(monkeypatch):
+    class OneNoteTimesOutClient:
+        def __init__(self):
+            self.comments = []
+
+        async def get_note_by_keyword(self, keyword, search_id, page, sort):
+            items = [{"id": note_id, "xsec_token": "t", "xsec_source": "pc_search"} for note_id in ("n1", "n2")]
+            return {"items": items, "has_more": True}
+
+        async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+            if note_id == "n1":
+                raise SignTimeoutError("window.mnsv2 timed out")
+            return {"note_id": note_id}
+
+        async def get_note_all_comments(self, note_id, **kwargs):
+            self.comments.append(note_id)
+            return []
+
+    monkeypatch.setattr(core.config, "ENABLE_GET_COMMENTS", True)
+    crawler = core.XiaoHongShuCrawler()
+    client = crawler.xhs_client = OneNoteTimesOutClient()
+
+    # 一页 20 条的预算：只搜第一页；n1 签名超时只丢掉 n1，不中断整个关键词
+    asyncio.run(crawler.search_keyword("k", FairScheduler(concurrency=1), start_page=1, max_notes_count=20))
+
+    assert client.comments == ["n2"]
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+FairScheduler 单元测试：加权轮转的顺序、并发上限、请求间隔与取消
+
+运行：python -m pytest -q test_scheduler.py
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from xhs_crawler.media_platform.xhs.scheduler import FairScheduler
+
+
+def run_flows(scheduler, turns, hold=0.0):
+    """每个 flow 一个协程，依次申请 turns[name] 次；返回获得 turn 的顺序和同时持有的最大数"""
+    order = []
+    active = [0, 0]  # 当前持有数, 最大持有数
+
+    async def flow(name, count):
+        for _ in range(count):
+            async with scheduler.turn(name):
+                order.append(name)
+                active[0] += 1
+                active[1] = max(active)
+                await asyncio.sleep(hold)
+                active[0] -= 1
+
+    async def main():
+        # 先占住一个名额，等所有 flow 都排上队再放开，避免先启动的 flow 独占第一轮
+        async with scheduler.turn("start"):
+            tasks = [asyncio.ensure_future(flow(name, count)) for name, count in turns.items()]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return order, active[1]
+
+
+def test_equal_weights_alternate():
+    order, _ = run_flows(FairScheduler(), {"a": 5, "b": 5})
+
+    assert order == ["a", "b"] * 5
+
+
+def test_weighted_round_robin_is_smooth():
+    scheduler = FairScheduler()
+    scheduler.register("deep", 2)
+    scheduler.register("short", 1)
+
+    order, _ = run_flows(scheduler, {"deep": 20, "short": 10})
+
+    # 权重 2:1 时交错为 deep, short, deep，而不是 deep 连续占满两轮
+    assert order[:9] == ["deep", "short", "deep"] * 3
+    assert order.count("deep") == 20 and order.count("short") == 10
+    assert scheduler.stats()["deep"] == {"weight": 2, "granted": 20, "waiting": 0}
+
+
+def test_short_flow_finishes_early_and_others_continue():
+    order, _ = run_flows(FairScheduler(), {"a": 2, "b": 6, "c": 6})
+
+    # a 在前两轮内完成，之后 b、c 继续轮转
+    assert order[:6] == ["a", "b", "c"] * 2
+    assert order[6:] == ["b", "c"] * 4
+
+
+def test_concurrency_limit():
+    _, peak = run_flows(FairScheduler(concurrency=2), {"a": 3, "b": 3, "c": 3, "d": 3}, hold=0.01)
+
+    assert peak == 2
+
+
+def test_interval_between_turns():
+    scheduler = FairScheduler(concurrency=3, interval=0.05)
+    granted_at = []
+
+    async def flow(name):
+        async with scheduler.turn(name):
+            granted_at.append(asyncio.get_running_loop().time())
+
+    async def main():
+        await asyncio.gather(*(flow(name) for name in "abcd"))
+
+    asyncio.run(main())
+
+    gaps = [later - earlier for earlier, later in zip(granted_at, granted_at[1:])]
+    assert len(gaps) == 3
+    # 定时器精度有限，留少量余量
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_cancelled_waiter_is_dropped():
+    scheduler = FairScheduler()
+    order = []
+
+    async def flow(name, hold=0.0):
+        async with scheduler.turn(name):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def main():
+        holder = asyncio.ensure_future(flow("a", hold=0.05))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(flow("b"))
+        waiting = asyncio.ensure_future(flow("c"))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["b"]["waiting"] == 1
+        cancelled.cancel()
+        await asyncio.gather(holder, waiting, cancelled, return_exceptions=True)
+        # 被取消的等待者不占用名额，之后仍可正常申请
+        await asyncio.wait_for(flow("b"), 1)
+
+    asyncio.run(main())
+
+    assert order == ["a", "c", "b"]
+    assert scheduler.stats()["b"] == {"weight": 1, "granted": 1, "waiting": 0}
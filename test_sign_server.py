@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+SignServer / RemoteSigner 单元测试：经临时 Unix socket 往返签名、取 cookies、错误类型透传，
+以及连接断开后丢弃该连接、等待连接的调用方立即用新连接继续
+
+运行：python -m pytest -q test_sign_server.py
+"""
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from xhs_crawler.media_platform.xhs.exception import SignError, SignTimeoutError
+from xhs_crawler.media_platform.xhs.sign_server import RemoteSigner, SignServer, parse_sign_server_address
+
+
+class FakeSigner:
+    """代替签名页：按 uri 返回签名，uri 为 /timeout 时超时"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def sign(self, uri, data=None, a1="", method="POST"):
+        self.calls.append((uri, a1, method))
+        if uri == "/timeout":
+            raise SignTimeoutError("window.mnsv2 timed out")
+        return {"x-s": f"sig:{uri}", "x-t": "1"}
+
+    def stats(self):
+        return {"calls": len(self.calls)}
+
+
+class FakeContext:
+    async def cookies(self):
+        return [{"name": "a1", "value": "daemon-a1"}]
+
+
+def socket_path():
+    # Unix socket 路径有长度限制，不用 pytest 的 tmp_path
+    return os.path.join(tempfile.mkdtemp(), "sign.sock")
+
+
+async def serve(handler, path):
+    return await asyncio.start_unix_server(handler, path=path)
+
+
+def test_parse_address():
+    assert parse_sign_server_address("unix:///tmp/s.sock") == ("unix", "/tmp/s.sock")
+    assert parse_sign_server_address("tcp://0.0.0.0:8765") == ("tcp", ("0.0.0.0", 8765))
+    assert parse_sign_server_address(":8765") == ("tcp", ("127.0.0.1", 8765))
+    with pytest.raises(ValueError):
+        parse_sign_server_address("localhost")
+
+
+def test_round_trip_over_unix_socket():
+    path = socket_path()
+    signer = FakeSigner()
+    server = SignServer(f"unix://{path}", user_data_dir="")
+    server._browser_context = FakeContext()
+    server._signers = [signer]
+
+    async def main():
+        server._idle_signers = asyncio.Queue()
+        server._idle_signers.put_nowait(signer)
+        listener = await serve(server._handle_connection, path)
+        client = RemoteSigner(f"unix://{path}", timeout=1.0)
+        try:
+            signs = await client.sign("/api/a", {"k": "v"}, a1="own-a1")
+            # 没有 a1 时用签名服务浏览器的 a1
+            await client.sign("/api/b", method="GET")
+            cookies = await client.get_cookies()
+            remote = await client.remote_stats()
+            with pytest.raises(SignTimeoutError):
+                await client.sign("/timeout")
+            with pytest.raises(SignError, match="unknown op"):
+                await client._call({"op": "nope"})
+            return signs, cookies, remote, client.stats()
+        finally:
+            await client.close()
+            listener.close()
+
+    signs, cookies, remote, stats = asyncio.run(main())
+
+    assert signs == {"x-s": "sig:/api/a", "x-t": "1"}
+    assert signer.calls[:2] == [("/api/a", "own-a1", "POST"), ("/api/b", "daemon-a1", "GET")]
+    assert cookies == [{"name": "a1", "value": "daemon-a1"}]
+    assert remote == {"pages": [{"calls": 2}]}
+    assert (stats["total"], stats["failures"]) == (3, 1)
+
+
+def line_server(replies):
+    """每条请求按 replies[uri] 处理："drop" 时断开连接，其他值原样作为一行回复"""
+    connections = []
+
+    async def handler(reader, writer):
+        connections.append(writer)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            uri = json.loads(line)["uri"]
+            reply = replies.get(uri, {"ok": True, "result": {"x-s": uri}})
+            if reply == "drop":
+                await asyncio.sleep(0.05)
+                writer.close()
+                return
+            writer.write(reply if isinstance(reply, bytes) else json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    return handler, connections
+
+
+def test_broken_connection_is_dropped():
+    path = socket_path()
+    handler, connections = line_server({"/drop": "drop", "/garbage": b"not json\n"})
+
+    async def main():
+        listener = await serve(handler, path)
+        client = RemoteSigner(f"unix://{path}", timeout=1.0, max_connections=1)
+        try:
+            with pytest.raises(SignError, match="closed the connection"):
+                await client.sign("/drop")
+            # 断开的连接已丢弃，下一次调用重新连接
+            assert await client.sign("/ok") == {"x-s": "/ok"}
+            with pytest.raises(SignError, match="malformed"):
+                await client.sign("/garbage")
+            return client.stats()
+        finally:
+            await client.close()
+            listener.close()
+
+    stats = asyncio.run(main())
+
+    assert len(connections) == 2
+    assert (stats["failures"], stats["consecutive_failures"]) == (2, 1)
+
+
+def test_waiter_gets_replacement_when_connection_drops():
+    path = socket_path()
+    handler, connections = line_server({"/drop": "drop"})
+    timeout = 1.0
+
+    async def main():
+        listener = await serve(handler, path)
+        client = RemoteSigner(f"unix://{path}", timeout=timeout, max_connections=1)
+        loop = asyncio.get_running_loop()
+        try:
+            dropped = asyncio.ensure_future(client.sign("/drop"))
+            await asyncio.sleep(0.01)
+            # 唯一的连接正在使用：第二个调用等待连接
+            begin = loop.time()
+            signs = await client.sign("/ok")
+            waited = loop.time() - begin
+            with pytest.raises(SignError):
+                await dropped
+            return signs, waited
+        finally:
+            await client.close()
+            listener.close()
+
+    signs, waited = asyncio.run(main())
+
+    # 连接断开时等待者立即被唤醒并新建连接，而不是等到超时
+    assert signs == {"x-s": "/ok"}
+    assert waited < timeout / 2
+    assert len(connections) == 2
+
+
+def test_cancelled_call_gives_back_its_slot():
+    path = socket_path()
+    handler, _ = line_server({"/slow": "drop"})
+
+    async def main():
+        listener = await serve(handler, path)
+        client = RemoteSigner(f"unix://{path}", timeout=1.0, max_connections=1)
+        try:
+            call = asyncio.ensure_future(client.sign("/slow"))
+            await asyncio.sleep(0.01)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            # 被取消的调用的连接不会被复用（回复可能迟到），名额交给下一个调用
+            return await asyncio.wait_for(client.sign("/ok"), 0.5)
+        finally:
+            await client.close()
+            listener.close()
+
+    assert asyncio.run(main()) == {"x-s": "/ok"}
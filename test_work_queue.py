@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+WorkQueue 单元测试：租约到期重新投递、续租、租约失效后提交/放弃被拒绝、投递次数用完记为失败，
+以及结果确认。SQLite 后端总会运行；Redis 后端在安装了 fakeredis 时运行
+
+运行：python -m pytest -q test_work_queue.py
+"""
+import os
+import time
+
+import pytest
+
+from work_queue import ITEM_DONE, ITEM_FAILED, ITEM_LEASED, ITEM_QUEUED, RedisWorkQueue, SQLiteWorkQueue
+
+# 测试用的短租约（秒）
+LEASE = 0.05
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def work_queue(request, tmp_path):
+    if request.param == "sqlite":
+        queue = SQLiteWorkQueue(os.path.join(tmp_path, "queue.db"), max_deliveries=2)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        queue = RedisWorkQueue(fakeredis.FakeRedis(decode_responses=True), max_deliveries=2)
+    yield queue
+    queue.close()
+
+
+def expire():
+    time.sleep(LEASE * 2)
+
+
+def test_put_is_idempotent_and_lease_is_fifo(work_queue):
+    assert work_queue.put("r", "keyword", "a", {"n": 1})
+    assert work_queue.put("r", "keyword", "b", {"n": 2})
+    assert not work_queue.put("r", "keyword", "a", {"n": 3})
+
+    first = work_queue.lease("w1")
+    second = work_queue.lease("w2")
+
+    assert (first.key, first.payload, first.deliveries, first.owner) == ("a", {"n": 1}, 1, "w1")
+    assert second.key == "b"
+    assert work_queue.lease("w3") is None
+    assert work_queue.stats("r")[ITEM_LEASED] == 2
+
+
+def test_expired_lease_is_redelivered(work_queue):
+    work_queue.put("r", "keyword", "a", {})
+    stale = work_queue.lease("w1", lease_seconds=LEASE)
+    expire()
+
+    again = work_queue.lease("w2", lease_seconds=LEASE)
+
+    assert again.key == "a"
+    assert (again.deliveries, again.owner) == (2, "w2")
+    # 原领取者已失去租约
+    assert not work_queue.heartbeat(stale)
+
+
+def test_heartbeat_renews_lease(work_queue):
+    work_queue.put("r", "keyword", "a", {})
+    item = work_queue.lease("w1", lease_seconds=LEASE)
+
+    for _ in range(3):
+        time.sleep(LEASE / 2)
+        assert work_queue.heartbeat(item, lease_seconds=LEASE)
+
+    # 续租后总时长已超过最初的租约，仍不会被重新投递
+    assert work_queue.lease("w2") is None
+    assert work_queue.complete(item, {"ok": True})
+
+
+def test_complete_after_expiry_is_rejected(work_queue):
+    work_queue.put("r", "keyword", "a", {})
+    item = work_queue.lease("w1", lease_seconds=LEASE)
+    expire()
+
+    # 租约到期但尚未被其他工作者领取时同样拒绝，结果由重新领取的工作者提交
+    assert not work_queue.complete(item, {"ok": True})
+    assert not work_queue.fail(item, "boom")
+    assert work_queue.results() == []
+    again = work_queue.lease("w2")
+    assert work_queue.complete(again, {"ok": True})
+    assert not work_queue.complete(item, {"ok": True})
+    assert work_queue.stats("r")[ITEM_DONE] == 1
+
+
+def test_max_deliveries_marks_failed(work_queue):
+    work_queue.put("r", "keyword", "a", {})
+    work_queue.lease("w1", lease_seconds=LEASE)
+    expire()
+    second = work_queue.lease("w2", lease_seconds=LEASE)
+    assert second.deliveries == 2
+    expire()
+
+    # 投递次数（2）已用完：不再投递，记为失败
+    assert work_queue.lease("w3") is None
+    stats = work_queue.stats("r")
+    assert stats[ITEM_FAILED] == 1
+    assert stats[ITEM_QUEUED] == stats[ITEM_LEASED] == 0
+
+
+def test_fail_requeues_until_deliveries_are_used(work_queue):
+    work_queue.put("r", "keyword", "a", {})
+
+    assert work_queue.fail(work_queue.lease("w1"), "boom")
+    assert work_queue.stats("r")[ITEM_QUEUED] == 1
+    assert work_queue.fail(work_queue.lease("w1"), "boom")
+
+    assert work_queue.lease("w1") is None
+    assert work_queue.stats("r")[ITEM_FAILED] == 1
+
+
+def test_results_until_acked(work_queue):
+    work_queue.put("r", "note", "n1", {})
+    work_queue.put("r", "note", "n2", {})
+    for _ in range(2):
+        item = work_queue.lease("w1")
+        work_queue.complete(item, {"key": item.key})
+
+    results = work_queue.results()
+    assert [result for _, result in results] == [{"key": "n1"}, {"key": "n2"}]
+    assert work_queue.stats("r")["unmerged"] == 2
+
+    work_queue.ack([results[0][0]])
+
+    assert [item.key for item, _ in work_queue.results()] == ["n2"]
+    assert work_queue.stats("r")["unmerged"] == 1
+    work_queue.purge("r")
+    assert work_queue.results() == []
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+用户数据存储
+每个评论用户保存为 USERS_DIR/<user_id>.json，包含用户信息、主页简介及其所有评论
+"""
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from xhs_crawler.media_platform.xhs.records import CommentRecord, NoteRecord, UserRecord
+from file_lock import FileLock
+
+# 用户文件锁分片数：按用户 ID 的 crc32 取模共用锁文件，避免每个用户一个锁文件
+USER_LOCK_STRIPES = 64
+
+
+class UserStore:
+    """按用户 ID 读写用户 JSON 文件（同步 IO，异步调用方应放到线程池中执行）"""
+
+    def __init__(self, users_dir: str):
+        self.users_dir = users_dir
+        os.makedirs(users_dir, exist_ok=True)
+
+    def path(self, user_id: str) -> str:
+        return os.path.join(self.users_dir, f"{user_id}.json")
+
+    def load(self, user_id: str) -> Optional[Dict]:
+        """读取已保存的用户，不存在时返回 None"""
+        user_file = self.path(user_id)
+        if not os.path.exists(user_file):
+            return None
+        with open(user_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, user_id: str, user_data: Dict):
+        """写入用户文件（先写临时文件再替换，其他进程读到的总是完整文件）"""
+        user_file = self.path(user_id)
+        tmp_path = user_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(user_data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, user_file)
+
+    def lock(self, user_id: str) -> FileLock:
+        """用户文件的跨进程锁，读改写同一用户时持有"""
+        stripe = zlib.crc32(user_id.encode('utf-8')) % USER_LOCK_STRIPES
+        data_dir = os.path.dirname(os.path.abspath(self.users_dir))
+        return FileLock(os.path.join(data_dir, 'locks', f'users-{stripe}.lock'))
+
+    def save_comment(
+        self, user: UserRecord, comment: CommentRecord, note: NoteRecord, keyword: str,
+        matched_keywords: Optional[List[str]] = None, desc: Optional[str] = None,
+        desc_matched_keywords: Optional[List[str]] = None,
+    ) -> Tuple[Dict, bool, bool]:
+        """在用户文件锁内完成 读取 → 合并评论/简介 → 写盘，返回 (用户数据, 是否新用户, 是否新增了评论)
+
+        多个进程可能同时抓到同一用户的评论，整个读改写必须在锁内，否则后写的会覆盖先写的评论
+        """
+        with self.lock(user.user_id):
+            existing_user, is_new_user, added = self.add_comment(user, comment, note, keyword, matched_keywords)
+            if desc and self.needs_desc(existing_user):
+                existing_user['desc'] = desc
+            if desc_matched_keywords:
+                existing_user['desc_matched_keywords'] = desc_matched_keywords
+            self.save(user.user_id, existing_user)
+        return existing_user, is_new_user, added
+
+    def add_comment(
+        self, user: UserRecord, comment: CommentRecord, note: NoteRecord, keyword: str,
+        matched_keywords: Optional[List[str]] = None,
+    ) -> Tuple[Dict, bool, bool]:
+        """把一条评论合并进用户数据（尚未写盘），返回 (用户数据, 是否新用户, 是否新增了评论)
+
+        matched_keywords 为评论命中的过滤词，随评论一起保存
+        """
+        existing_user = self.load(user.user_id)
+        is_new_user = existing_user is None
+        if is_new_user:
+            existing_user = user.to_dict()
+
+        # 添加评论信息
+        if 'comments' not in existing_user:
+            existing_user['comments'] = []
+        # 断点续爬可能重复抓到同一条评论
+        if comment.comment_id and any(c.get('comment_id') == comment.comment_id for c in existing_user['comments']):
+            return existing_user, is_new_user, False
+
+        # 评论发布时间：小红书 API 返回的 time 为毫秒时间戳（如 1771346050000）
+        ts = comment.time or 0
+        if ts:
+            sec = int(ts) / 1000 if int(ts) >= 1e12 else int(ts)
+            comment_time_str = datetime.fromtimestamp(sec).strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            comment_time_str = ''
+
+        existing_user['comments'].append({
+            'comment_id': comment.comment_id,
+            'content': comment.content,
+            'note_id': note.note_id,
+            'note_title': note.title,
+            'note_xsec_token': note.xsec_token,
+            'note_xsec_source': note.xsec_source,
+            'keyword': keyword,
+            'matched_keywords': list(matched_keywords or []),
+            'comment_time': ts,
+            'comment_time_str': comment_time_str,
+            'crawl_time': datetime.now().isoformat()
+        })
+
+        existing_user['keyword'] = keyword
+        existing_user['crawl_time'] = datetime.now().isoformat()
+        # 用户主页需 /user/profile/ 且带 xsec_token、xsec_source 才能正常跳转，用当前帖子参数
+        existing_user['user_url'] = profile_url(user.user_id, note)
+        return existing_user, is_new_user, True
+
+    @staticmethod
+    def needs_desc(user_data: Dict) -> bool:
+        """是否尚未抓取主页简介"""
+        return not (user_data.get('desc') or user_data.get('user_desc'))
+
+
+def profile_url(user_id: str, note: NoteRecord) -> str:
+    """用户主页链接，带上评论所在帖子的 xsec 参数"""
+    xsec_source = note.xsec_source or 'pc_note'
+    qs = f"xsec_source={xsec_source}"
+    if note.xsec_token:
+        qs = f"xsec_token={note.xsec_token}&{qs}"
+    return f"https://www.xiaohongshu.com/user/profile/{user_id}?{qs}"
@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+分布式爬取的共享工作队列
+关键词、帖子等工作项放在各台机器都能访问的队列中：工作者领取（lease）一项后定期续租（heartbeat），
+完成时连同结果一起提交；租约到期仍未完成（工作者宕机、断网）的工作项重新投递给其他工作者，
+投递次数用完的记为失败。结果由中心节点取回、合并到用户存储后确认（ack），未确认的结果不会丢失。
+
+后端可替换：
+    SQLiteWorkQueue  单机多进程测试，或多台机器共享同一磁盘
+    RedisWorkQueue   任意兼容 Redis 协议的服务（Redis、Valkey、KeyDB，或本地替身 fakeredis）
+open_work_queue('sqlite:///data/work_queue.db') / open_work_queue('redis://host:6379/0') 按地址创建
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+# 工作项租约时长（秒），工作者需在到期前续租
+DEFAULT_LEASE_SECONDS = 60.0
+# 每个工作项最多投递的次数，租约到期或处理失败都算一次
+MAX_DELIVERIES = 3
+# 工作项状态
+ITEM_QUEUED = 'queued'
+ITEM_LEASED = 'leased'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+ITEM_STATES = (ITEM_QUEUED, ITEM_LEASED, ITEM_DONE, ITEM_FAILED)
+
+
+class WorkItem:
+    """一个工作项：run_id 批次中某类（kind，如 keyword / note）工作，key 在批次内唯一"""
+
+    def __init__(self, run_id: str, kind: str, key: str, payload: Dict, deliveries: int = 0, owner: str = ''):
+        self.run_id = run_id
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.deliveries = deliveries
+        self.owner = owner
+
+    @property
+    def item_id(self) -> str:
+        return item_id(self.run_id, self.kind, self.key)
+
+    def __repr__(self) -> str:
+        return f"WorkItem({self.item_id!r}, deliveries={self.deliveries}, owner={self.owner!r})"
+
+
+def item_id(run_id: str, kind: str, key: str) -> str:
+    return f"{run_id}:{kind}:{key}"
+
+
+class WorkQueue(ABC):
+    """工作队列接口；各方法均为同步 IO，异步调用方应放到线程池中执行"""
+
+    def __init__(self, max_deliveries: int = MAX_DELIVERIES):
+        self.max_deliveries = max_deliveries
+
+    @abstractmethod
+    def put(self, run_id: str, kind: str, key: str, payload: Dict) -> bool:
+        """加入工作项；同一批次中同类同 key 的工作项已存在时不重复加入，返回 False"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[WorkItem]:
+        """领取最早入队的工作项（先把租约到期的重新排队），没有时返回 None"""
+
+    @abstractmethod
+    def heartbeat(self, item: WorkItem, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """续租；租约已到期并被重新投递时返回 False，工作者应放弃该工作项"""
+
+    @abstractmethod
+    def complete(self, item: WorkItem, result: Dict) -> bool:
+        """提交结果；租约已失效时返回 False（结果由重新领取的工作者提交）"""
+
+    @abstractmethod
+    def fail(self, item: WorkItem, error: str) -> bool:
+        """处理失败：投递次数未用完时重新排队，否则记为失败；租约已失效时返回 False"""
+
+    @abstractmethod
+    def results(self, limit: int = 100) -> List[Tuple[WorkItem, Dict]]:
+        """已完成但尚未确认合并的结果，按完成顺序"""
+
+    @abstractmethod
+    def ack(self, items: List[WorkItem]):
+        """确认结果已合并，不再由 results 返回"""
+
+    @abstractmethod
+    def stats(self, run_id: str) -> Dict[str, int]:
+        """批次中各状态的工作项数，unmerged 为尚未确认合并的结果数"""
+
+    @abstractmethod
+    def purge(self, run_id: str):
+        """删除批次的全部工作项"""
+
+    def close(self):
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """工作项保存在一个 SQLite 数据库中，领取在 BEGIN IMMEDIATE 事务内进行，多个进程可同时使用"""
+
+    def __init__(self, path: str, max_deliveries: int = MAX_DELIVERIES):
+        super().__init__(max_deliveries)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS work_items ('
+            ' item_id TEXT PRIMARY KEY, run_id TEXT NOT NULL, kind TEXT NOT NULL, item_key TEXT NOT NULL,'
+            ' payload TEXT NOT NULL, state TEXT NOT NULL, deliveries INTEGER NOT NULL DEFAULT 0,'
+            " owner TEXT NOT NULL DEFAULT '', lease_until REAL NOT NULL DEFAULT 0,"
+            " result TEXT, error TEXT NOT NULL DEFAULT '', merged INTEGER NOT NULL DEFAULT 0, finished_at REAL)"
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS work_items_state ON work_items (state, lease_until)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS work_items_run ON work_items (run_id, state)')
+
+    def _transaction(self, func, *args):
+        """在写事务中执行 func(conn, now, *args)"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                value = func(self._conn, time.time(), *args)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return value
+
+    def put(self, run_id: str, kind: str, key: str, payload: Dict) -> bool:
+        def insert(conn, now):
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO work_items (item_id, run_id, kind, item_key, payload, state)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (item_id(run_id, kind, key), run_id, kind, key, json.dumps(payload, ensure_ascii=False), ITEM_QUEUED),
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(insert)
+
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[WorkItem]:
+        def take(conn, now):
+            # 租约到期的工作项：投递次数用完记为失败，否则重新排队（保持原来的先后顺序）
+            conn.execute(
+                'UPDATE work_items SET state = CASE WHEN deliveries >= ? THEN ? ELSE ? END,'
+                " owner = '', error = 'lease expired', finished_at = CASE WHEN deliveries >= ? THEN ? END"
+                ' WHERE state = ? AND lease_until < ?',
+                (self.max_deliveries, ITEM_FAILED, ITEM_QUEUED, self.max_deliveries, now, ITEM_LEASED, now),
+            )
+            row = conn.execute(
+                'SELECT run_id, kind, item_key, payload, deliveries FROM work_items'
+                ' WHERE state = ? ORDER BY rowid LIMIT 1',
+                (ITEM_QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            run_id, kind, key, payload, deliveries = row
+            conn.execute(
+                'UPDATE work_items SET state = ?, owner = ?, lease_until = ?, deliveries = ? WHERE item_id = ?',
+                (ITEM_LEASED, worker_id, now + lease_seconds, deliveries + 1, item_id(run_id, kind, key)),
+            )
+            return WorkItem(run_id, kind, key, json.loads(payload), deliveries + 1, worker_id)
+
+        return self._transaction(take)
+
+    def heartbeat(self, item: WorkItem, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        def renew(conn, now):
+            cursor = conn.execute(
+                'UPDATE work_items SET lease_until = ?'
+                ' WHERE item_id = ? AND state = ? AND owner = ? AND deliveries = ? AND lease_until >= ?',
+                (now + lease_seconds, item.item_id, ITEM_LEASED, item.owner, item.deliveries, now),
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(renew)
+
+    def complete(self, item: WorkItem, result: Dict) -> bool:
+        def finish(conn, now):
+            cursor = conn.execute(
+                'UPDATE work_items SET state = ?, result = ?, finished_at = ?'
+                ' WHERE item_id = ? AND state = ? AND owner = ? AND deliveries = ? AND lease_until >= ?',
+                (ITEM_DONE, json.dumps(result, ensure_ascii=False), now,
+                 item.item_id, ITEM_LEASED, item.owner, item.deliveries, now),
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(finish)
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        def give_back(conn, now):
+            failed = item.deliveries >= self.max_deliveries
+            cursor = conn.execute(
+                "UPDATE work_items SET state = ?, owner = '', lease_until = 0, error = ?, finished_at = ?"
+                ' WHERE item_id = ? AND state = ? AND owner = ? AND deliveries = ? AND lease_until >= ?',
+                (ITEM_FAILED if failed else ITEM_QUEUED, error, now if failed else None,
+                 item.item_id, ITEM_LEASED, item.owner, item.deliveries, now),
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(give_back)
+
+    def results(self, limit: int = 100) -> List[Tuple[WorkItem, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT run_id, kind, item_key, payload, deliveries, owner, result FROM work_items'
+                ' WHERE state = ? AND merged = 0 ORDER BY finished_at LIMIT ?',
+                (ITEM_DONE, limit),
+            ).fetchall()
+        return [
+            (WorkItem(run_id, kind, key, json.loads(payload), deliveries, owner), json.loads(result))
+            for run_id, kind, key, payload, deliveries, owner, result in rows
+        ]
+
+    def ack(self, items: List[WorkItem]):
+        def mark(conn, now):
+            # 结果合并后即可丢弃，只保留工作项本身用于批次内去重
+            conn.executemany(
+                'UPDATE work_items SET merged = 1, result = NULL WHERE item_id = ?',
+                [(item.item_id,) for item in items],
+            )
+
+        self._transaction(mark)
+
+    def stats(self, run_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT state, COUNT(*), SUM(state = ? AND merged = 0) FROM work_items WHERE run_id = ? GROUP BY state',
+                (ITEM_DONE, run_id),
+            ).fetchall()
+        stats = dict.fromkeys(ITEM_STATES, 0)
+        stats['unmerged'] = 0
+        for state, count, unmerged in rows:
+            stats[state] = count
+            stats['unmerged'] += unmerged or 0
+        return stats
+
+    def purge(self, run_id: str):
+        self._transaction(lambda conn, now: conn.execute('DELETE FROM work_items WHERE run_id = ?', (run_id,)))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisWorkQueue(WorkQueue):
+    """工作项保存在兼容 Redis 协议的服务中
+
+    每个工作项一个 hash；待领取的在 ready 有序集合（按入队序号），已领取的在 leases 有序集合
+    （按租约到期时间），已完成未确认的在 results 列表。状态变更都在 WATCH/MULTI 事务中进行，
+    不依赖 Lua 脚本，fakeredis 等本地替身同样可用；租约时间以服务端 TIME 为准，各机器无需对时。
+    client 为 redis-py 兼容的客户端，须以 decode_responses=True 创建。
+    """
+
+    def __init__(self, client, prefix: str = 'xhs:work', max_deliveries: int = MAX_DELIVERIES):
+        super().__init__(max_deliveries)
+        # WatchError 随客户端库导入，本模块不强制依赖 redis
+        from redis.exceptions import WatchError
+
+        self._watch_error = WatchError
+        self.client = client
+        self.prefix = prefix
+        self._ready = f'{prefix}:ready'
+        self._leases = f'{prefix}:leases'
+        self._results = f'{prefix}:results'
+        self._seq = f'{prefix}:seq'
+
+    def _item_key(self, item_id: str) -> str:
+        return f'{self.prefix}:item:{item_id}'
+
+    def _run_key(self, run_id: str) -> str:
+        return f'{self.prefix}:run:{run_id}'
+
+    def _stats_key(self, run_id: str) -> str:
+        return f'{self.prefix}:stats:{run_id}'
+
+    def _now(self) -> float:
+        seconds, microseconds = self.client.time()
+        return seconds + microseconds / 1e6
+
+    def _transaction(self, func, *watch_keys):
+        """乐观事务：func(pipe) 在 WATCH 之后读取并决定写入，被其他客户端抢先修改时重试"""
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(*watch_keys)
+                    return func(pipe)
+                except self._watch_error:
+                    continue
+
+    def _move_state(self, pipe, run_id: str, old: str, new: str):
+        pipe.hincrby(self._stats_key(run_id), old, -1)
+        pipe.hincrby(self._stats_key(run_id), new, 1)
+
+    def put(self, run_id: str, kind: str, key: str, payload: Dict) -> bool:
+        iid = item_id(run_id, kind, key)
+        item_key = self._item_key(iid)
+        seq = self.client.incr(self._seq)
+
+        def insert(pipe):
+            if pipe.exists(item_key):
+                return False
+            pipe.multi()
+            pipe.hset(item_key, mapping={
+                'run_id': run_id, 'kind': kind, 'key': key, 'payload': json.dumps(payload, ensure_ascii=False),
+                'state': ITEM_QUEUED, 'deliveries': 0, 'owner': '', 'seq': seq, 'error': '',
+            })
+            pipe.sadd(self._run_key(run_id), iid)
+            pipe.hincrby(self._stats_key(run_id), ITEM_QUEUED, 1)
+            pipe.zadd(self._ready, {iid: seq})
+            pipe.execute()
+            return True
+
+        return self._transaction(insert, item_key)
+
+    def _requeue_expired(self):
+        now = self._now()
+        for iid in self.client.zrangebyscore(self._leases, 0, now):
+            item_key = self._item_key(iid)
+
+            def requeue(pipe):
+                data = pipe.hgetall(item_key)
+                if data.get('state') != ITEM_LEASED or float(data.get('lease_until', 0)) >= now:
+                    # 已完成、已续租或已被其他客户端重新排队
+                    return
+                failed = int(data['deliveries']) >= self.max_deliveries
+                pipe.multi()
+                pipe.zrem(self._leases, iid)
+                pipe.hset(item_key, mapping={
+                    'state': ITEM_FAILED if failed else ITEM_QUEUED, 'owner': '', 'error': 'lease expired',
+                })
+                self._move_state(pipe, data['run_id'], ITEM_LEASED, ITEM_FAILED if failed else ITEM_QUEUED)
+                if not failed:
+                    pipe.zadd(self._ready, {iid: int(data['seq'])})
+                pipe.execute()
+
+            self._transaction(requeue, item_key)
+
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[WorkItem]:
+        self._requeue_expired()
+
+        def take(pipe):
+            ids = pipe.zrange(self._ready, 0, 0)
+            if not ids:
+                return None
+            iid = ids[0]
+            data = pipe.hgetall(self._item_key(iid))
+            deliveries = int(data['deliveries']) + 1
+            lease_until = self._now() + lease_seconds
+            pipe.multi()
+            pipe.zrem(self._ready, iid)
+            pipe.zadd(self._leases, {iid: lease_until})
+            pipe.hset(self._item_key(iid), mapping={
+                'state': ITEM_LEASED, 'owner': worker_id, 'deliveries': deliveries, 'lease_until': lease_until,
+            })
+            self._move_state(pipe, data['run_id'], ITEM_QUEUED, ITEM_LEASED)
+            pipe.execute()
+            return WorkItem(data['run_id'], data['kind'], data['key'], json.loads(data['payload']), deliveries, worker_id)
+
+        # 同时 WATCH ready：两个工作者抢到同一项时后提交的重试
+        return self._transaction(take, self._ready)
+
+    def _held(self, data: Dict, item: WorkItem, now: float) -> bool:
+        """工作项仍由 item 的领取者持有且租约未到期；续租、提交、放弃都以此为准"""
+        return (
+            data.get('state') == ITEM_LEASED
+            and data.get('owner') == item.owner
+            and int(data.get('deliveries', 0)) == item.deliveries
+            and float(data.get('lease_until', 0)) >= now
+        )
+
+    def heartbeat(self, item: WorkItem, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        item_key = self._item_key(item.item_id)
+
+        def renew(pipe):
+            data = pipe.hgetall(item_key)
+            now = self._now()
+            if not self._held(data, item, now):
+                return False
+            pipe.multi()
+            pipe.hset(item_key, 'lease_until', now + lease_seconds)
+            pipe.zadd(self._leases, {item.item_id: now + lease_seconds})
+            pipe.execute()
+            return True
+
+        return self._transaction(renew, item_key)
+
+    def complete(self, item: WorkItem, result: Dict) -> bool:
+        item_key = self._item_key(item.item_id)
+
+        def finish(pipe):
+            if not self._held(pipe.hgetall(item_key), item, self._now()):
+                return False
+            pipe.multi()
+            pipe.hset(item_key, mapping={'state': ITEM_DONE, 'result': json.dumps(result, ensure_ascii=False)})
+            pipe.zrem(self._leases, item.item_id)
+            pipe.rpush(self._results, item.item_id)
+            self._move_state(pipe, item.run_id, ITEM_LEASED, ITEM_DONE)
+            pipe.hincrby(self._stats_key(item.run_id), 'unmerged', 1)
+            pipe.execute()
+            return True
+
+        return self._transaction(finish, item_key)
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        item_key = self._item_key(item.item_id)
+
+        def give_back(pipe):
+            data = pipe.hgetall(item_key)
+            if not self._held(data, item, self._now()):
+                return False
+            failed = item.deliveries >= self.max_deliveries
+            pipe.multi()
+            pipe.zrem(self._leases, item.item_id)
+            pipe.hset(item_key, mapping={'state': ITEM_FAILED if failed else ITEM_QUEUED, 'owner': '', 'error': error})
+            self._move_state(pipe, item.run_id, ITEM_LEASED, ITEM_FAILED if failed else ITEM_QUEUED)
+            if not failed:
+                pipe.zadd(self._ready, {item.item_id: int(data['seq'])})
+            pipe.execute()
+            return True
+
+        return self._transaction(give_back, item_key)
+
+    def results(self, limit: int = 100) -> List[Tuple[WorkItem, Dict]]:
+        ids = self.client.lrange(self._results, 0, limit - 1)
+        pipe = self.client.pipeline(transaction=False)
+        for iid in ids:
+            pipe.hgetall(self._item_key(iid))
+        results = []
+        for data in pipe.execute():
+            if not data or 'result' not in data:
+                continue  # 批次已删除
+            item = WorkItem(
+                data['run_id'], data['kind'], data['key'], json.loads(data['payload']),
+                int(data['deliveries']), data['owner'],
+            )
+            results.append((item, json.loads(data['result'])))
+        return results
+
+    def ack(self, items: List[WorkItem]):
+        pipe = self.client.pipeline(transaction=False)
+        for item in items:
+            pipe.lrem(self._results, 1, item.item_id)
+            pipe.hdel(self._item_key(item.item_id), 'result')
+            pipe.hincrby(self._stats_key(item.run_id), 'unmerged', -1)
+        pipe.execute()
+
+    def stats(self, run_id: str) -> Dict[str, int]:
+        saved = self.client.hgetall(self._stats_key(run_id))
+        stats = {state: int(saved.get(state, 0)) for state in ITEM_STATES}
+        stats['unmerged'] = int(saved.get('unmerged', 0))
+        return stats
+
+    def purge(self, run_id: str):
+        ids = self.client.smembers(self._run_key(run_id))
+        pipe = self.client.pipeline(transaction=False)
+        for iid in ids:
+            pipe.delete(self._item_key(iid))
+            pipe.zrem(self._ready, iid)
+            pipe.zrem(self._leases, iid)
+            pipe.lrem(self._results, 0, iid)
+        pipe.delete(self._run_key(run_id), self._stats_key(run_id))
+        pipe.execute()
+
+    def close(self):
+        self.client.close()
+
+
+def open_work_queue(url: str, max_deliveries: int = MAX_DELIVERIES) -> WorkQueue:
+    """按地址创建队列：sqlite:///路径.db，或 redis://host:port/db（需安装 redis 包）"""
+    if url.startswith('sqlite:///'):
+        # sqlite:///data/queue.db 为相对路径，sqlite:////srv/queue.db 为绝对路径
+        return SQLiteWorkQueue(url[len('sqlite:///'):], max_deliveries)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("Redis 工作队列需要安装 redis 包: pip install redis") from e
+        return RedisWorkQueue(redis.Redis.from_url(url, decode_responses=True), max_deliveries=max_deliveries)
+    raise ValueError(f"不支持的工作队列地址: {url}")
@@ -26,3 +26,18 @@ ENABLE_GET_MEIDAS = False
 SAVE_LOGIN_STATE = True
 USER_DATA_DIR = "%s_user_data_dir"
 PLATFORM = "xhs"
+SIGN_TIMEOUT_SEC = 5.0  # 单次 window.mnsv2 签名超时（秒）
+SIGN_SERVER_ADDRESS = ""  # 共享签名服务地址，如 unix:///tmp/xhs_sign.sock 或 tcp://127.0.0.1:8765；为空时各进程自带浏览器签名
+CRAWL_WORKER_PROCESSES = 1  # 爬取工作进程数，大于 1 时 /api/crawl 把关键词分给多个进程并行爬取（需配置共享签名服务）
+WORK_QUEUE_URL = ""  # 多机分布式爬取的共享工作队列，如 redis://host:6379/0 或 sqlite:///data/work_queue.db；为空时不启用
+EXTRACTOR_POOL = "process"  # 页面解析（正则 + json.loads + decamelize）放到 process/thread 池执行，inline 则在事件循环内直接解析
+EXTRACTOR_POOL_WORKERS = 2
+EXTRACTOR_INLINE_MAX_CHARS = 64 * 1024  # 小于该长度的页面直接在事件循环内解析，省去跨进程传输开销
+SEARCH_NOTES_WITHOUT_DETAIL = False  # 为 True 时 search_notes_by_keyword 直接用搜索结果（标题、xsec_token）构建笔记，不再逐条请求笔记详情，desc 为空，需要正文时再按需获取；CrawlRunner 与分布式工作者总是使用该方式
+KEYWORD_CONCURRENCY = 3  # 同时搜索的关键词数，各关键词按轮转方式公平分享搜索请求
+SEARCH_REQUEST_INTERVAL = 1.0  # 所有关键词合计的搜索请求最小间隔（秒）
+SUB_COMMENT_CONCURRENCY = 3  # 同一帖子同时展开子评论的一级评论数
+SUB_COMMENT_PAGE_SIZE = 10  # 每次子评论请求的条数（num），调大可减少翻页请求
+REQUEST_LANE_LIMITS = {"search": 2, "detail": 3, "comments": 3, "profile": 1}  # 各类请求同时进行数的上限，运行中按 AIMD 在 1 与上限之间自动调整
+MAX_INFLIGHT_REQUESTS = 6  # 所有类请求合计同时进行数的上限
+REQUEST_TARGET_LATENCY = 3.0  # 某类请求平均耗时超过该值（秒）时降低该类并发
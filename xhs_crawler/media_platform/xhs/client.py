@@ -20,7 +20,8 @@
 import asyncio
 import json
 import os
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+from contextlib import aclosing, nullcontext
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
 import httpx
@@ -57,15 +58,26 @@ except ImportError:
         CRAWLER_MAX_NOTES_COUNT = 100
     ENABLE_GET_SUB_COMMENTS = False
     CRAWLER_MAX_NOTES_COUNT = 100
+    SIGN_TIMEOUT_SEC = 5.0
+    EXTRACTOR_POOL = "process"
+    EXTRACTOR_POOL_WORKERS = 2
+    EXTRACTOR_INLINE_MAX_CHARS = 64 * 1024
+    SIGN_SERVER_ADDRESS = ""
+    SUB_COMMENT_CONCURRENCY = 3
+    SUB_COMMENT_PAGE_SIZE = 10
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
 from .exception import CaptchaRequiredError, DataFetchError, IPBlockError, NoteNotFoundError
+from .governor import ConcurrencyGovernor
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id
 from .extractor import XiaoHongShuExtractor
-from .playwright_sign import sign_with_playwright
+from .pagination import PagePrefetcher, cursor_of
+from .playwright_sign import PlaywrightSigner
+from .sign_server import RemoteSigner
+from .watermark import NoteCommentState, Watermark
 
 
 class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefreshMixin
@@ -76,9 +88,11 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         proxy=None,
         *,
         headers: Dict[str, str],
-        playwright_page: Page,
+        playwright_page: Optional[Page] = None,
         cookie_dict: Dict[str, str],
         proxy_ip_pool: Optional["ProxyIpPool"] = None,
+        signer: Optional[Union[PlaywrightSigner, RemoteSigner]] = None,
+        governor: Optional[ConcurrencyGovernor] = None,
     ):
         self.proxy = proxy
         self.timeout = timeout
@@ -90,12 +104,30 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         self.NOTE_NOT_FOUND_CODE = -510000
         self.NOTE_ABNORMAL_STR = "Note status abnormal, please check later"
         self.NOTE_ABNORMAL_CODE = -510001
-        self.playwright_page = playwright_page
+        # Either sign on our own page, or through a shared sign server (RemoteSigner) without a browser
+        if signer is None and playwright_page is None:
+            raise ValueError("XiaoHongShuClient needs a playwright_page to sign on or a signer")
+        self.signer = signer or PlaywrightSigner(playwright_page, timeout=SIGN_TIMEOUT_SEC)
         self.cookie_dict = cookie_dict
-        self._extractor = XiaoHongShuExtractor()
+        # Shared limit on concurrent requests per lane (search/detail/comments/profile); None for no limit
+        self.governor = governor
+        self._extractor = XiaoHongShuExtractor(
+            pool=EXTRACTOR_POOL,
+            pool_workers=EXTRACTOR_POOL_WORKERS,
+            inline_max_chars=EXTRACTOR_INLINE_MAX_CHARS,
+        )
         # Initialize proxy pool (from ProxyRefreshMixin) - 简化版本不需要
         # self.init_proxy_pool(proxy_ip_pool)
 
+    def _slot(self, lane: str):
+        """Governor slot for one request of the lane, a no-op without governor"""
+        return self.governor.slot(lane) if self.governor else nullcontext()
+
+    @property
+    def playwright_page(self) -> Optional[Page]:
+        """Signing page, may be re-created by the signer after a crash; None with a remote signer"""
+        return self.signer.page
+
     async def _pre_headers(self, url: str, params: Optional[Dict] = None, payload: Optional[Dict] = None) -> Dict:
         """Request header parameter signing (using playwright injection method)
 
@@ -105,7 +137,11 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             payload: POST request parameters
 
         Returns:
-            Dict: Signed request header parameters
+            Dict: Signed request headers, a per-request copy so concurrent requests and
+            their retries never share another request's signature
+
+        Raises:
+            SignError: Signing failed or timed out, the request is not sent unsigned
         """
         a1_value = self.cookie_dict.get("a1", "")
 
@@ -120,8 +156,7 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             raise ValueError("params or payload is required")
 
         # Generate signature using playwright injection method
-        signs = await sign_with_playwright(
-            page=self.playwright_page,
+        signs = await self.signer.sign(
             uri=url,
             data=data,
             a1=a1_value,
@@ -134,8 +169,7 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             "x-S-Common": signs.get("x-s-common", ""),
             "X-B3-Traceid": signs.get("x-b3-traceid", ""),
         }
-        self.headers.update(headers)
-        return self.headers
+        return {**self.headers, **headers}
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), retry=retry_if_not_exception_type((NoteNotFoundError, CaptchaRequiredError)))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -291,6 +325,18 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
 
+    async def update_cookies_from_signer(self):
+        """
+        Update cookies from the shared sign server's browser, used instead of update_cookies
+        when this client has no browser of its own
+
+        Returns:
+
+        """
+        cookie_str, cookie_dict = utils.convert_cookies(await self.signer.get_cookies())
+        self.headers["Cookie"] = cookie_str
+        self.cookie_dict = cookie_dict
+
     async def get_note_by_keyword(
         self,
         keyword: str,
@@ -321,7 +367,8 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             "sort": sort.value,
             "note_type": note_type.value,
         }
-        return await self.post(uri, data)
+        async with self._slot("search"):
+            return await self.post(uri, data)
 
     async def get_note_by_id(
         self,
@@ -350,7 +397,8 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             "xsec_token": xsec_token,
         }
         uri = "/api/sns/web/v1/feed"
-        res = await self.post(uri, data)
+        async with self._slot("detail"):
+            res = await self.post(uri, data)
         if not res or not isinstance(res, dict):
             utils.logger.warning(f"[XiaoHongShuClient.get_note_by_id] note id:{note_id} empty or non-dict response type={type(res).__name__}")
             return dict()
@@ -394,7 +442,8 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             "image_formats": "jpg,webp,avif",
             "xsec_token": xsec_token,
         }
-        return await self.get(uri, params)
+        async with self._slot("comments"):
+            return await self.get(uri, params)
 
     async def get_note_sub_comments(
         self,
@@ -426,7 +475,157 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             "top_comment_id": "",
             "xsec_token": xsec_token,
         }
-        return await self.get(uri, params)
+        async with self._slot("comments"):
+            return await self.get(uri, params)
+
+    async def iter_note_comments(
+        self,
+        note_id: str,
+        xsec_token: str,
+        crawl_interval: float = 1.0,
+        max_count: Optional[int] = None,
+        since: Optional[Watermark] = None,
+        state: Optional[NoteCommentState] = None,
+        cursor: Optional[str] = None,
+        on_page: Optional[Callable[[str], None]] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield the first-level comments of a note page by page, as each page arrives
+        The next page is prefetched while the consumer handles the current one. Close the
+        generator when stopping early (e.g. contextlib.aclosing) so the prefetch is cancelled.
+        Args:
+            note_id: Note ID
+            xsec_token: Verification token
+            crawl_interval: Delay between two pages (seconds)
+            max_count: Stop after this many comments (the last page is truncated), None for all
+            since: Only yield comments newer than this watermark and stop at the first page
+                without any (incremental crawling)
+            state: Comment state of a previous run, updated with the cursor of the last page
+                fetched. A full crawl continues at state.cursor only if the previous run stopped
+                early; a complete thread that grew has its new comments on the newest pages, so
+                pass the note's comment watermark as since to page down to it instead. A full
+                crawl marks the thread complete when it reaches the end, a crawl with since
+                keeps a complete thread complete only if it reaches the watermark (or the end).
+                Closing the generator before the end marks the thread incomplete.
+            cursor: Cursor of the first page (e.g. from a checkpoint), overrides the above
+            on_page: Called with the cursor of each page before its comments are yielded
+
+        Returns:
+            Async iterator of comment lists, empty pages are skipped
+        """
+        count = 0
+        if cursor is None:
+            cursor = state.cursor if state and not since and not state.complete else ""
+        # Incremental crawls reaching the watermark (or the end) keep a complete thread complete
+        caught_up = False
+
+        def next_comments_cursor(comments_res: Optional[Dict], cursor: str) -> Optional[str]:
+            # Don't prefetch a page that would only be truncated away
+            if (
+                max_count is not None
+                and comments_res
+                and count + len(comments_res.get("comments") or []) >= max_count
+            ):
+                return None
+            if since and comments_res and not since.any_new(comments_res.get("comments") or []):
+                return None
+            return cursor_of(comments_res)
+
+        try:
+            async with PagePrefetcher(
+                lambda cursor: self.get_note_comments(note_id=note_id, xsec_token=xsec_token, cursor=cursor),
+                first_cursor=cursor,
+                next_cursor=next_comments_cursor,
+                crawl_interval=crawl_interval,
+            ) as pages:
+                async for comments_res in pages:
+                    if not comments_res or "comments" not in comments_res:
+                        utils.logger.info(
+                            f"[XiaoHongShuClient.iter_note_comments] No 'comments' key found in response: {comments_res}"
+                        )
+                        if state:
+                            state.complete = False
+                        return
+                    comments = comments_res["comments"]
+                    # A thread truncated within its last page is not complete yet
+                    ended = not comments_res.get("has_more") and (
+                        max_count is None or count + len(comments) <= max_count
+                    )
+                    if state:
+                        state.cursor = pages.cursor
+                        if not since:
+                            state.complete = ended
+                    if since:
+                        comments = [comment for comment in comments if since.is_new(comment)]
+                        if not comments:
+                            caught_up = True
+                            return
+                    if max_count is not None and count + len(comments) > max_count:
+                        comments = comments[: max_count - count]
+                    count += len(comments)
+                    if comments:
+                        if on_page:
+                            on_page(pages.cursor)
+                        try:
+                            yield comments
+                        except GeneratorExit:
+                            # The consumer stopped within this page
+                            if state:
+                                state.complete = False
+                            raise
+                    caught_up = ended
+                    if max_count is not None and count >= max_count:
+                        return
+        finally:
+            if state and since and not caught_up:
+                state.complete = False
+
+    async def iter_sub_comments(
+        self,
+        note_id: str,
+        root_comment: Dict,
+        xsec_token: str,
+        crawl_interval: float = 1.0,
+        num: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield the sub-comments of one first-level comment page by page, starting after the
+        preview already embedded in root_comment["sub_comments"]
+        Args:
+            note_id: Note ID
+            root_comment: First-level comment (raw API dict) with sub_comment_cursor
+            xsec_token: Verification token
+            crawl_interval: Delay between two pages (seconds)
+            num: Sub-comments per request, defaults to SUB_COMMENT_PAGE_SIZE
+
+        Returns:
+            Async iterator of sub-comment lists
+        """
+        root_comment_id = root_comment.get("id")
+        async with PagePrefetcher(
+            lambda cursor: self.get_note_sub_comments(
+                note_id=note_id,
+                root_comment_id=root_comment_id,
+                xsec_token=xsec_token,
+                num=num or SUB_COMMENT_PAGE_SIZE,
+                cursor=cursor,
+            ),
+            first_cursor=root_comment.get("sub_comment_cursor"),
+            next_cursor=cursor_of,
+            crawl_interval=crawl_interval,
+        ) as pages:
+            async for comments_res in pages:
+                if comments_res is None:
+                    utils.logger.info(
+                        f"[XiaoHongShuClient.iter_sub_comments] No response found for note_id: {note_id}"
+                    )
+                    return
+                if "comments" not in comments_res:
+                    utils.logger.info(
+                        f"[XiaoHongShuClient.iter_sub_comments] No 'comments' key found in response: {comments_res}"
+                    )
+                    return
+                yield comments_res["comments"]
 
     async def get_note_all_comments(
         self,
@@ -435,7 +634,10 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
-    ) -> List[Dict]:
+        record_factory: Optional[Callable[[Dict], Any]] = None,
+        since: Optional[Watermark] = None,
+        state: Optional[NoteCommentState] = None,
+    ) -> List[Any]:
         """
         Get all first-level comments under specified note, this method will continuously find all comment information under a post
         Args:
@@ -444,37 +646,37 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             crawl_interval: Crawl delay per note (seconds)
             callback: Callback after one note crawl ends
             max_count: Maximum number of comments to crawl per note
+            record_factory: Converts each raw comment as soon as its page arrives (e.g.
+                CommentRecord.from_api) so raw API dicts are not kept; None results are dropped
+            since: Only keep comments newer than this watermark and stop at the first page
+                without any (incremental crawling)
+            state: Comment state of a previous run; pagination starts at state.cursor and
+                state is updated with the last page fetched and whether it ended the thread
         Returns:
 
         """
         result = []
-        comments_has_more = True
-        comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_note_comments(
-                note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
-            )
-            comments_has_more = comments_res.get("has_more", False)
-            comments_cursor = comments_res.get("cursor", "")
-            if "comments" not in comments_res:
-                utils.logger.info(
-                    f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}"
+        async with aclosing(
+            self.iter_note_comments(note_id, xsec_token, crawl_interval, max_count, since, state)
+        ) as pages:
+            async for comments in pages:
+                if len(result) + len(comments) > max_count:
+                    comments = comments[: max_count - len(result)]
+                if callback:
+                    await callback(note_id, comments)
+                sub_comments = await self.get_comments_all_sub_comments(
+                    comments=comments,
+                    xsec_token=xsec_token,
+                    crawl_interval=crawl_interval,
+                    callback=callback,
                 )
-                break
-            comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:
-                await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
-            result.extend(comments)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments=comments,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=callback,
-            )
-            result.extend(sub_comments)
+                if record_factory:
+                    comments = [record for record in map(record_factory, comments) if record is not None]
+                    sub_comments = [record for record in map(record_factory, sub_comments) if record is not None]
+                result.extend(comments)
+                result.extend(sub_comments)
+                if len(result) >= max_count:
+                    break
         return result
 
     async def get_comments_all_sub_comments(
@@ -483,17 +685,22 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         xsec_token: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        concurrency: Optional[int] = None,
+        num: Optional[int] = None,
     ) -> List[Dict]:
         """
         Get all second-level comments under specified first-level comments, this method will continuously find all second-level comment information under first-level comments
         Args:
             comments: Comment list
             xsec_token: Verification token
-            crawl_interval: Crawl delay per comment (seconds)
-            callback: Callback after one comment crawl ends
+            crawl_interval: Crawl delay between two pages of one sub-comment thread (seconds)
+            callback: Called with each page of sub-comments as soon as it arrives
+            concurrency: Number of first-level comments whose sub-comments are expanded at the
+                same time, defaults to SUB_COMMENT_CONCURRENCY
+            num: Sub-comments per request, defaults to SUB_COMMENT_PAGE_SIZE
 
         Returns:
-
+            Sub-comments in the order their pages arrived (threads are interleaved)
         """
         if not ENABLE_GET_SUB_COMMENTS:
             utils.logger.info(
@@ -502,64 +709,57 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             return []
 
         result = []
+        threads = []
         for comment in comments:
             try:
-                note_id = comment.get("note_id")
                 sub_comments = comment.get("sub_comments")
                 if sub_comments and callback:
-                    await callback(note_id, sub_comments)
-
-                sub_comment_has_more = comment.get("sub_comment_has_more")
-                if not sub_comment_has_more:
-                    continue
-
-                root_comment_id = comment.get("id")
-                sub_comment_cursor = comment.get("sub_comment_cursor")
-
-                while sub_comment_has_more:
-                    try:
-                        comments_res = await self.get_note_sub_comments(
-                            note_id=note_id,
-                            root_comment_id=root_comment_id,
-                            xsec_token=xsec_token,
-                            num=10,
-                            cursor=sub_comment_cursor,
-                        )
-
-                        if comments_res is None:
-                            utils.logger.info(
-                                f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
-                            )
-                            break
-                        sub_comment_has_more = comments_res.get("has_more", False)
-                        sub_comment_cursor = comments_res.get("cursor", "")
-                        if "comments" not in comments_res:
-                            utils.logger.info(
-                                f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
-                            )
-                            break
-                        comments = comments_res["comments"]
-                        if callback:
-                            await callback(note_id, comments)
-                        await asyncio.sleep(crawl_interval)
-                        result.extend(comments)
-                    except DataFetchError as e:
-                        utils.logger.warning(
-                            f"[XiaoHongShuClient.get_comments_all_sub_comments] Failed to get sub-comments for note_id: {note_id}, root_comment_id: {root_comment_id}, error: {e}. Skipping this comment's sub-comments."
-                        )
-                        break  # Break out of the sub-comment acquisition loop of the current comment and continue processing the next comment
-                    except Exception as e:
-                        utils.logger.error(
-                            f"[XiaoHongShuClient.get_comments_all_sub_comments] Unexpected error when getting sub-comments for note_id: {note_id}, root_comment_id: {root_comment_id}, error: {e}"
-                        )
-                        break
+                    await callback(comment.get("note_id"), sub_comments)
+                if comment.get("sub_comment_has_more"):
+                    threads.append(comment)
             except Exception as e:
                 utils.logger.error(
                     f"[XiaoHongShuClient.get_comments_all_sub_comments] Error processing comment: {comment.get('id', 'unknown')}, error: {e}. Continuing with next comment."
                 )
-                continue  # Continue to next comment
+
+        semaphore = asyncio.Semaphore(max(1, concurrency or SUB_COMMENT_CONCURRENCY))
+
+        async def expand(comment: Dict):
+            async with semaphore:
+                await self._get_sub_comment_thread(
+                    comment, xsec_token, crawl_interval, callback, num or SUB_COMMENT_PAGE_SIZE, result
+                )
+
+        await asyncio.gather(*(expand(comment) for comment in threads))
         return result
 
+    async def _get_sub_comment_thread(
+        self,
+        comment: Dict,
+        xsec_token: str,
+        crawl_interval: float,
+        callback: Optional[Callable],
+        num: int,
+        result: List[Dict],
+    ) -> None:
+        """Follow one first-level comment's sub-comment cursor chain, appending each page to result"""
+        note_id = comment.get("note_id")
+        root_comment_id = comment.get("id")
+        try:
+            async with aclosing(self.iter_sub_comments(note_id, comment, xsec_token, crawl_interval, num)) as pages:
+                async for sub_comments in pages:
+                    if callback:
+                        await callback(note_id, sub_comments)
+                    result.extend(sub_comments)
+        except DataFetchError as e:
+            utils.logger.warning(
+                f"[XiaoHongShuClient.get_comments_all_sub_comments] Failed to get sub-comments for note_id: {note_id}, root_comment_id: {root_comment_id}, error: {e}. Skipping this comment's sub-comments."
+            )
+        except Exception as e:
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_comments_all_sub_comments] Unexpected error when getting sub-comments for note_id: {note_id}, root_comment_id: {root_comment_id}, error: {e}"
+            )
+
     async def get_creator_info(
         self, user_id: str, xsec_token: str = "", xsec_source: str = ""
     ) -> Dict:
@@ -580,10 +780,11 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         if xsec_token and xsec_source:
             uri = f"{uri}?xsec_token={xsec_token}&xsec_source={xsec_source}"
 
-        html_content = await self.request(
-            "GET", self._domain + uri, return_response=True, headers=self.headers
-        )
-        return self._extractor.extract_creator_info_from_html(html_content)
+        async with self._slot("profile"):
+            html_content = await self.request(
+                "GET", self._domain + uri, return_response=True, headers=self.headers
+            )
+        return await self._extractor.extract_creator_info_async(html_content)
 
     async def get_notes_by_creator(
         self,
@@ -613,7 +814,86 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
             "xsec_token": xsec_token,
             "xsec_source": xsec_source,
         }
-        return await self.get(uri, params)
+        async with self._slot("profile"):
+            return await self.get(uri, params)
+
+    async def iter_creator_notes(
+        self,
+        user_id: str,
+        crawl_interval: float = 1.0,
+        xsec_token: str = "",
+        xsec_source: str = "pc_feed",
+        max_count: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield the posts published by a user one by one, fetching the next page in the background
+        Close the generator when stopping early (e.g. contextlib.aclosing) so the prefetch is cancelled.
+        Args:
+            user_id: User ID
+            crawl_interval: Delay between two pages (seconds)
+            xsec_token: Verification token
+            xsec_source: Channel source
+            max_count: Stop after this many posts, defaults to CRAWLER_MAX_NOTES_COUNT
+
+        Returns:
+            Async iterator of note dicts
+        """
+        async with aclosing(
+            self._iter_creator_note_pages(user_id, crawl_interval, xsec_token, xsec_source, max_count)
+        ) as pages:
+            async for notes in pages:
+                for note in notes:
+                    yield note
+
+    async def _iter_creator_note_pages(
+        self,
+        user_id: str,
+        crawl_interval: float,
+        xsec_token: str,
+        xsec_source: str,
+        max_count: Optional[int],
+    ) -> AsyncIterator[List[Dict]]:
+        """user_posted pages of a creator, the last one truncated to max_count"""
+        if max_count is None:
+            max_count = CRAWLER_MAX_NOTES_COUNT
+        count = 0
+
+        def next_notes_cursor(notes_res: Optional[Dict], cursor: str) -> Optional[str]:
+            if notes_res and count + len(notes_res.get("notes") or []) >= max_count:
+                return None
+            return cursor_of(notes_res)
+
+        async with PagePrefetcher(
+            lambda cursor: self.get_notes_by_creator(
+                user_id, cursor, xsec_token=xsec_token, xsec_source=xsec_source
+            ),
+            first_cursor="",
+            next_cursor=next_notes_cursor,
+            crawl_interval=crawl_interval,
+        ) as pages:
+            async for notes_res in pages:
+                if not notes_res:
+                    utils.logger.error(
+                        f"[XiaoHongShuClient.get_notes_by_creator] The current creator may have been banned by xhs, so they cannot access the data."
+                    )
+                    return
+
+                if "notes" not in notes_res:
+                    utils.logger.info(
+                        f"[XiaoHongShuClient.iter_creator_notes] No 'notes' key found in response: {notes_res}"
+                    )
+                    return
+
+                notes = notes_res["notes"]
+                utils.logger.info(
+                    f"[XiaoHongShuClient.iter_creator_notes] got user_id:{user_id} notes len : {len(notes)}"
+                )
+                notes = notes[: max_count - count]
+                count += len(notes)
+                if notes:
+                    yield notes
+                if count >= max_count:
+                    return
 
     async def get_all_notes_by_creator(
         self,
@@ -636,41 +916,13 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
 
         """
         result = []
-        notes_has_more = True
-        notes_cursor = ""
-        while notes_has_more and len(result) < CRAWLER_MAX_NOTES_COUNT:
-            notes_res = await self.get_notes_by_creator(
-                user_id, notes_cursor, xsec_token=xsec_token, xsec_source=xsec_source
-            )
-            if not notes_res:
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_notes_by_creator] The current creator may have been banned by xhs, so they cannot access the data."
-                )
-                break
-
-            notes_has_more = notes_res.get("has_more", False)
-            notes_cursor = notes_res.get("cursor", "")
-            if "notes" not in notes_res:
-                utils.logger.info(
-                    f"[XiaoHongShuClient.get_all_notes_by_creator] No 'notes' key found in response: {notes_res}"
-                )
-                break
-
-            notes = notes_res["notes"]
-            utils.logger.info(
-                f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
-            )
-
-            remaining = CRAWLER_MAX_NOTES_COUNT - len(result)
-            if remaining <= 0:
-                break
-
-            notes_to_add = notes[:remaining]
-            if callback:
-                await callback(notes_to_add)
-
-            result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
+        async with aclosing(
+            self._iter_creator_note_pages(user_id, crawl_interval, xsec_token, xsec_source, None)
+        ) as pages:
+            async for notes in pages:
+                if callback:
+                    await callback(notes)
+                result.extend(notes)
 
         utils.logger.info(
             f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
@@ -720,8 +972,9 @@ class XiaoHongShuClient(AbstractApiClient):  # 简化版本，移除 ProxyRefres
         if not enable_cookie:
             del copy_headers["Cookie"]
 
-        html = await self.request(
-            method="GET", url=url, return_response=True, headers=copy_headers
-        )
+        async with self._slot("detail"):
+            html = await self.request(
+                method="GET", url=url, return_response=True, headers=copy_headers
+            )
 
-        return self._extractor.extract_note_detail_from_html(note_id, html)
+        return await self._extractor.extract_note_detail_async(note_id, html)
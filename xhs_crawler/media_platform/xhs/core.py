@@ -44,6 +44,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 try:
     from xhs_crawler.config_stub import *
+    from xhs_crawler import config_stub as config
 except ImportError:
     # 如果导入失败，创建简单的配置对象
     class Config:
@@ -68,6 +69,15 @@ except ImportError:
         SAVE_LOGIN_STATE = True
         USER_DATA_DIR = "%s_user_data_dir"
         PLATFORM = "xhs"
+        SIGN_TIMEOUT_SEC = 5.0
+        SIGN_SERVER_ADDRESS = ""
+        KEYWORD_CONCURRENCY = 3
+        SEARCH_REQUEST_INTERVAL = 1.0
+        SUB_COMMENT_CONCURRENCY = 3
+        SUB_COMMENT_PAGE_SIZE = 10
+        REQUEST_LANE_LIMITS = {"search": 2, "detail": 3, "comments": 3, "profile": 1}
+        MAX_INFLIGHT_REQUESTS = 6
+        REQUEST_TARGET_LATENCY = 3.0
     config = Config()
 from ...base.base_crawler import AbstractCrawler
 from ...model.m_xiaohongshu import NoteUrlInfo, CreatorUrlInfo
@@ -78,10 +88,16 @@ from ...tools import utils
 # from var import crawler_type_var, source_keyword_var  # 简化版本不需要
 
 from .client import XiaoHongShuClient
-from .exception import DataFetchError, NoteNotFoundError
+from .exception import DataFetchError, NoteNotFoundError, SignError
 from .field import SearchSortType
+from .governor import ConcurrencyGovernor
 from .help import parse_note_info_from_note_url, parse_creator_info_from_url, get_search_id
 from .login import XiaoHongShuLogin
+from .pagination import PagePrefetcher
+from .records import note_comment_count
+from .scheduler import FairScheduler
+from .sign_server import RemoteSigner
+from .watermark import Watermark
 
 
 class XiaoHongShuCrawler(AbstractCrawler):
@@ -90,12 +106,29 @@ class XiaoHongShuCrawler(AbstractCrawler):
     browser_context: BrowserContext
     cdp_manager: Optional[Any]  # CDPBrowserManager - 简化版本不需要
 
-    def __init__(self) -> None:
+    def __init__(self, comment_states: Optional[Any] = None) -> None:
+        """
+        Args:
+            comment_states: Store of per-note comment states and watermarks, e.g. the web app's
+                WatermarkStore (comment_state / update_comment_state, note / update_note, save);
+                when given, notes whose comment count hasn't changed since the last crawl are skipped
+        """
         self.index_url = "https://www.xiaohongshu.com"
         # self.user_agent = utils.get_user_agent()
         self.user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
         self.cdp_manager = None
         self.ip_proxy_pool = None  # Proxy IP pool for automatic proxy refresh
+        self.comment_states = comment_states
+        # Every API request of this crawler (and of the clients it creates) takes a slot of the
+        # governor: per-lane limits for search/detail/comments/profile plus a global cap, tuned by
+        # AIMD. The crawl interval after note detail requests is held in the slot; comment pages are
+        # paced by the crawl_interval of their pagination only.
+        self.governor = ConcurrencyGovernor(
+            limits=config.REQUEST_LANE_LIMITS,
+            global_limit=config.MAX_INFLIGHT_REQUESTS,
+            target_latency=config.REQUEST_TARGET_LATENCY,
+            hold={"detail": config.CRAWLER_MAX_SLEEP_SEC},
+        )
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -104,6 +137,14 @@ class XiaoHongShuCrawler(AbstractCrawler):
             ip_proxy_info: IpInfoModel = await self.ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
+        if config.SIGN_SERVER_ADDRESS:
+            # Sign through the shared sign server, this process doesn't need a browser of its own
+            self.xhs_client = await self.create_remote_signed_xhs_client(config.SIGN_SERVER_ADDRESS, httpx_proxy_format)
+            if not await self.xhs_client.pong():
+                raise DataFetchError("sign server browser is not logged in, please login in the sign server window")
+            await self.crawl_by_type()
+            return
+
         async with async_playwright() as playwright:
             # Choose launch mode based on configuration
             if config.ENABLE_CDP_MODE:
@@ -143,20 +184,24 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 await login_obj.begin()
                 await self.xhs_client.update_cookies(browser_context=self.browser_context)
 
-            # crawler_type_var.set(config.CRAWLER_TYPE)  # 简化版本不需要
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            await self.crawl_by_type()
+
+    async def crawl_by_type(self) -> None:
+        """Run the crawl selected by config.CRAWLER_TYPE"""
+        # crawler_type_var.set(config.CRAWLER_TYPE)  # 简化版本不需要
+        if config.CRAWLER_TYPE == "search":
+            # Search for notes and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_notes()
+        elif config.CRAWLER_TYPE == "creator":
+            # Get creator's information and their notes and comments
+            await self.get_creators_and_notes()
+        else:
+            pass
 
-            utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
+        utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -167,38 +212,75 @@ class XiaoHongShuCrawler(AbstractCrawler):
             max_notes_count = xhs_limit_count
         start_page = config.START_PAGE
         keywords_list = config.KEYWORDS.split(",") if config.KEYWORDS else []
-        for keyword in keywords_list:
-            # source_keyword_var.set(keyword)  # 简化版本不需要
-            utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            search_id = get_search_id()
-            while (page - start_page + 1) * xhs_limit_count <= max_notes_count:
-                if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-
-                try:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] search Xiaohongshu keyword: {keyword}, page: {page}")
+        # Keywords are searched concurrently and take turns on search requests, so one keyword
+        # with deep result pages doesn't hold back the others
+        scheduler = FairScheduler(concurrency=1, interval=config.SEARCH_REQUEST_INTERVAL)
+        semaphore = asyncio.Semaphore(config.KEYWORD_CONCURRENCY)
+
+        async def search_with_limit(keyword: str) -> None:
+            async with semaphore:
+                await self.search_keyword(keyword, scheduler, start_page, max_notes_count)
+
+        await asyncio.gather(*(search_with_limit(keyword) for keyword in keywords_list))
+        utils.logger.info(f"[XiaoHongShuCrawler.search] Search turns per keyword: {scheduler.stats()}")
+        utils.logger.info(f"[XiaoHongShuCrawler.search] Request lanes: {self.governor.stats()}")
+
+    async def search_keyword(
+        self, keyword: str, scheduler: FairScheduler, start_page: int, max_notes_count: int
+    ) -> None:
+        """Search one keyword page by page, each search request waits for the keyword's turn"""
+        xhs_limit_count = 20  # Xiaohongshu limit page fixed value
+        # source_keyword_var.set(keyword)  # 简化版本不需要
+        utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Current search keyword: {keyword}")
+        search_id = get_search_id()
+        sort_type = SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL
+
+        async def fetch_search_page(page: int) -> Dict:
+            async with scheduler.turn(keyword):
+                utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] search Xiaohongshu keyword: {keyword}, page: {page}")
+                return await self.xhs_client.get_note_by_keyword(
+                    keyword=keyword,
+                    search_id=search_id,
+                    page=page,
+                    sort=sort_type,
+                )
+
+        def within_budget(page: int) -> bool:
+            return (page - start_page + 1) * xhs_limit_count <= max_notes_count
+
+        def next_search_page(notes_res: Optional[Dict], page: int) -> Optional[int]:
+            if not notes_res or not notes_res.get("has_more", False):
+                return None
+            # No page beyond the notes budget is requested, prefetched ones included
+            if not within_budget(page + 1):
+                return None
+            return page + 1
+
+        first_page = max(start_page, 1)
+        if not within_budget(first_page):
+            utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Notes budget {max_notes_count} is below one page, skip keyword: {keyword}")
+            return
+        try:
+            # The next result page is signed and fetched while the current one is processed
+            async with PagePrefetcher(
+                fetch_search_page,
+                first_cursor=first_page,
+                next_cursor=next_search_page,
+                crawl_interval=0,  # Spacing between search requests is up to the scheduler
+            ) as pages:
+                async for notes_res in pages:
                     note_ids: List[str] = []
                     xsec_tokens: List[str] = []
-                    notes_res = await self.xhs_client.get_note_by_keyword(
-                        keyword=keyword,
-                        search_id=search_id,
-                        page=page,
-                        sort=(SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL),
-                    )
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
+                    comment_counts: List[Optional[int]] = []
+                    utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Search notes response: {notes_res}")
                     if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
+                        utils.logger.info("[XiaoHongShuCrawler.search_keyword] No more content!")
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
                     task_list = [
                         self.get_note_detail_async_task(
                             note_id=post_item.get("id"),
                             xsec_source=post_item.get("xsec_source"),
                             xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
                         ) for post_item in notes_res.get("items", {}) if post_item.get("model_type") not in ("rec_query", "hot_query")
                     ]
                     note_details = await asyncio.gather(*task_list)
@@ -208,16 +290,14 @@ class XiaoHongShuCrawler(AbstractCrawler):
                             await self.get_notice_media(note_detail)
                             note_ids.append(note_detail.get("note_id"))
                             xsec_tokens.append(note_detail.get("xsec_token"))
-                    page += 1
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Note details: {note_details}")
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
-
-                    # Sleep after each page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-                except DataFetchError:
-                    utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
-                    break
+                            comment_counts.append(note_comment_count(note_detail))
+                    utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Note details: {note_details}")
+                    await self.batch_get_note_comments(note_ids, xsec_tokens, comment_counts)
+        except DataFetchError:
+            utils.logger.error("[XiaoHongShuCrawler.search_keyword] Get note detail error")
+        except SignError as ex:
+            # A search page that can't be signed ends this keyword only, the other keywords go on
+            utils.logger.error(f"[XiaoHongShuCrawler.search_keyword] Sign search page error, keyword: {keyword}, err: {ex}")
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
@@ -262,13 +342,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """Concurrently obtain the specified post list and save the data"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
                 xsec_source=post_item.get("xsec_source"),
                 xsec_token=post_item.get("xsec_token"),
-                semaphore=semaphore,
             ) for post_item in note_list
         ]
 
@@ -291,106 +369,141 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
                 xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
             )
             get_note_detail_task_list.append(crawler_task)
 
         need_get_comment_note_ids = []
         xsec_tokens = []
+        comment_counts = []
         note_details = await asyncio.gather(*get_note_detail_task_list)
         for note_detail in note_details:
             if note_detail:
                 need_get_comment_note_ids.append(note_detail.get("note_id", ""))
                 xsec_tokens.append(note_detail.get("xsec_token", ""))
+                comment_counts.append(note_comment_count(note_detail))
                 await xhs_store.update_xhs_note(note_detail)
                 await self.get_notice_media(note_detail)
-        await self.batch_get_note_comments(need_get_comment_note_ids, xsec_tokens)
+        await self.batch_get_note_comments(need_get_comment_note_ids, xsec_tokens, comment_counts)
 
     async def get_note_detail_async_task(
         self,
         note_id: str,
         xsec_source: str,
         xsec_token: str,
-        semaphore: asyncio.Semaphore,
     ) -> Optional[Dict]:
-        """Get note detail
+        """Get note detail; concurrency and pacing of the requests are up to self.governor
 
         Args:
             note_id:
             xsec_source:
             xsec_token:
-            semaphore:
 
         Returns:
             Dict: note detail
         """
         note_detail = None
         utils.logger.info(f"[get_note_detail_async_task] Begin get note detail, note_id: {note_id}")
-        async with semaphore:
+        try:
             try:
-                try:
-                    note_detail = await self.xhs_client.get_note_by_id(note_id, xsec_source, xsec_token)
-                except RetryError:
-                    pass
+                note_detail = await self.xhs_client.get_note_by_id(note_id, xsec_source, xsec_token)
+            except RetryError:
+                pass
 
+            if not note_detail:
+                note_detail = await self.xhs_client.get_note_by_id_from_html(note_id, xsec_source, xsec_token,
+                                                                             enable_cookie=True)
                 if not note_detail:
-                    note_detail = await self.xhs_client.get_note_by_id_from_html(note_id, xsec_source, xsec_token,
-                                                                                 enable_cookie=True)
-                    if not note_detail:
-                        raise Exception(f"[get_note_detail_async_task] Failed to get note detail, Id: {note_id}")
-
-                note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
+                    raise Exception(f"[get_note_detail_async_task] Failed to get note detail, Id: {note_id}")
+
+            note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
+            return note_detail
+
+        except NoteNotFoundError as ex:
+            utils.logger.warning(f"[XiaoHongShuCrawler.get_note_detail_async_task] Note not found: {note_id}, {ex}")
+            return None
+        except DataFetchError as ex:
+            utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}")
+            return None
+        except SignError as ex:
+            utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Sign note detail error, note_id: {note_id}, err: {ex}")
+            return None
+        except KeyError as ex:
+            utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}")
+            return None
+
+    async def batch_get_note_comments(
+        self, note_list: List[str], xsec_tokens: List[str], comment_counts: Optional[List[Optional[int]]] = None
+    ):
+        """Batch get note comments
 
-                # Sleep after fetching note detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
-
-                return note_detail
-
-            except NoteNotFoundError as ex:
-                utils.logger.warning(f"[XiaoHongShuCrawler.get_note_detail_async_task] Note not found: {note_id}, {ex}")
-                return None
-            except DataFetchError as ex:
-                utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}")
-                return None
-            except KeyError as ex:
-                utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}")
-                return None
-
-    async def batch_get_note_comments(self, note_list: List[str], xsec_tokens: List[str]):
-        """Batch get note comments"""
+        Args:
+            note_list: Note IDs
+            xsec_tokens: xsec_token of each note
+            comment_counts: interact_info.comment_count of each note (None if unknown); with
+                comment_states set, notes whose count hasn't changed are skipped
+        """
         if not config.ENABLE_GET_COMMENTS:
             utils.logger.info(f"[XiaoHongShuCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
         utils.logger.info(f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list: List[Task] = []
         for index, note_id in enumerate(note_list):
             task = asyncio.create_task(
-                self.get_comments(note_id=note_id, xsec_token=xsec_tokens[index], semaphore=semaphore),
+                self.get_comments(
+                    note_id=note_id,
+                    xsec_token=xsec_tokens[index],
+                    comment_count=comment_counts[index] if comment_counts else None,
+                ),
                 name=note_id,
             )
             task_list.append(task)
         await asyncio.gather(*task_list)
+        if self.comment_states is not None:
+            # Comment states of the batch are persisted together, off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.comment_states.save)
 
-    async def get_comments(self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore):
-        """Get note comments with keyword filtering and quantity limitation"""
-        async with semaphore:
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
-            # Use fixed crawling interval
-            crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
-            await self.xhs_client.get_note_all_comments(
+    async def get_comments(self, note_id: str, xsec_token: str, comment_count: Optional[int] = None):
+        """Get note comments with keyword filtering and quantity limitation
+
+        Notes are crawled side by side; concurrency of the comment requests is up to self.governor's
+        comments lane, the pages of one note are CRAWLER_MAX_SLEEP_SEC apart.
+        """
+        state = self.comment_states.comment_state(note_id) if self.comment_states else None
+        if state and state.unchanged(comment_count):
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.get_comments] Comment count of note {note_id} unchanged ({comment_count}), skip"
+            )
+            return
+        utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
+        # Use fixed crawling interval
+        crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+        # A crawl that stopped early continues from its cursor; a complete thread that grew has
+        # the new comments on the newest pages, so page down to the note's comment watermark
+        since = None
+        if state and state.complete:
+            watermark = self.comment_states.note(note_id)
+            since = watermark if watermark.time else None
+        try:
+            comments = await self.xhs_client.get_note_all_comments(
                 note_id=note_id,
                 xsec_token=xsec_token,
                 crawl_interval=crawl_interval,
                 callback=None,  # 简化版本，不使用回调
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                since=since,
+                state=state,
             )
-
-            # Sleep after fetching comments
-            await asyncio.sleep(crawl_interval)
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
+        except SignError as ex:
+            utils.logger.error(f"[XiaoHongShuCrawler.get_comments] Sign comments error, note_id: {note_id}, err: {ex}")
+            return
+        if state:
+            state.comment_count = comment_count
+            self.comment_states.update_comment_state(note_id, state)
+            newest = Watermark()
+            for comment in comments:
+                newest.advance(comment)
+            self.comment_states.update_note(note_id, newest)
 
     async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
         """Create Xiaohongshu client"""
@@ -398,30 +511,48 @@ class XiaoHongShuCrawler(AbstractCrawler):
         cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
         xhs_client_obj = XiaoHongShuClient(
             proxy=httpx_proxy,
-            headers={
-                "accept": "application/json, text/plain, */*",
-                "accept-language": "zh-CN,zh;q=0.9",
-                "cache-control": "no-cache",
-                "content-type": "application/json;charset=UTF-8",
-                "origin": "https://www.xiaohongshu.com",
-                "pragma": "no-cache",
-                "priority": "u=1, i",
-                "referer": "https://www.xiaohongshu.com/",
-                "sec-ch-ua": '"Chromium";v="136", "Google Chrome";v="136", "Not.A/Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "empty",
-                "sec-fetch-mode": "cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
-                "Cookie": cookie_str,
-            },
+            headers=self.build_client_headers(cookie_str),
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
+            governor=self.governor,
         )
         return xhs_client_obj
 
+    async def create_remote_signed_xhs_client(self, sign_server_address: str, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
+        """Create Xiaohongshu client that signs and takes its cookies from the shared sign server"""
+        utils.logger.info(f"[XiaoHongShuCrawler.create_remote_signed_xhs_client] Use sign server {sign_server_address}")
+        signer = RemoteSigner(sign_server_address, timeout=config.SIGN_TIMEOUT_SEC)
+        cookie_str, cookie_dict = utils.convert_cookies(await signer.get_cookies())
+        return XiaoHongShuClient(
+            proxy=httpx_proxy,
+            headers=self.build_client_headers(cookie_str),
+            cookie_dict=cookie_dict,
+            signer=signer,
+            governor=self.governor,
+        )
+
+    def build_client_headers(self, cookie_str: str, user_agent: Optional[str] = None) -> Dict[str, str]:
+        """Default API request headers"""
+        return {
+            "accept": "application/json, text/plain, */*",
+            "accept-language": "zh-CN,zh;q=0.9",
+            "cache-control": "no-cache",
+            "content-type": "application/json;charset=UTF-8",
+            "origin": "https://www.xiaohongshu.com",
+            "pragma": "no-cache",
+            "priority": "u=1, i",
+            "referer": "https://www.xiaohongshu.com/",
+            "sec-ch-ua": '"Chromium";v="136", "Google Chrome";v="136", "Not.A/Brand";v="99"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+            "sec-fetch-dest": "empty",
+            "sec-fetch-mode": "cors",
+            "sec-fetch-site": "same-site",
+            "user-agent": user_agent or "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
+            "Cookie": cookie_str,
+        }
+
     async def launch_browser(
         self,
         chromium: BrowserType,
@@ -471,8 +602,10 @@ class XiaoHongShuCrawler(AbstractCrawler):
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif hasattr(self, "browser_context"):
             await self.browser_context.close()
+        if hasattr(self, "xhs_client") and isinstance(self.xhs_client.signer, RemoteSigner):
+            await self.xhs_client.signer.close()
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
     async def get_notice_media(self, note_detail: Dict):
@@ -33,3 +33,11 @@ class NoteNotFoundError(RequestError):
 
 class CaptchaRequiredError(RequestError):
     """Server returned 461/471, verification/captcha required"""
+
+
+class SignError(RequestError):
+    """window.mnsv2 signing failed, the signing page is unusable"""
+
+
+class SignTimeoutError(SignError):
+    """window.mnsv2 signing did not finish within the per-call timeout"""
@@ -16,27 +16,203 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
+import asyncio
+import atexit
 import json
+import multiprocessing
 import re
-from typing import Dict, Optional
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from ...tools import utils
 
 try:
     import humps
 except ImportError:
-    # 如果没有 humps，使用简单的转换函数
-    def decamelize(data):
-        """简单的下划线转换函数"""
-        if isinstance(data, dict):
-            return {k.replace(' ', '_').lower(): decamelize(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [decamelize(item) for item in data]
-        return data
-    humps = type('obj', (object,), {'decamelize': decamelize})()
+    humps = None
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+@lru_cache(maxsize=4096)
+def decamelize_key(key: str) -> str:
+    """camelCase -> snake_case for one key, cached across pages (keys repeat on every page)"""
+    if humps is not None:
+        return humps.decamelize(key)
+    # 没有 humps 时的等价转换：noteId -> note_id, imageURLList -> image_url_list
+    return _CAMEL_BOUNDARY.sub("_", key).lower()
+
+
+def decamelize(data: Any) -> Any:
+    """Recursively decamelize the keys of a JSON subtree, values are left untouched"""
+    if isinstance(data, dict):
+        return {decamelize_key(k): decamelize(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [decamelize(item) for item in data]
+    return data
+
+
+INITIAL_STATE_MARKER = "window.__INITIAL_STATE__="
+_JSON_WHITESPACE = " \t\r\n"
+
+
+def find_initial_state(html: str, undefined_replacement: str = "null") -> Optional[str]:
+    """Locate the window.__INITIAL_STATE__ object in a page and make it valid JSON
+
+    The start is found with str.find. The object ends at the first </script> after it:
+    the browser itself closes the script there, so the serialized state can never
+    contain that sequence inside a string. Only bare ``undefined`` tokens outside
+    JSON strings are replaced, text that merely contains the word is left intact.
+
+    Args:
+        html: HTML string
+        undefined_replacement: JSON literal substituted for bare undefined
+
+    Returns:
+        JSON text of the state, None when the page has no initial state
+    """
+    start = html.find(INITIAL_STATE_MARKER)
+    if start < 0:
+        return None
+    start += len(INITIAL_STATE_MARKER)
+    end = html.find("</script>", start)
+    if end < 0:
+        return None
+    state = html[start:end].strip().rstrip(";").rstrip()
+    if not state.startswith("{") or not state.endswith("}"):
+        return None
+    return _replace_bare_undefined(state, undefined_replacement)
+
+
+def _replace_bare_undefined(state: str, replacement: str) -> str:
+    """Replace undefined in value position (after : , or [) unless it sits inside a JSON string"""
+    positions = []
+    size = len(state)
+    pos = state.find("undefined")
+    while pos >= 0:
+        after = pos + len("undefined")
+        # Pretty-printed states put whitespace around values
+        before = pos - 1
+        while before >= 0 and state[before] in _JSON_WHITESPACE:
+            before -= 1
+        following = after
+        while following < size and state[following] in _JSON_WHITESPACE:
+            following += 1
+        if before >= 0 and state[before] in ":,[" and following < size and state[following] in ",}]":
+            positions.append(pos)
+        pos = state.find("undefined", after)
+    if not positions:
+        return state
+
+    # A candidate is outside strings when an even number of unescaped quotes precede it.
+    # Without escaped backslashes every \" is an escaped quote; otherwise escape sequences
+    # are blanked out with same-length filler first so positions still line up
+    counted = state
+    escaped_quote = '\\"'
+    if "\\\\" in state:
+        counted = state.replace("\\\\", "  ").replace('\\"', "  ")
+        escaped_quote = None
+    parts = []
+    last = 0
+    scanned = 0
+    quotes = 0
+    for pos in positions:
+        quotes += counted.count('"', scanned, pos)
+        if escaped_quote:
+            quotes -= counted.count(escaped_quote, scanned, pos)
+        scanned = pos
+        if quotes % 2:
+            continue
+        parts.append(state[last:pos])
+        parts.append(replacement)
+        last = pos + len("undefined")
+    if not parts:
+        return state
+    parts.append(state[last:])
+    return "".join(parts)
+
+
+POOL_PROCESS = "process"
+POOL_THREAD = "thread"
+POOL_INLINE = "inline"
+
+_executors: Dict[str, Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(kind: str, workers: int) -> Optional[Executor]:
+    """Shared, lazily created parsing pool of the given kind (None for inline parsing)
+
+    One pool per kind per process: every client of a crawler process shares it, so
+    the number of parser processes does not grow with the number of clients.
+    """
+    if kind not in (POOL_PROCESS, POOL_THREAD):
+        return None
+    with _executors_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            if kind == POOL_PROCESS:
+                # spawn: forking a process that runs an event loop, Playwright and Flask threads is unsafe,
+                # and it is what Windows does anyway
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="xhs-extractor")
+            _executors[kind] = executor
+        return executor
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down the parsing pools; they are recreated on next use"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown_executors, False)
 
 
 class XiaoHongShuExtractor:
-    def __init__(self):
-        pass
+    def __init__(self, pool: str = POOL_INLINE, pool_workers: int = 2, inline_max_chars: int = 64 * 1024):
+        """
+        Args:
+            pool: Where the *_async methods parse pages: "process", "thread" or "inline"
+            pool_workers: Size of the shared pool
+            inline_max_chars: Pages shorter than this are parsed inline, shipping them
+                to a worker would cost more than parsing them
+        """
+        self.pool = pool
+        self.pool_workers = pool_workers
+        self.inline_max_chars = inline_max_chars
+
+    async def _run(self, func: Callable, html: str, *args) -> Any:
+        """Run func(*args, html) in the parsing pool, inline for small pages or without a pool"""
+        executor = None
+        if len(html) >= self.inline_max_chars:
+            executor = get_executor(self.pool, self.pool_workers)
+        if executor is None:
+            return func(*args, html)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args, html)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed by the OS); drop the pool so the next page gets a fresh one
+            utils.logger.warning(f"[XiaoHongShuExtractor._run] Parsing pool broken, parsing inline: {e}")
+            with _executors_lock:
+                if _executors.get(self.pool) is executor:
+                    del _executors[self.pool]
+            return func(*args, html)
+
+    async def extract_note_detail_async(self, note_id: str, html: str) -> Optional[Dict]:
+        """extract_note_detail_from_html, off the event loop for large pages"""
+        return await self._run(_extract_note_detail, html, note_id)
+
+    async def extract_creator_info_async(self, html: str) -> Optional[Dict]:
+        """extract_creator_info_from_html, off the event loop for large pages"""
+        return await self._run(_extract_creator_info, html)
 
     def extract_note_detail_from_html(self, note_id: str, html: str) -> Optional[Dict]:
         """Extract note details from HTML
@@ -51,13 +227,16 @@ class XiaoHongShuExtractor:
             # Either a CAPTCHA appeared or the note doesn't exist
             return None
 
-        state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-            0
-        ].replace("undefined", '""')
-        if state != "{}":
-            note_dict = humps.decamelize(json.loads(state))
-            return note_dict["note"]["note_detail_map"][note_id]["note"]
-        return None
+        state = find_initial_state(html, undefined_replacement='""')
+        if not state or state == "{}":
+            return None
+        # Only the requested note is decamelized, the rest of the page state is discarded
+        note_state = json.loads(state).get("note") or {}
+        note_detail = (note_state.get("noteDetailMap") or {}).get(note_id) or {}
+        note = note_detail.get("note")
+        if not note:
+            return None
+        return decamelize(note)
 
     def extract_creator_info_from_html(self, html: str) -> Optional[Dict]:
         """Extract user information from HTML
@@ -68,12 +247,22 @@ class XiaoHongShuExtractor:
         Returns:
             Dict: User information dictionary
         """
-        match = re.search(
-            r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html, re.M
-        )
-        if match is None:
+        state = find_initial_state(html, undefined_replacement="null")
+        if state is None:
             return None
-        info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
+        info = json.loads(state, strict=False)
         if info is None:
             return None
         return info.get("user").get("userPageData")
+
+
+# Module-level entry points so the process pool can pickle them by reference
+_default_extractor = XiaoHongShuExtractor()
+
+
+def _extract_note_detail(note_id: str, html: str) -> Optional[Dict]:
+    return _default_extractor.extract_note_detail_from_html(note_id, html)
+
+
+def _extract_creator_info(html: str) -> Optional[Dict]:
+    return _default_extractor.extract_creator_info_from_html(html)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# One concurrency limit for all API requests of a crawler, split into lanes and tuned by AIMD
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from .exception import CaptchaRequiredError, IPBlockError
+
+# Exceptions meaning the server wants us to slow down
+THROTTLE_ERRORS = (IPBlockError, CaptchaRequiredError, httpx.TimeoutException)
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Whether an error is a throttle signal, also when wrapped by tenacity's RetryError"""
+    last_attempt = getattr(error, "last_attempt", None)
+    if last_attempt is not None and last_attempt.failed:
+        error = last_attempt.exception()
+    return isinstance(error, THROTTLE_ERRORS)
+
+
+class _Lane:
+    """Concurrency limit of one kind of request, moved between 1 and max_limit by AIMD"""
+
+    __slots__ = ("max_limit", "limit", "hold", "in_flight", "granted", "throttled", "latency_ewma", "decreased_at")
+
+    def __init__(self, max_limit: int, hold: float = 0.0):
+        self.max_limit = max(1, max_limit)
+        self.limit = float(self.max_limit)
+        self.hold = hold
+        self.in_flight = 0
+        self.granted = 0
+        self.throttled = 0
+        self.latency_ewma: Optional[float] = None
+        self.decreased_at = float("-inf")
+
+    @property
+    def has_room(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def increase(self) -> None:
+        """Additive increase: about +1 once a full window of requests succeeded"""
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def decrease(self, factor: float, now: float, cooldown: float) -> bool:
+        """Multiplicative decrease, at most once per cooldown (one burst of errors is one signal)"""
+        if now - self.decreased_at < cooldown:
+            return False
+        self.limit = max(1.0, self.limit * factor)
+        self.decreased_at = now
+        return True
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": int(self.limit),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "latency_ewma_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000, 1),
+        }
+
+
+class ConcurrencyGovernor:
+    """Bounds the API requests in flight per lane (search, detail, comments, profile) and in total
+
+    Every request holds a slot of its lane and a global slot. Limits start at their
+    configured maximum and are tuned by AIMD: each successful request raises a lane's
+    limit (and the global one) by 1/limit, a throttle signal (IP block, captcha, timeout)
+    halves both, and a lane whose latency EWMA exceeds target_latency is halved too.
+    Waiters are served first come first served among lanes with room.
+
+        governor = ConcurrencyGovernor({"detail": 3, "comments": 3}, global_limit=4)
+        async with governor.slot("detail"):
+            res = await client.post(...)
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        global_limit: int,
+        target_latency: float = 3.0,
+        hold: Optional[Dict[str, float]] = None,
+        decrease_factor: float = 0.5,
+        cooldown: float = 5.0,
+        alpha: float = 0.2,
+    ):
+        """
+        Args:
+            limits: Maximum concurrent requests per lane; unknown lanes are only bounded globally
+            global_limit: Maximum concurrent requests over all lanes
+            target_latency: Latency EWMA (seconds) above which a lane's limit is decreased
+            hold: Seconds a lane's slot stays taken after its request returns, pacing a lane
+                that has no pacing of its own (e.g. note details). Paginated lanes are paced
+                by their crawl_interval instead, a hold there would pace them twice.
+            decrease_factor: Factor applied to limits on a throttle / latency signal
+            cooldown: Minimum delay (seconds) between two decreases of the same limit
+            alpha: Smoothing factor of the latency EWMA
+        """
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._hold = dict(hold or {})
+        self._global = _Lane(global_limit)
+        self._lanes: Dict[str, _Lane] = {
+            name: _Lane(limit, self._hold.get(name, 0.0)) for name, limit in limits.items()
+        }
+        self._waiters: Deque[Tuple[_Lane, asyncio.Future]] = deque()
+
+    def _lane(self, name: str) -> _Lane:
+        lane = self._lanes.get(name)
+        if lane is None:
+            lane = self._lanes[name] = _Lane(self._global.max_limit, self._hold.get(name, 0.0))
+        return lane
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        """Hold a slot of the lane for one request; its outcome feeds the AIMD tuning"""
+        lane = self._lane(name)
+        await self._acquire(lane)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            yield
+        except BaseException as e:
+            if is_throttle_error(e):
+                self._on_throttle(lane, loop.time())
+            raise
+        else:
+            self._on_success(lane, loop.time() - started, loop.time())
+        finally:
+            if lane.hold > 0:
+                # The slot stays taken for the hold, but the caller gets its response right away
+                loop.call_later(lane.hold, self._release, lane)
+            else:
+                self._release(lane)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Current limits, in-flight requests and latency per lane, plus the global limit"""
+        stats = {name: lane.snapshot() for name, lane in self._lanes.items()}
+        stats["global"] = self._global.snapshot()
+        stats["global"]["waiting"] = len(self._waiters)
+        return stats
+
+    async def _acquire(self, lane: _Lane) -> None:
+        if not self._waiters and lane.has_room and self._global.has_room:
+            self._grant(lane)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((lane, waiter))
+        # Waiters ahead may all be on full lanes, they must not hold back a lane with room
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled right after being granted, give the slot back
+                self._release(lane)
+            else:
+                try:
+                    self._waiters.remove((lane, waiter))
+                except ValueError:
+                    pass
+            raise
+
+    def _grant(self, lane: _Lane) -> None:
+        lane.in_flight += 1
+        lane.granted += 1
+        self._global.in_flight += 1
+        self._global.granted += 1
+
+    def _release(self, lane: _Lane) -> None:
+        lane.in_flight -= 1
+        self._global.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Wake waiters in arrival order, skipping those whose lane is full"""
+        if not self._waiters:
+            return
+        remaining = deque()
+        while self._waiters and self._global.has_room:
+            lane, waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            if lane.has_room:
+                self._grant(lane)
+                waiter.set_result(None)
+            else:
+                remaining.append((lane, waiter))
+        remaining.extend(self._waiters)
+        self._waiters = remaining
+
+    def _on_success(self, lane: _Lane, latency: float, now: float) -> None:
+        if lane.latency_ewma is None:
+            lane.latency_ewma = latency
+        else:
+            lane.latency_ewma += self.alpha * (latency - lane.latency_ewma)
+        if lane.latency_ewma > self.target_latency:
+            lane.decrease(self.decrease_factor, now, self.cooldown)
+            return
+        lane.increase()
+        self._global.increase()
+
+    def _on_throttle(self, lane: _Lane, now: float) -> None:
+        lane.throttled += 1
+        self._global.throttled += 1
+        lane.decrease(self.decrease_factor, now, self.cooldown)
+        # IP blocks and captchas concern the whole account, not just this kind of request
+        self._global.decrease(self.decrease_factor, now, self.cooldown)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Pipelined pagination: sign and fetch page N+1 while page N is being processed
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+FetchPage = Callable[[Any], Awaitable[Optional[Dict]]]
+NextCursor = Callable[[Optional[Dict], Any], Optional[Any]]
+
+
+def cursor_of(page: Optional[Dict], cursor: Any = None) -> Optional[str]:
+    """Next cursor of a cursor-paginated response (comments, sub-comments, user_posted)"""
+    if not page or not page.get("has_more", False):
+        return None
+    return page.get("cursor", "")
+
+
+class PagePrefetcher:
+    """Async iterator over API pages that prefetches the next page in the background
+
+    As soon as page N is received its cursor is known, so the request for page N+1
+    (signing included) is started before page N is handed to the consumer. The
+    ``crawl_interval`` delay is applied inside the prefetch task, so it overlaps
+    with the consumer's processing instead of adding to it.
+
+    Must be used as an async context manager so that a consumer that stops early
+    (e.g. max_count reached) cancels the in-flight prefetch:
+
+        async with PagePrefetcher(fetch, "", cursor_of, crawl_interval=1.0) as pages:
+            async for page in pages:
+                ...
+    """
+
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        first_cursor: Any,
+        next_cursor: NextCursor,
+        crawl_interval: float = 0.0,
+    ):
+        """
+        Args:
+            fetch_page: Coroutine function fetching one page for the given cursor
+            first_cursor: Cursor (or page number) of the first page
+            next_cursor: Called with (page, cursor of that page), returns the cursor of the
+                next page or None when pagination should stop
+            crawl_interval: Delay before each follow-up request (seconds)
+        """
+        self._fetch_page = fetch_page
+        self._next_cursor = next_cursor
+        self._crawl_interval = crawl_interval
+        self._pending: Optional[asyncio.Task] = None
+        self._pending_cursor: Any = first_cursor
+        self._first_cursor = first_cursor
+        self._started = False
+        # Cursor of the page most recently requested by the consumer
+        self.cursor: Any = first_cursor
+
+    async def _fetch_after_interval(self, cursor: Any) -> Optional[Dict]:
+        if self._crawl_interval > 0:
+            await asyncio.sleep(self._crawl_interval)
+        return await self._fetch_page(cursor)
+
+    def _schedule(self, cursor: Any, delayed: bool) -> None:
+        self._pending_cursor = cursor
+        coro = self._fetch_after_interval(cursor) if delayed else self._fetch_page(cursor)
+        self._pending = asyncio.ensure_future(coro)
+
+    def __aiter__(self) -> "PagePrefetcher":
+        return self
+
+    async def __anext__(self) -> Optional[Dict]:
+        """Next page; empty responses are yielded as-is so the consumer can log them"""
+        if not self._started:
+            self._started = True
+            self._schedule(self._first_cursor, delayed=False)
+        if self._pending is None:
+            raise StopAsyncIteration
+
+        task, self._pending = self._pending, None
+        self.cursor = self._pending_cursor
+        page = await task
+
+        cursor = self._next_cursor(page, self.cursor)
+        if cursor is not None:
+            self._schedule(cursor, delayed=True)
+        return page
+
+    async def aclose(self) -> None:
+        """Cancel the in-flight prefetch, if any; no further page is requested afterwards"""
+        self._started = True
+        task, self._pending = self._pending, None
+        if task is None:
+            return
+        if not task.done():
+            task.cancel()
+        # wait() doesn't raise the task's own cancellation, only a cancellation of the caller
+        await asyncio.wait([task])
+        if not task.cancelled():
+            # The prefetched page is discarded, so are its errors (retrieved, not logged)
+            task.exception()
+
+    async def __aenter__(self) -> "PagePrefetcher":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
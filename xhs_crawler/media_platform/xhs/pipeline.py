@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Staged producer/consumer pipeline: stages connected by bounded asyncio queues
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ...tools import utils
+
+# handler(item, emit): emit(stage_name, item) hands a result to a later stage and
+# waits while that stage's queue is full, which is what propagates backpressure
+Emit = Callable[[str, Any], Awaitable[None]]
+Handler = Callable[[Any, Emit], Awaitable[None]]
+
+
+class Stage:
+    """One pipeline stage: a bounded input queue drained by a fixed number of workers"""
+
+    def __init__(self, name: str, handler: Handler, workers: int = 1, queue_size: int = 100):
+        """
+        Args:
+            name: Stage name, used by emit() and in stats
+            handler: Coroutine function processing one item
+            workers: Number of concurrent workers
+            queue_size: Bound of the input queue; producers wait when it is full
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self.started_at: Optional[float] = None
+
+    def stats(self) -> Dict:
+        """Queue depth and throughput of the stage"""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "queue": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "workers": self.workers,
+            "busy": self.busy,
+            "processed": self.processed,
+            "errors": self.errors,
+            "per_sec": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            # Share of worker time spent in the handler; close to 1 marks the bottleneck
+            "utilization": round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed > 0 else 0.0,
+        }
+
+
+class Pipeline:
+    """Runs stages declared in topological order (items only flow to later stages)
+
+        pipeline = Pipeline([Stage("search", search, 1), Stage("comments", comments, 3)])
+        await pipeline.run({"search": keywords})
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._by_name = {stage.name: stage for stage in stages}
+        self._order = {stage.name: index for index, stage in enumerate(stages)}
+
+    def stage(self, name: str) -> Stage:
+        return self._by_name[name]
+
+    async def _worker(self, stage: Stage) -> None:
+        index = self._order[stage.name]
+
+        async def emit(target: str, item: Any) -> None:
+            if self._order[target] <= index:
+                raise ValueError(f"stage {stage.name} cannot emit to earlier stage {target}")
+            await self._by_name[target].queue.put(item)
+
+        while True:
+            item = await stage.queue.get()
+            stage.busy += 1
+            begin = time.monotonic()
+            try:
+                await stage.handler(item, emit)
+                stage.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.errors += 1
+                utils.logger.error(f"[Pipeline.{stage.name}] Failed to process item {item!r}: {e}")
+            finally:
+                stage.busy -= 1
+                stage.busy_seconds += time.monotonic() - begin
+                stage.queue.task_done()
+
+    async def run(self, inputs: Dict[str, List[Any]]) -> None:
+        """Feed the initial items and return once every stage has drained
+
+        Stages are joined in order: once all earlier stages are drained nothing can be
+        added to a stage any more, so its join() marks the end of its work.
+        """
+        now = time.monotonic()
+        tasks = []
+        for stage in self.stages:
+            stage.started_at = now
+            tasks.extend(
+                asyncio.create_task(self._worker(stage), name=f"pipeline-{stage.name}-{i}")
+                for i in range(stage.workers)
+            )
+        try:
+            for name, items in inputs.items():
+                for item in items:
+                    await self._by_name[name].queue.put(item)
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -18,16 +18,22 @@
 
 # Generate Xiaohongshu signature by calling window.mnsv2 via Playwright injection
 
+import asyncio
 import hashlib
 import json
 import time
+from collections import deque
 from typing import Any, Dict, Optional, Union
 from urllib.parse import urlparse, quote
 
 from playwright.async_api import Page
 
+from ...tools import utils
+from .exception import SignError, SignTimeoutError
 from .xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
 
+XHS_INDEX_URL = "https://www.xiaohongshu.com"
+
 
 def _build_sign_string(uri: str, data: Optional[Union[Dict, str]] = None, method: str = "POST") -> str:
     """Build string to be signed
@@ -132,15 +138,24 @@ async def call_mnsv2(page: Page, sign_str: str, md5_str: str) -> str:
 
     Returns:
         Signature string returned by mnsv2
+
+    Raises:
+        SignError: window.mnsv2 is missing, raised, or returned an empty signature
     """
     sign_str_escaped = sign_str.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
     md5_str_escaped = md5_str.replace("\\", "\\\\").replace("'", "\\'")
 
     try:
-        result = await page.evaluate(f"window.mnsv2('{sign_str_escaped}', '{md5_str_escaped}')")
-        return result if result else ""
-    except Exception:
-        return ""
+        result = await page.evaluate(
+            f"typeof window.mnsv2 === 'function' ? window.mnsv2('{sign_str_escaped}', '{md5_str_escaped}') : null"
+        )
+    except Exception as e:
+        raise SignError(f"window.mnsv2 evaluate failed: {e}") from e
+    if result is None:
+        raise SignError("window.mnsv2 is not available on the signing page")
+    if not result:
+        raise SignError("window.mnsv2 returned an empty signature")
+    return result
 
 
 async def sign_xs_with_playwright(
@@ -200,6 +215,170 @@ async def sign_with_playwright(
     }
 
 
+class SignerHealth:
+    """Latency and failure statistics of a signer, exported for monitoring"""
+
+    def __init__(self, alpha: float = 0.2, window: int = 512):
+        """
+        Args:
+            alpha: Smoothing factor of the latency / failure-rate EWMA
+            window: Number of recent successful latencies kept for percentiles
+        """
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.failure_rate = 0.0
+        self.total = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.recoveries = 0
+        self._latencies = deque(maxlen=window)
+
+    def _observe(self, failed: bool) -> None:
+        self.total += 1
+        self.failure_rate += self.alpha * ((1.0 if failed else 0.0) - self.failure_rate)
+
+    def record_success(self, latency: float) -> None:
+        self._observe(failed=False)
+        self.consecutive_failures = 0
+        self._latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+
+    def record_failure(self) -> None:
+        self._observe(failed=True)
+        self.failures += 1
+        self.consecutive_failures += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (0 < q <= 100) over the recent window, in seconds"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "recoveries": self.recoveries,
+            "failure_rate": round(self.failure_rate, 4),
+            "latency_ewma_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000, 1),
+            "latency_p50_ms": _to_ms(self.percentile(50)),
+            "latency_p90_ms": _to_ms(self.percentile(90)),
+            "latency_p99_ms": _to_ms(self.percentile(99)),
+        }
+
+
+def _to_ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class PlaywrightSigner:
+    """window.mnsv2 signer bound to a playwright page, with timeout, health tracking and recovery
+
+    When the page navigated away, crashed or lost window.mnsv2, the signer re-navigates
+    it to the Xiaohongshu index page (or opens a new page in the same browser context)
+    and retries once before failing with SignError.
+    """
+
+    RECOVER_AFTER_FAILURES = 3
+
+    def __init__(self, page: Page, timeout: float = 5.0, index_url: str = XHS_INDEX_URL):
+        """
+        Args:
+            page: playwright Page object (must have Xiaohongshu page open)
+            timeout: Per-call signing timeout (seconds)
+            index_url: Page to navigate to when window.mnsv2 is missing
+
+        Raises:
+            ValueError: No page was given
+        """
+        if page is None:
+            raise ValueError("PlaywrightSigner needs a playwright page to sign on")
+        self.page = page
+        self.timeout = timeout
+        self.index_url = index_url
+        self.health = SignerHealth()
+        self._recover_lock = asyncio.Lock()
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Generate complete signature request headers, see sign_with_playwright
+
+        Raises:
+            SignTimeoutError: Signing did not finish within the timeout
+            SignError: Signing failed even after recovering the signing page
+        """
+        begin = time.monotonic()
+        try:
+            if self.health.consecutive_failures >= self.RECOVER_AFTER_FAILURES:
+                # Repeated timeouts usually mean a hung page, don't keep waiting on it
+                await self.recover()
+            try:
+                signs = await self._sign_with_timeout(uri, data, a1, method)
+            except SignTimeoutError:
+                raise
+            except SignError as e:
+                utils.logger.warning(f"[PlaywrightSigner.sign] Sign failed, recovering signing page: {e}")
+                await self.recover()
+                signs = await self._sign_with_timeout(uri, data, a1, method)
+        except SignError:
+            self.health.record_failure()
+            raise
+        self.health.record_success(time.monotonic() - begin)
+        return signs
+
+    async def _sign_with_timeout(self, uri: str, data: Optional[Union[Dict, str]], a1: str, method: str) -> Dict[str, Any]:
+        if self.page.is_closed():
+            raise SignError("signing page is closed")
+        try:
+            return await asyncio.wait_for(
+                sign_with_playwright(self.page, uri, data, a1, method), timeout=self.timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise SignTimeoutError(f"window.mnsv2 signing timed out after {self.timeout}s, uri: {uri}") from e
+
+    async def recover(self) -> None:
+        """Re-navigate the signing page, or re-create it when it is closed"""
+        async with self._recover_lock:
+            if not self.page.is_closed() and await self._mnsv2_ready():
+                # Another caller already recovered the page
+                return
+            self.health.recoveries += 1
+            try:
+                if self.page.is_closed():
+                    utils.logger.warning("[PlaywrightSigner.recover] Signing page closed, creating a new page")
+                    self.page = await self.page.context.new_page()
+                await self.page.goto(self.index_url, timeout=self.timeout * 3 * 1000)
+            except Exception as e:
+                raise SignError(f"recover signing page failed: {e}") from e
+            if not await self._mnsv2_ready():
+                raise SignError("window.mnsv2 still missing after re-navigating the signing page")
+            utils.logger.info("[PlaywrightSigner.recover] Signing page recovered")
+
+    async def _mnsv2_ready(self) -> bool:
+        try:
+            return bool(await asyncio.wait_for(
+                self.page.evaluate("typeof window.mnsv2 === 'function'"), timeout=self.timeout
+            ))
+        except Exception:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Health snapshot for monitoring"""
+        return self.health.snapshot()
+
+
 async def pre_headers_with_playwright(
     page: Page,
     url: str,
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Compact records for the fields the crawler actually keeps.
+# Raw API dicts carry dozens of unused fields; records are built once, as soon as a
+# response is received, and the raw dict can be released right away.
+
+from typing import Dict, Optional
+
+XHS_PROFILE_URL = "https://www.xiaohongshu.com/user/profile/{user_id}?xsec_source=pc_note"
+
+
+def parse_count(value) -> Optional[int]:
+    """Exact count from an interact_info field; None for abbreviated ("1.2万", "10+") or missing ones"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def note_comment_count(note: Dict) -> Optional[int]:
+    """Exact comment count of a note detail or search note_card"""
+    return parse_count((note.get("interact_info") or {}).get("comment_count"))
+
+
+def _first(data: Dict, *keys, default=""):
+    """Value of the first key present with a truthy value"""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return default
+
+
+class UserRecord:
+    """Comment author"""
+
+    __slots__ = ("user_id", "nickname", "avatar", "user_url")
+
+    def __init__(self, user_id: str, nickname: str = "", avatar: str = "", user_url: str = ""):
+        self.user_id = user_id
+        self.nickname = nickname
+        self.avatar = avatar
+        self.user_url = user_url or XHS_PROFILE_URL.format(user_id=user_id)
+
+    @classmethod
+    def from_api(cls, user_info: Dict) -> Optional["UserRecord"]:
+        """From a user_info dict of the comment API, None when it has no user id"""
+        user_id = _first(user_info, "user_id", "id", "userid")
+        if not user_id:
+            return None
+        return cls(
+            user_id=user_id,
+            nickname=_first(user_info, "nickname", "name", "nick_name"),
+            avatar=_first(user_info, "image", "avatar", "avatar_url"),
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "user_id": self.user_id,
+            "nickname": self.nickname,
+            "avatar": self.avatar,
+            "user_url": self.user_url,
+        }
+
+
+class CommentRecord:
+    """First- or second-level comment"""
+
+    __slots__ = ("comment_id", "note_id", "content", "user", "like_count", "time")
+
+    def __init__(
+        self,
+        comment_id: str,
+        note_id: str,
+        content: str,
+        user: UserRecord,
+        like_count=0,
+        time: int = 0,
+    ):
+        self.comment_id = comment_id
+        self.note_id = note_id
+        self.content = content
+        self.user = user
+        self.like_count = like_count
+        self.time = time
+
+    @classmethod
+    def from_api(cls, comment: Dict) -> Optional["CommentRecord"]:
+        """From a comment of /api/sns/web/v2/comment/page (or sub_comments), None without author"""
+        user_info = comment.get("user_info") or comment.get("user") or comment.get("author") or {}
+        user = UserRecord.from_api(user_info)
+        if user is None and comment.get("user_id"):
+            user = UserRecord(user_id=comment["user_id"])
+        if user is None:
+            return None
+        content = comment.get("content") or (comment.get("note_comment") or {}).get("content") or comment.get("text") or ""
+        return cls(
+            comment_id=_first(comment, "id", "comment_id"),
+            note_id=comment.get("note_id", ""),
+            content=content,
+            user=user,
+            like_count=_first(comment, "like_count", "liked_count", "likeCount", default=0),
+            time=_first(comment, "create_time", "time", "createTime", default=0),
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "comment_id": self.comment_id,
+            "content": self.content,
+            "user": self.user.to_dict(),
+            "like_count": self.like_count,
+            "time": self.time,
+        }
+
+
+class NoteRecord:
+    """Searched note with the xsec parameters needed to open it again
+
+    Records built from a search item only carry what search returns (no desc);
+    detail_loaded tells whether the feed detail has been merged in. comment_count is None
+    when the exact count is unknown.
+    """
+
+    __slots__ = ("note_id", "title", "desc", "xsec_token", "xsec_source", "detail_loaded", "comment_count")
+
+    def __init__(
+        self,
+        note_id: str,
+        title: str = "",
+        desc: str = "",
+        xsec_token: str = "",
+        xsec_source: str = "pc_search",
+        detail_loaded: bool = True,
+        comment_count: Optional[int] = None,
+    ):
+        self.note_id = note_id
+        self.title = title
+        self.desc = desc
+        self.xsec_token = xsec_token
+        self.xsec_source = xsec_source
+        self.detail_loaded = detail_loaded
+        self.comment_count = comment_count
+
+    @classmethod
+    def from_search_item(cls, search_item: Dict) -> "NoteRecord":
+        """From a search result item alone, title comes from its note_card"""
+        note_card = search_item.get("note_card") or {}
+        return cls(
+            note_id=search_item.get("id", ""),
+            title=note_card.get("display_title") or note_card.get("title") or "",
+            xsec_token=search_item.get("xsec_token", ""),
+            xsec_source=search_item.get("xsec_source", "pc_search"),
+            detail_loaded=False,
+            comment_count=note_comment_count(note_card),
+        )
+
+    @classmethod
+    def from_note_detail(cls, search_item: Dict, note_detail: Dict) -> "NoteRecord":
+        """From a search result item and the note detail fetched for it"""
+        return cls(
+            note_id=search_item.get("id", "") or note_detail.get("note_id", ""),
+            title=note_detail.get("title", ""),
+            desc=note_detail.get("desc", ""),
+            xsec_token=search_item.get("xsec_token", ""),
+            xsec_source=search_item.get("xsec_source", "pc_search"),
+            comment_count=note_comment_count(note_detail),
+        )
+
+    def update_from_detail(self, note_detail: Dict) -> None:
+        """Merge the fields only the feed detail has"""
+        self.title = note_detail.get("title", "") or self.title
+        self.desc = note_detail.get("desc", "")
+        self.detail_loaded = True
+        comment_count = note_comment_count(note_detail)
+        if comment_count is not None:
+            self.comment_count = comment_count
+
+    def to_dict(self) -> Dict:
+        return {
+            "note_id": self.note_id,
+            "title": self.title,
+            "desc": self.desc,
+            "xsec_token": self.xsec_token,
+            "xsec_source": self.xsec_source,
+            "comment_count": self.comment_count,
+        }
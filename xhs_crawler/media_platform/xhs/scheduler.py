@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Fair scheduling of concurrent keyword searches under one global request budget
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+
+class FairScheduler:
+    """Hands out request turns to named flows (e.g. one per keyword) by weighted round-robin
+
+    At most `concurrency` turns are held at once and consecutive turns are at least
+    `interval` seconds apart, whatever the number of flows. Among flows waiting for a
+    turn, smooth weighted round-robin picks the next one, so a keyword with deep result
+    pages can't starve the others and short keywords finish early.
+
+        scheduler = FairScheduler(concurrency=2, interval=1.0)
+        async with scheduler.turn(keyword):
+            res = await client.get_note_by_keyword(...)
+    """
+
+    def __init__(self, concurrency: int = 1, interval: float = 0.0):
+        """
+        Args:
+            concurrency: Maximum number of requests in flight across all flows
+            interval: Minimum delay between two consecutive turns (seconds)
+        """
+        self.concurrency = max(1, concurrency)
+        self.interval = interval
+        self._weights: Dict[str, int] = {}
+        self._current: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._granted: Dict[str, int] = {}
+        self._active = 0
+        self._next_at = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._dispatch_pending = False
+
+    def register(self, name: str, weight: int = 1) -> None:
+        """Declare a flow; unregistered flows are registered with weight 1 on first use"""
+        self._weights[name] = max(1, weight)
+        self._current.setdefault(name, 0)
+        self._waiters.setdefault(name, deque())
+        self._granted.setdefault(name, 0)
+
+    @asynccontextmanager
+    async def turn(self, name: str) -> AsyncIterator[None]:
+        """Wait for this flow's turn and hold one of the concurrency slots meanwhile"""
+        if name not in self._weights:
+            self.register(name)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[name].append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled right after being granted, give the slot back
+                self._release()
+            else:
+                try:
+                    self._waiters[name].remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Turns granted and turns waiting per flow"""
+        return {
+            name: {"weight": weight, "granted": self._granted[name], "waiting": len(self._waiters[name])}
+            for name, weight in self._weights.items()
+        }
+
+    def _release(self) -> None:
+        self._active -= 1
+        # Dispatch on the next loop iteration: the flow that just finished usually asks for
+        # its next turn right away and must compete with the others for it
+        if not self._dispatch_pending:
+            self._dispatch_pending = True
+            asyncio.get_running_loop().call_soon(self._deferred_dispatch)
+
+    def _deferred_dispatch(self) -> None:
+        self._dispatch_pending = False
+        self._dispatch()
+
+    def _pick(self) -> Optional[str]:
+        """Smooth weighted round-robin among flows with waiters"""
+        ready = [name for name, waiters in self._waiters.items() if waiters]
+        if not ready:
+            return None
+        total = 0
+        best = None
+        for name in ready:
+            self._current[name] += self._weights[name]
+            total += self._weights[name]
+            if best is None or self._current[name] > self._current[best]:
+                best = name
+        self._current[best] -= total
+        return best
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._active < self.concurrency:
+            now = loop.time()
+            if now < self._next_at:
+                if self._timer is None and any(self._waiters.values()):
+                    self._timer = loop.call_at(self._next_at, self._on_timer)
+                return
+            name = self._pick()
+            if name is None:
+                return
+            waiter = self._waiters[name].popleft()
+            if waiter.done():
+                continue
+            self._active += 1
+            self._granted[name] += 1
+            self._next_at = now + self.interval
+            waiter.set_result(None)
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Local signing service: one warmed Chromium serves window.mnsv2 signatures to many crawler workers
+#
+# Start the daemon (the browser profile must be logged in, log in once in the opened window):
+#     python -m xhs_crawler.media_platform.xhs.sign_server --address unix:///tmp/xhs_sign.sock
+#     python -m xhs_crawler.media_platform.xhs.sign_server --address tcp://127.0.0.1:8765 --pages 4
+#
+# Workers then set SIGN_SERVER_ADDRESS (or the XHS_SIGN_SERVER environment variable) to the same address.
+#
+# Wire protocol: one JSON object per line in each direction.
+#     request:  {"op": "sign", "uri": ..., "data": ..., "a1": ..., "method": "GET" | "POST"}
+#               {"op": "cookies"} | {"op": "stats"}
+#     response: {"ok": true, "result": ...} | {"ok": false, "error": ..., "error_type": ...}
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ...tools import utils
+from .exception import SignError, SignTimeoutError
+from .playwright_sign import XHS_INDEX_URL, PlaywrightSigner, SignerHealth
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+# Lines carry whole sign payloads, allow large POST bodies
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+def parse_sign_server_address(address: str) -> Tuple[str, Union[str, Tuple[str, int]]]:
+    """Parse "unix:///path/to.sock" or "tcp://host:port" (also plain "host:port")
+
+    Returns:
+        ("unix", path) or ("tcp", (host, port))
+    """
+    if address.startswith("unix://"):
+        return "unix", address[len("unix://"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"invalid sign server address: {address}")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class SignServer:
+    """Owns the browser and a pool of signing pages, serves sign requests over a local socket"""
+
+    def __init__(
+        self,
+        address: str,
+        user_data_dir: str,
+        pages: int = 2,
+        headless: bool = False,
+        sign_timeout: float = 5.0,
+        stealth_js_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            address: Listen address, see parse_sign_server_address
+            user_data_dir: Persistent browser profile holding the login state
+            pages: Number of signing pages, i.e. signs evaluated in parallel
+            headless: Run Chromium headless
+            sign_timeout: Per-call signing timeout (seconds)
+            stealth_js_path: Anti-detection init script, skipped when missing
+        """
+        self.address = address
+        self.user_data_dir = user_data_dir
+        self.page_count = max(1, pages)
+        self.headless = headless
+        self.sign_timeout = sign_timeout
+        self.stealth_js_path = stealth_js_path
+        self._playwright = None
+        self._browser_context = None
+        self._signers: List[PlaywrightSigner] = []
+        self._idle_signers: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        self._browser_context = await self._playwright.chromium.launch_persistent_context(
+            user_data_dir=self.user_data_dir,
+            accept_downloads=True,
+            headless=self.headless,
+            viewport={"width": 1920, "height": 1080},
+            user_agent=DEFAULT_USER_AGENT,
+        )
+        if self.stealth_js_path and os.path.exists(self.stealth_js_path):
+            await self._browser_context.add_init_script(path=self.stealth_js_path)
+
+        self._idle_signers = asyncio.Queue()
+        for _ in range(self.page_count):
+            page = await self._browser_context.new_page()
+            await page.goto(XHS_INDEX_URL)
+            signer = PlaywrightSigner(page, timeout=self.sign_timeout)
+            self._signers.append(signer)
+            self._idle_signers.put_nowait(signer)
+
+        kind, target = parse_sign_server_address(self.address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=target, limit=STREAM_LIMIT)
+        else:
+            host, port = target
+            self._server = await asyncio.start_server(self._handle_connection, host=host, port=port, limit=STREAM_LIMIT)
+        utils.logger.info(f"[SignServer.start] Serving {self.page_count} signing pages on {self.address}")
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        if self._browser_context is not None:
+            await self._browser_context.close()
+            self._browser_context = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        kind, target = parse_sign_server_address(self.address)
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = {"ok": True, "result": await self._dispatch(json.loads(line))}
+                except Exception as e:
+                    response = {"ok": False, "error": str(e), "error_type": type(e).__name__}
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict) -> Any:
+        op = request.get("op")
+        if op == "sign":
+            return await self._sign(request)
+        if op == "cookies":
+            return await self._browser_context.cookies()
+        if op == "stats":
+            return {"pages": [signer.stats() for signer in self._signers]}
+        raise ValueError(f"unknown op: {op}")
+
+    async def _sign(self, request: Dict) -> Dict[str, Any]:
+        a1 = request.get("a1") or ""
+        if not a1:
+            # Workers without their own cookie jar sign with the daemon's a1
+            for cookie in await self._browser_context.cookies():
+                if cookie.get("name") == "a1":
+                    a1 = cookie.get("value", "")
+                    break
+        signer = await self._idle_signers.get()
+        try:
+            return await signer.sign(
+                uri=request["uri"],
+                data=request.get("data"),
+                a1=a1,
+                method=request.get("method", "POST"),
+            )
+        finally:
+            self._idle_signers.put_nowait(signer)
+
+
+class RemoteSigner:
+    """Thin client of SignServer with the same sign() interface as PlaywrightSigner"""
+
+    # No local page, the daemon owns the browser
+    page = None
+
+    def __init__(self, address: str, timeout: float = 5.0, max_connections: int = 4):
+        """
+        Args:
+            address: Sign server address, see parse_sign_server_address
+            timeout: Per-call timeout including the round trip (seconds)
+            max_connections: Persistent connections kept open to the daemon
+        """
+        self.address = address
+        self.timeout = timeout
+        self.health = SignerHealth()
+        self._max_connections = max(1, max_connections)
+        # Slots taken so far; _idle holds idle connections and free slots (None)
+        self._opened = 0
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def _open_connection(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        kind, target = parse_sign_server_address(self.address)
+        if kind == "unix":
+            return await asyncio.open_unix_connection(path=target, limit=STREAM_LIMIT)
+        host, port = target
+        return await asyncio.open_connection(host=host, port=port, limit=STREAM_LIMIT)
+
+    async def _acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        if self._idle.empty() and self._opened < self._max_connections:
+            self._opened += 1
+            conn = None
+        else:
+            conn = await self._idle.get()
+        if conn is not None:
+            return conn
+        # A free slot (new, or its connection was dropped): open a connection on it
+        try:
+            return await self._open_connection()
+        except BaseException:
+            # Includes cancellation by the caller's timeout, hand the slot to the next caller
+            self._idle.put_nowait(None)
+            raise
+
+    def _discard(self, conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter]) -> None:
+        conn[1].close()
+        # The freed slot wakes a caller waiting in _acquire, which opens a replacement
+        self._idle.put_nowait(None)
+
+    async def _call(self, request: Dict) -> Any:
+        try:
+            conn = await asyncio.wait_for(self._acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError as e:
+            raise SignTimeoutError(f"no connection to sign server {self.address} within {self.timeout}s") from e
+        except OSError as e:
+            raise SignError(f"connect sign server {self.address} failed: {e}") from e
+
+        reader, writer = conn
+        try:
+            writer.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), timeout=self.timeout)
+        except asyncio.TimeoutError as e:
+            # A late reply would be read by the next caller, drop the connection
+            self._discard(conn)
+            raise SignTimeoutError(f"sign server {self.address} did not reply within {self.timeout}s") from e
+        except (OSError, ConnectionError) as e:
+            self._discard(conn)
+            raise SignError(f"sign server {self.address} connection failed: {e}") from e
+        except BaseException:
+            # Cancelled by the caller (job cancel, outer timeout): the reply may still
+            # arrive on this stream, so the connection cannot be reused
+            self._discard(conn)
+            raise
+        if not line:
+            self._discard(conn)
+            raise SignError(f"sign server {self.address} closed the connection")
+        self._idle.put_nowait(conn)
+
+        try:
+            response = json.loads(line)
+        except ValueError:
+            response = None
+        if not isinstance(response, dict):
+            raise SignError(f"sign server {self.address} sent a malformed reply: {line[:200]!r}")
+        if not response.get("ok"):
+            error_cls = SignTimeoutError if response.get("error_type") == SignTimeoutError.__name__ else SignError
+            raise error_cls(f"sign server error: {response.get('error')}")
+        return response.get("result")
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Generate complete signature request headers on the sign server
+
+        Raises:
+            SignTimeoutError: The daemon did not answer within the timeout
+            SignError: The daemon is unreachable or failed to sign
+        """
+        begin = time.monotonic()
+        try:
+            signs = await self._call({"op": "sign", "uri": uri, "data": data, "a1": a1, "method": method})
+        except SignError:
+            self.health.record_failure()
+            raise
+        self.health.record_success(time.monotonic() - begin)
+        return signs
+
+    async def get_cookies(self) -> List[Dict]:
+        """Cookies of the daemon's (logged in) browser context"""
+        return await self._call({"op": "cookies"})
+
+    async def remote_stats(self) -> Dict[str, Any]:
+        """Health of the daemon's signing pages"""
+        return await self._call({"op": "stats"})
+
+    def stats(self) -> Dict[str, Any]:
+        """Health snapshot of this client, latencies include the round trip"""
+        return self.health.snapshot()
+
+    async def close(self) -> None:
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            self._opened -= 1
+            if conn is not None:
+                conn[1].close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Xiaohongshu window.mnsv2 signing daemon")
+    parser.add_argument("--address", default="tcp://127.0.0.1:8765", help="unix:///path/to.sock or tcp://host:port")
+    parser.add_argument("--pages", type=int, default=2, help="signing pages evaluated in parallel")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--timeout", type=float, default=5.0, help="per-call signing timeout (seconds)")
+    parser.add_argument(
+        "--user-data-dir",
+        default=os.path.join(os.getcwd(), "browser_data", "xhs_user_data_dir"),
+        help="persistent browser profile holding the login state",
+    )
+    parser.add_argument("--stealth-js", default=os.path.join(os.getcwd(), "libs", "stealth.min.js"))
+    args = parser.parse_args()
+
+    server = SignServer(
+        address=args.address,
+        user_data_dir=args.user_data_dir,
+        pages=args.pages,
+        headless=args.headless,
+        sign_timeout=args.timeout,
+        stealth_js_path=args.stealth_js,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Watermarks for incremental crawling: the newest note / comment seen by a previous run.
+# Search results sorted by SearchSortType.LATEST and comment pages come newest first, so
+# pagination can stop at the first page that holds nothing newer than the watermark.
+
+from typing import Dict, Iterable, Optional
+
+
+def object_id_time(object_id: str) -> int:
+    """Creation time (ms) encoded in the first 8 hex digits of a note/comment id, 0 if none"""
+    try:
+        return int(object_id[:8], 16) * 1000 if len(object_id) >= 8 else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def item_time(item: Dict) -> int:
+    """Creation time (ms) of a raw note or comment dict, falls back to the id's timestamp"""
+    value = item.get("create_time") or item.get("time") or item.get("createTime")
+    if value:
+        value = int(value)
+        # Some payloads carry seconds instead of milliseconds
+        return value * 1000 if value < 1e12 else value
+    return object_id_time(item.get("id") or item.get("note_id") or "")
+
+
+class Watermark:
+    """Newest item seen so far, compared by (time, id)"""
+
+    __slots__ = ("time", "item_id")
+
+    def __init__(self, time: int = 0, item_id: str = ""):
+        self.time = time
+        self.item_id = item_id
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "Watermark":
+        data = data or {}
+        return cls(time=data.get("time", 0), item_id=data.get("id", ""))
+
+    def to_dict(self) -> Dict:
+        return {"time": self.time, "id": self.item_id}
+
+    def with_cutoff(self, cutoff: int) -> "Watermark":
+        """Watermark that also rejects everything older than an absolute cutoff (ms)"""
+        if cutoff > self.time:
+            return Watermark(cutoff)
+        return self
+
+    def is_new(self, item: Dict) -> bool:
+        if not self.time:
+            return True
+        time = item_time(item)
+        if time != self.time:
+            # Unknown times are kept, stopping early would lose data
+            return time > self.time or time == 0
+        return (item.get("id") or "") > self.item_id
+
+    def advance(self, item: Dict) -> None:
+        """Move the watermark forward to the item if it is newer"""
+        if self.is_new(item):
+            time = item_time(item)
+            if time:
+                self.time, self.item_id = time, item.get("id") or ""
+
+    def any_new(self, items: Iterable[Dict]) -> bool:
+        """Whether a page holds anything newer; pages with nothing new end the pagination
+
+        Items without a known time (e.g. recommended queries in search results) don't count.
+        """
+        return any(item_time(item) and self.is_new(item) for item in items)
+
+
+class NoteCommentState:
+    """What a previous run saw of a note's comment thread
+
+    comment_count is interact_info.comment_count when the thread was crawled, cursor the
+    cursor of the last page fetched and complete whether that page ended the thread.
+    """
+
+    __slots__ = ("comment_count", "cursor", "complete")
+
+    def __init__(self, comment_count: Optional[int] = None, cursor: str = "", complete: bool = False):
+        self.comment_count = comment_count
+        self.cursor = cursor
+        self.complete = complete
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "NoteCommentState":
+        data = data or {}
+        return cls(
+            comment_count=data.get("comment_count"),
+            cursor=data.get("cursor", ""),
+            complete=data.get("complete", False),
+        )
+
+    def to_dict(self) -> Dict:
+        return {"comment_count": self.comment_count, "cursor": self.cursor, "complete": self.complete}
+
+    def unchanged(self, comment_count: Optional[int]) -> bool:
+        """The whole thread was crawled and the note has no comments since, nothing to fetch"""
+        return (
+            self.complete
+            and comment_count is not None
+            and self.comment_count is not None
+            and comment_count <= self.comment_count
+        )
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# Multi-keyword matching (Aho-Corasick) for comment and bio filters
+
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+# Up to this many keywords, per-keyword substring checks (run in C) beat one pure-Python
+# pass of the automaton; above it the automaton's cost no longer grows with the list
+SUBSTRING_SCAN_MAX_KEYWORDS = 32
+
+
+def normalize_text(text: str) -> str:
+    """NFKC + casefold: full-width letters/digits, compatibility forms and case all compare equal"""
+    if not unicodedata.is_normalized("NFKC", text):
+        # The quick check alone is much cheaper than normalize() on already-normalized text
+        text = unicodedata.normalize("NFKC", text)
+    return text.casefold()
+
+
+class KeywordMatcher:
+    """Finds which of a list of keywords occur in a text with one pass over the text
+
+    The automaton is built once from the keywords; matching costs O(len(text) + matches)
+    whatever the number of keywords, where `any(kw in text for kw in keywords)` rescans
+    the text once per keyword. Short lists (SUBSTRING_SCAN_MAX_KEYWORDS) still use the
+    substring checks, which are faster there. Keywords and text are both normalized with
+    normalize_text.
+
+        matcher = KeywordMatcher(["求链接", "ＰＤＦ"])
+        matcher.find_all("求链接，有pdf吗")  # ["求链接", "ＰＤＦ"]
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Args:
+            keywords: Keywords to look for; blank keywords and duplicates after normalization are dropped
+        """
+        self.keywords: List[str] = []
+        self._normalized: List[str] = []
+        # State 0 is the root; _goto[state] maps a character to the next state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Indexes into self.keywords of the keywords ending at each state (incl. via fail links)
+        self._output: List[Tuple[int, ...]] = [()]
+        alphabet = set()
+        seen = set()
+        for keyword in keywords:
+            normalized = normalize_text(keyword).strip() if keyword else ""
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            alphabet.update(normalized)
+            self._insert(normalized, len(self.keywords))
+            self.keywords.append(keyword)
+            self._normalized.append(normalized)
+        self._build_fail_links()
+        self._alphabet = frozenset(alphabet)
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _insert(self, normalized: str, index: int) -> None:
+        state = 0
+        for char in normalized:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] += (index,)
+
+    def _build_fail_links(self) -> None:
+        """Breadth-first: a state's fail link is the longest proper suffix that is also a prefix"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def _scan(self, text: str):
+        """Yields (end position, output tuple) of every state reached that completes at least one keyword"""
+        goto, fail, output, alphabet = self._goto, self._fail, self._output, self._alphabet
+        state = 0
+        for position, char in enumerate(normalize_text(text)):
+            if char not in alphabet:
+                # No keyword contains this character, every partial match is broken
+                state = 0
+                continue
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield position, output[state]
+
+    def find_all(self, text: str) -> List[str]:
+        """Keywords found in the text (as given to the constructor), in order of first occurrence"""
+        if not text or not self.keywords:
+            return []
+        if len(self.keywords) <= SUBSTRING_SCAN_MAX_KEYWORDS:
+            text = normalize_text(text)
+            found = sorted(
+                (position, index)
+                for index, position in enumerate(text.find(keyword) for keyword in self._normalized)
+                if position >= 0
+            )
+            return [self.keywords[index] for _, index in found]
+        # Keyword index -> start of its first occurrence; matches are reported at their end,
+        # so order by start afterwards like the substring checks do
+        found: Dict[int, int] = {}
+        for end, indexes in self._scan(text):
+            for index in indexes:
+                if index not in found:
+                    found[index] = end - len(self._normalized[index]) + 1
+            if len(found) == len(self.keywords):
+                break
+        return [self.keywords[index] for _, index in sorted((start, index) for index, start in found.items())]
+
+    def search(self, text: str) -> bool:
+        """Whether any keyword occurs in the text; stops at the first match"""
+        if not text or not self.keywords:
+            return False
+        if len(self.keywords) <= SUBSTRING_SCAN_MAX_KEYWORDS:
+            text = normalize_text(text)
+            return any(keyword in text for keyword in self._normalized)
+        for _ in self._scan(text):
+            return True
+        return False
+
+
+@lru_cache(maxsize=32)
+def compile_keywords(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """KeywordMatcher for a keyword tuple, cached so per-note callers don't rebuild the automaton"""
+    return KeywordMatcher(keywords)
@@ -5,16 +5,31 @@ MediaCrawler 爬虫同步适配器
 """
 import asyncio
 import os
-from typing import List, Dict, Optional
+import queue
+import threading
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from playwright.async_api import async_playwright
 
 from xhs_crawler.media_platform.xhs.core import XiaoHongShuCrawler
 from xhs_crawler.media_platform.xhs.client import XiaoHongShuClient
-from xhs_crawler.media_platform.xhs.exception import CaptchaRequiredError
+from xhs_crawler.media_platform.xhs.exception import CaptchaRequiredError, SignError
 from xhs_crawler.media_platform.xhs.field import SearchSortType
 from xhs_crawler.media_platform.xhs.help import get_search_id
+from xhs_crawler.media_platform.xhs.pagination import PagePrefetcher
+from xhs_crawler.media_platform.xhs.records import CommentRecord, NoteRecord
+from xhs_crawler.media_platform.xhs.scheduler import FairScheduler
+from xhs_crawler.media_platform.xhs.sign_server import RemoteSigner
+from xhs_crawler.media_platform.xhs.watermark import NoteCommentState, Watermark
 from xhs_crawler.tools import utils
 from xhs_crawler.tools.crawler_util import convert_cookies
+from xhs_crawler.tools.keyword_matcher import compile_keywords
+from xhs_crawler.config_stub import (
+    MAX_CONCURRENCY_NUM,
+    SEARCH_NOTES_WITHOUT_DETAIL,
+    SIGN_SERVER_ADDRESS,
+    SIGN_TIMEOUT_SEC,
+)
 
 
 class XHSCrawlerAdapter:
@@ -24,36 +39,47 @@ class XHSCrawlerAdapter:
         self.base_url = "https://www.xiaohongshu.com"
         self.crawler = None
         self._loop = None
+        self._loop_thread = None  # 事件循环常驻在该后台线程中，调用方线程可同时处理结果
         self._playwright = None  # 保存 playwright 实例，避免自动关闭
         self._browser_context = None
         self._context_page = None
         self._xhs_client = None
+        self._remote_signer = None  # 使用共享签名服务时的客户端，此时本进程不启动浏览器
+        # 共享签名服务地址，环境变量优先，便于同一台机器上启动多个轻量 worker
+        self.sign_server_address = os.environ.get("XHS_SIGN_SERVER", SIGN_SERVER_ADDRESS)
+        # 只用搜索结果构建笔记（不请求详情，desc 为空），正文等字段由 load_note_detail 按需获取；默认关闭，
+        # 自行按需补充详情的调用方（CrawlRunner、分布式工作者）创建适配器后打开
+        self.search_without_detail = SEARCH_NOTES_WITHOUT_DETAIL
+        # crawl_notes_comments 同时抓取评论的帖子数
+        self.comment_concurrency = MAX_CONCURRENCY_NUM
         
     def _get_event_loop(self):
-        """获取或创建事件循环（兼容 Python 3.10+，同一线程内复用同一 loop）"""
+        """获取适配器专用事件循环（首次调用时在后台线程中启动并常驻运行）"""
         if self._loop is not None and not self._loop.is_closed():
             return self._loop
-        try:
-            loop = asyncio.get_running_loop()
-            return loop
-        except RuntimeError:
-            pass
         self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="xhs-adapter-loop", daemon=True
+        )
+        self._loop_thread.start()
         return self._loop
     
     def _run_async(self, coro):
-        """在同步上下文中运行异步协程（同步封装入口）"""
+        """在同步上下文中运行异步协程（同步封装入口），阻塞到协程完成"""
         loop = self._get_event_loop()
-        return loop.run_until_complete(coro)
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
     
-    async def _init_browser_async(self):
+    async def init_browser_async(self):
         """异步初始化浏览器"""
-        if self._browser_context is not None:
+        if self._browser_context is not None or self._remote_signer is not None:
             return
         
         self.crawler = XiaoHongShuCrawler()
         
+        if self.sign_server_address:
+            await self._init_remote_signer_async()
+            return
+        
         # 启动 playwright（不使用 async with，保持生命周期）
         if self._playwright is None:
             self._playwright = await async_playwright().start()
@@ -106,26 +132,10 @@ class XHSCrawlerAdapter:
         cookie_str, cookie_dict = convert_cookies(await self._browser_context.cookies())
         self._xhs_client = XiaoHongShuClient(
             proxy=None,
-            headers={
-                "accept": "application/json, text/plain, */*",
-                "accept-language": "zh-CN,zh;q=0.9",
-                "cache-control": "no-cache",
-                "content-type": "application/json;charset=UTF-8",
-                "origin": "https://www.xiaohongshu.com",
-                "pragma": "no-cache",
-                "priority": "u=1, i",
-                "referer": "https://www.xiaohongshu.com/",
-                "sec-ch-ua": '"Chromium";v="136", "Google Chrome";v="136", "Not.A/Brand";v="99"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "sec-fetch-dest": "empty",
-                "sec-fetch-mode": "cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": self.crawler.user_agent,
-                "Cookie": cookie_str,
-            },
+            headers=self.crawler.build_client_headers(cookie_str, self.crawler.user_agent),
             playwright_page=self._context_page,
             cookie_dict=cookie_dict,
+            governor=self.crawler.governor,  # 所有请求共用一个并发上限，按通道自动调节
         )
         
         # 检查登录状态；未登录时阻塞等待用户登录，避免直接去搜索导致报错
@@ -137,6 +147,28 @@ class XHSCrawlerAdapter:
             print("="*60 + "\n")
             await self._wait_for_login_async(timeout=300)  # 最多等待 5 分钟
     
+    async def _init_remote_signer_async(self):
+        """通过共享签名服务初始化客户端：签名与 Cookie 都来自签名服务的浏览器，本进程不启动 Chromium"""
+        signer = RemoteSigner(self.sign_server_address, timeout=SIGN_TIMEOUT_SEC)
+        try:
+            cookie_str, cookie_dict = convert_cookies(await signer.get_cookies())
+        except SignError as e:
+            raise RuntimeError(
+                f"无法连接签名服务 {self.sign_server_address}，请先运行 "
+                "'python -m xhs_crawler.media_platform.xhs.sign_server'"
+            ) from e
+        self._remote_signer = signer
+        self._xhs_client = XiaoHongShuClient(
+            proxy=None,
+            headers=self.crawler.build_client_headers(cookie_str, self.crawler.user_agent),
+            cookie_dict=cookie_dict,
+            signer=signer,
+            governor=self.crawler.governor,
+        )
+        if not await self._xhs_client.pong():
+            utils.logger.warning("签名服务浏览器未登录，请在签名服务打开的浏览器中登录小红书账号")
+            await self._wait_for_login_async(timeout=300)
+    
     async def _wait_for_login_async(self, timeout: int = 300):
         """轮询等待用户在小红书页面完成登录，超时则抛错"""
         import time
@@ -145,7 +177,10 @@ class XHSCrawlerAdapter:
         while time.monotonic() < deadline:
             await asyncio.sleep(check_interval)
             try:
-                await self._xhs_client.update_cookies(self._browser_context)
+                if self._remote_signer is not None:
+                    await self._xhs_client.update_cookies_from_signer()
+                else:
+                    await self._xhs_client.update_cookies(self._browser_context)
                 if await self._xhs_client.pong():
                     utils.logger.info("检测到已登录，继续执行爬虫")
                     print("\n[成功] 已检测到登录，开始爬取...\n")
@@ -158,72 +193,108 @@ class XHSCrawlerAdapter:
     
     def init_browser(self):
         """初始化浏览器（同步方法）"""
-        self._run_async(self._init_browser_async())
+        self._run_async(self.init_browser_async())
     
-    async def _search_notes_async(self, keyword: str, max_notes: int = 100) -> List[Dict]:
-        """异步搜索笔记"""
+    async def iter_search_notes_async(
+        self,
+        keyword: str,
+        max_notes: int = 100,
+        search_id: Optional[str] = None,
+        start_page: int = 1,
+        skip_note_ids: Optional[set] = None,
+        on_page: Optional[Callable[[int, str], None]] = None,
+        since: Optional[Watermark] = None,
+        scheduler: Optional[FairScheduler] = None,
+    ) -> AsyncIterator[NoteRecord]:
+        """异步搜索笔记，每页结果处理完即逐条产出（不必等整个关键词搜索完成）
+        
+        断点续爬时传入上次的 search_id 与起始页，skip_note_ids 中的笔记不再产出（也不计入 max_notes）；
+        每页笔记全部产出后回调 on_page(page, search_id)。
+        增量爬取时传入 since：只产出比水位线新的笔记，某一页没有新笔记即停止翻页（结果按最新排序）。
+        多个关键词并发搜索时传入同一个 scheduler，各关键词轮流发出搜索请求，请求间隔由 scheduler 控制
+        """
         if self._xhs_client is None:
-            await self._init_browser_async()
+            await self.init_browser_async()
         
-        notes = []
-        page = 1
+        found = 0
         page_size = 20
-        search_id = get_search_id()
+        search_id = search_id or get_search_id()
+        # 按最新排序时新帖子会把结果往后挤，相邻两页可能出现同一帖子；已产出的帖子也加入跳过集合
+        skip_note_ids = set(skip_note_ids or ())
+        
+        async def fetch_search_page(page: int) -> Dict:
+            if scheduler is None:
+                return await request_search_page(page)
+            async with scheduler.turn(keyword):
+                return await request_search_page(page)
+        
+        async def request_search_page(page: int) -> Dict:
+            return await self._xhs_client.get_note_by_keyword(
+                keyword=keyword,
+                search_id=search_id,
+                page=page,
+                page_size=page_size,
+                sort=SearchSortType.LATEST,  # 使用最新排序
+            )
+        
+        def next_search_page(notes_res: Optional[Dict], page: int) -> Optional[int]:
+            if not notes_res or not notes_res.get("has_more", False) or found >= max_notes:
+                return None
+            if since and not since.any_new(notes_res.get("items", [])):
+                return None
+            return page + 1
         
-        while len(notes) < max_notes:
+        page = start_page
+        while found < max_notes:
+            # 处理当前页笔记详情的同时，预先签名并请求下一页搜索结果
+            pages = PagePrefetcher(
+                fetch_search_page,
+                first_cursor=page,
+                next_cursor=next_search_page,
+                crawl_interval=0 if scheduler else 1,  # 延迟避免请求过快
+            )
             try:
-                notes_res = await self._xhs_client.get_note_by_keyword(
-                    keyword=keyword,
-                    search_id=search_id,
-                    page=page,
-                    page_size=page_size,
-                    sort=SearchSortType.LATEST,  # 使用最新排序
-                )
-                
-                if not notes_res or not notes_res.get("has_more", False):
-                    break
-                
-                items = notes_res.get("items", [])
-                for item in items:
-                    if item.get("model_type") in ("rec_query", "hot_query"):
-                        continue
-                    
-                    note_id = item.get("id")
-                    if not note_id:
-                        continue
-                    
-                    # 获取笔记详情
-                    try:
-                        note_detail = await self._xhs_client.get_note_by_id(
-                            note_id=note_id,
-                            xsec_source=item.get("xsec_source", "pc_search"),
-                            xsec_token=item.get("xsec_token", ""),
-                        )
+                async with pages:
+                    async for notes_res in pages:
+                        if not notes_res or not notes_res.get("has_more", False):
+                            break
                         
-                        if note_detail:
-                            notes.append({
-                                'note_id': note_id,
-                                'title': note_detail.get('title', ''),
-                                'desc': note_detail.get('desc', ''),
-                                'xsec_token': item.get("xsec_token", ""),
-                                'xsec_source': item.get("xsec_source", "pc_search"),
-                            })
-                            
-                            if len(notes) >= max_notes:
+                        items = []
+                        for item in notes_res.get("items", []):
+                            note_id = item.get("id")
+                            if item.get("model_type") in ("rec_query", "hot_query") or not note_id or note_id in skip_note_ids:
+                                continue
+                            skip_note_ids.add(note_id)
+                            items.append(item)
+                        if since:
+                            reached_watermark = not since.any_new(notes_res.get("items", []))
+                            items = [item for item in items if since.is_new(item)]
+                            if reached_watermark:
                                 break
-                    except CaptchaRequiredError as e:
-                        if not getattr(self, "_captcha_warned", False):
-                            self._captcha_warned = True
-                            utils.logger.warning("检测到需要验证(461/471)，请在已打开的浏览器中完成验证后继续；当前笔记已跳过。")
-                            print("\n[提示] 小红书要求验证，请在爬虫浏览器中完成验证/滑块，再继续爬取。\n")
-                        utils.logger.warning(f"获取笔记详情失败(验证) {note_id}，已跳过")
-                        continue
-                    except Exception as e:
-                        utils.logger.warning(f"获取笔记详情失败 {note_id}: {e}")
-                        continue
-                
-                page += 1
-                await asyncio.sleep(1)  # 延迟避免请求过快
+                        if self.search_without_detail:
+                            # 搜索结果已包含标题和 xsec_token，省去每条笔记一次详情请求
+                            for item in items[:max_notes - found]:
+                                found += 1
+                                yield NoteRecord.from_search_item(item)
+                            items = []
+                        # 并发获取本页笔记详情（保持搜索结果顺序，同时进行的请求数由 governor 的 detail 通道限制）；
+                        # 每轮只请求还差的数量，失败的由后续条目补上
+                        while items and found < max_notes:
+                            remaining = max_notes - found
+                            batch, items = items[:remaining], items[remaining:]
+                            records = await asyncio.gather(
+                                *(self._fetch_note_record(item) for item in batch)
+                            )
+                            for record in records:
+                                if record is not None:
+                                    found += 1
+                                    yield record
+                        
+                        if on_page:
+                            on_page(pages.cursor, search_id)
+                        if found >= max_notes:
+                            break
+                break
                 
             except Exception as e:
                 error_msg = str(e)
@@ -233,107 +304,127 @@ class XHSCrawlerAdapter:
                     raise RuntimeError("需要登录才能搜索，请在浏览器中登录小红书账号")
                 utils.logger.error(f"搜索笔记出错: {e}")
                 # 如果是第一页就失败，直接退出
-                if page == 1:
+                if pages.cursor == start_page:
                     break
-                # 否则继续尝试下一页
-                page += 1
+                # 否则从出错页的下一页继续尝试
+                page = pages.cursor + 1
                 await asyncio.sleep(2)
-        
-        return notes[:max_notes]
     
-    def search_notes_by_keyword(self, keyword: str, max_notes: int = 100) -> List[Dict]:
+    async def search_notes_async(self, keyword: str, max_notes: int = 100) -> List[NoteRecord]:
+        """异步搜索笔记"""
+        return [note async for note in self.iter_search_notes_async(keyword, max_notes)]
+    
+    async def _fetch_note_record(self, item: Dict) -> Optional[NoteRecord]:
+        """获取一条搜索结果的笔记详情，失败（含需要验证）时返回 None"""
+        note_id = item.get("id")
+        try:
+            note_detail = await self._xhs_client.get_note_by_id(
+                note_id=note_id,
+                xsec_source=item.get("xsec_source", "pc_search"),
+                xsec_token=item.get("xsec_token", ""),
+            )
+        except CaptchaRequiredError:
+            if not getattr(self, "_captcha_warned", False):
+                self._captcha_warned = True
+                utils.logger.warning("检测到需要验证(461/471)，请在已打开的浏览器中完成验证后继续；当前笔记已跳过。")
+                print("\n[提示] 小红书要求验证，请在爬虫浏览器中完成验证/滑块，再继续爬取。\n")
+            utils.logger.warning(f"获取笔记详情失败(验证) {note_id}，已跳过")
+            return None
+        except Exception as e:
+            utils.logger.warning(f"获取笔记详情失败 {note_id}: {e}")
+            return None
+        if not note_detail:
+            return None
+        return NoteRecord.from_note_detail(item, note_detail)
+    
+    def search_notes_by_keyword(self, keyword: str, max_notes: int = 100) -> List[NoteRecord]:
         """搜索关键词，获取最新帖子（同步方法）"""
-        return self._run_async(self._search_notes_async(keyword, max_notes))
+        return self._run_async(self.search_notes_async(keyword, max_notes))
     
-    async def _crawl_note_comments_async(
+    async def load_note_detail_async(self, note: NoteRecord) -> NoteRecord:
+        """为仅由搜索结果构建的笔记补充详情（正文等），已加载过则直接返回"""
+        if note.detail_loaded:
+            return note
+        if self._xhs_client is None:
+            await self.init_browser_async()
+        try:
+            note_detail = await self._xhs_client.get_note_by_id(
+                note_id=note.note_id,
+                xsec_source=note.xsec_source,
+                xsec_token=note.xsec_token,
+            )
+        except Exception as e:
+            utils.logger.warning(f"获取笔记详情失败 {note.note_id}: {e}")
+            return note
+        if note_detail:
+            note.update_from_detail(note_detail)
+        return note
+    
+    def load_note_detail(self, note: NoteRecord) -> NoteRecord:
+        """按需获取笔记详情（同步方法）"""
+        return self._run_async(self.load_note_detail_async(note))
+    
+    async def iter_note_comments_async(
+        self,
+        note_id: str,
+        xsec_token: str = "",
+        max_comments: int = 100,
+        filter_keywords: List[str] = [],
+        since: Optional[Watermark] = None,
+        state: Optional[NoteCommentState] = None,
+    ) -> AsyncIterator[List[CommentRecord]]:
+        """按页异步产出帖子评论（已转换为 CommentRecord 并过滤）
+
+        每页评论到达即转换、过滤后交给调用方，调用方可边抓边保存、随时停止（提前停止时请关闭生成器）；
+        max_comments 限制抓取的评论数（含子评论，过滤前计数）；传入 since 时只抓取比水位线新的评论；
+        传入 state（上次的评论状态）时全量抓取从其游标继续，并把本次的游标与是否抓完记入 state
+        """
+        if self._xhs_client is None:
+            await self.init_browser_async()
+        client = self._xhs_client
+        # 过滤词自动机按词表缓存，批量抓取多个帖子时只构建一次
+        matcher = compile_keywords(tuple(filter_keywords))
+        fetched = 0
+        async with aclosing(
+            client.iter_note_comments(
+                note_id, xsec_token, crawl_interval=1.0, max_count=max_comments, since=since, state=state,
+            )
+        ) as pages:
+            async for comments in pages:
+                comments = comments[: max_comments - fetched]
+                # 未开启 ENABLE_GET_SUB_COMMENTS 时返回空列表
+                sub_comments = await client.get_comments_all_sub_comments(comments, xsec_token, crawl_interval=1.0)
+                fetched += len(comments) + len(sub_comments)
+                # 没有用户 ID 的评论直接丢弃
+                records = [
+                    record for record in map(CommentRecord.from_api, comments + sub_comments)
+                    if record is not None and (not matcher or not record.content or matcher.search(record.content))
+                ]
+                if records:
+                    yield records
+                if fetched >= max_comments:
+                    return
+
+    async def crawl_note_comments_async(
         self, 
         note_id: str, 
         xsec_token: str = "",
         max_comments: int = 100,
-        filter_keywords: List[str] = []
-    ) -> List[Dict]:
-        """异步抓取笔记评论"""
-        if self._xhs_client is None:
-            await self._init_browser_async()
-        
+        filter_keywords: List[str] = [],
+        since: Optional[Watermark] = None,
+    ) -> List[CommentRecord]:
+        """异步抓取笔记评论；传入 since 时只抓取比水位线新的评论"""
         comments_data = []
-        
         try:
-            # 如果没有 xsec_token，尝试从搜索中获取
-            if not xsec_token:
-                # 这里可以尝试其他方式获取 token，暂时使用空字符串
-                pass
-            
-            # 获取所有评论
-            all_comments = await self._xhs_client.get_note_all_comments(
-                note_id=note_id,
-                xsec_token=xsec_token,
-                crawl_interval=1.0,
-                callback=None,  # 不使用回调，直接收集结果
-                max_count=max_comments,
-            )
-            
-            for comment in all_comments:
-                # MediaCrawler 返回的评论结构
-                # 尝试多种可能的字段名
-                content = (comment.get('content', '') or 
-                          comment.get('note_comment', {}).get('content', '') or
-                          comment.get('text', '') or
-                          '')
-                
-                # 过滤评论
-                if filter_keywords and content:
-                    if not any(kw in content for kw in filter_keywords):
-                        continue
-                
-                # 提取用户信息 - 尝试多种可能的字段结构
-                user_info = (comment.get('user_info', {}) or 
-                           comment.get('user', {}) or 
-                           comment.get('author', {}) or
-                           {})
-                
-                user_id = (user_info.get('user_id', '') or 
-                          user_info.get('id', '') or
-                          user_info.get('userid', '') or
-                          comment.get('user_id', '') or
-                          '')
-                
-                if not user_id:
-                    continue  # 没有用户ID，跳过这条评论
-                
-                # 构建评论数据
-                comments_data.append({
-                    'comment_id': comment.get('id', '') or comment.get('comment_id', ''),
-                    'content': content,
-                    'user': {
-                        'user_id': user_id,
-                        'nickname': (user_info.get('nickname', '') or 
-                                    user_info.get('name', '') or
-                                    user_info.get('nick_name', '') or
-                                    ''),
-                        'avatar': (user_info.get('image', '') or 
-                                  user_info.get('avatar', '') or
-                                  user_info.get('avatar_url', '') or
-                                  ''),
-                        'user_url': f"https://www.xiaohongshu.com/user/profile/{user_id}?xsec_source=pc_note",
-                    },
-                    'like_count': (comment.get('like_count', 0) or 
-                                 comment.get('liked_count', 0) or
-                                 comment.get('likeCount', 0) or
-                                 0),
-                    'time': (comment.get('create_time', 0) or 
-                            comment.get('time', 0) or
-                            comment.get('createTime', 0) or
-                            0),
-                })
-                
-                if len(comments_data) >= max_comments:
-                    break
-            
+            async with aclosing(
+                self.iter_note_comments_async(note_id, xsec_token, max_comments, filter_keywords, since)
+            ) as pages:
+                async for records in pages:
+                    comments_data.extend(records)
         except Exception as e:
             utils.logger.error(f"抓取评论出错 {note_id}: {e}")
         
-        return comments_data
+        return comments_data[:max_comments]
     
     def crawl_note_comments(
         self, 
@@ -342,10 +433,10 @@ class XHSCrawlerAdapter:
         filter_keywords: List[str] = [],
         xsec_token: str = "",
         xsec_source: str = "pc_search"
-    ) -> List[Dict]:
+    ) -> List[CommentRecord]:
         """抓取帖子的评论（同步方法）"""
         return self._run_async(
-            self._crawl_note_comments_async(
+            self.crawl_note_comments_async(
                 note_id=note_id,
                 xsec_token=xsec_token,
                 max_comments=max_comments,
@@ -353,12 +444,68 @@ class XHSCrawlerAdapter:
             )
         )
 
-    async def _get_creator_info_async(
+    async def _crawl_notes_comments_async(
+        self,
+        notes: List[NoteRecord],
+        results: "queue.Queue",
+        max_comments: int,
+        filter_keywords: List[str],
+        concurrency: int,
+    ) -> None:
+        """并发抓取多个帖子的评论，每个帖子完成后立即放入 results"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def crawl(note: NoteRecord):
+            async with semaphore:
+                comments = await self.crawl_note_comments_async(
+                    note_id=note.note_id,
+                    xsec_token=note.xsec_token,
+                    max_comments=max_comments,
+                    filter_keywords=filter_keywords,
+                )
+            results.put((note, comments))
+        
+        await asyncio.gather(*(crawl(note) for note in notes))
+    
+    def crawl_notes_comments(
+        self,
+        notes: List[NoteRecord],
+        max_comments: int = 100,
+        filter_keywords: List[str] = [],
+        concurrency: Optional[int] = None,
+    ) -> Iterator[Tuple[NoteRecord, List[CommentRecord]]]:
+        """批量抓取多个帖子的评论（同步生成器）
+        
+        评论在后台事件循环中并发抓取（共享 concurrency 上限），按完成顺序逐个产出 (note, comments)，
+        调用方处理/保存一个帖子的结果时，其余帖子的抓取仍在进行。提前退出时未完成的抓取会被取消。
+        """
+        if not notes:
+            return
+        results = queue.Queue()
+        done = object()
+        future = asyncio.run_coroutine_threadsafe(
+            self._crawl_notes_comments_async(
+                notes, results, max_comments, filter_keywords, concurrency or self.comment_concurrency
+            ),
+            self._get_event_loop(),
+        )
+        future.add_done_callback(lambda _: results.put(done))
+        try:
+            while True:
+                result = results.get()
+                if result is done:
+                    break
+                yield result
+            future.result()
+        finally:
+            future.cancel()
+    
+    async def get_creator_info_async(
         self, user_id: str, xsec_token: str = "", xsec_source: str = "pc_note"
     ) -> Optional[Dict]:
         """异步获取用户主页信息（含简介）"""
         if self._xhs_client is None:
-            await self._init_browser_async()
+            await self.init_browser_async()
         try:
             return await self._xhs_client.get_creator_info(
                 user_id=user_id,
@@ -374,7 +521,7 @@ class XHSCrawlerAdapter:
     ) -> Optional[Dict]:
         """同步获取用户主页信息（含简介）"""
         return self._run_async(
-            self._get_creator_info_async(user_id, xsec_token, xsec_source)
+            self.get_creator_info_async(user_id, xsec_token, xsec_source)
         )
 
     @staticmethod
@@ -391,21 +538,52 @@ class XHSCrawlerAdapter:
         )
         return (desc or "").strip()
 
+    @property
+    def client(self) -> Optional[XiaoHongShuClient]:
+        """底层 XiaoHongShuClient（init_browser 之后可用），供需要直接调用 API 的流水线使用"""
+        return self._xhs_client
+    
+    def get_request_stats(self) -> Dict:
+        """各类请求（search/detail/comments/profile）当前的并发上限、进行中请求数与平均耗时"""
+        if self.crawler is None:
+            return {}
+        return self.crawler.governor.stats()
+    
+    def get_signer_stats(self) -> Dict:
+        """签名器健康状态（延迟 EWMA/分位数、失败率），用于监控"""
+        if self._xhs_client is None:
+            return {}
+        return self._xhs_client.signer.stats()
+
     def close(self):
-        """关闭浏览器"""
-        if self._browser_context:
-            self._run_async(self._close_async())
+        """关闭浏览器并停止后台事件循环（同步方法；在外部事件循环中请使用 close_async）"""
+        if self._loop and not self._loop.is_closed():
+            self._run_async(self._cancel_pending_async())
+            self._run_async(self.close_async())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+        self._loop = None
+        self._loop_thread = None
     
-    async def _close_async(self):
+    async def _cancel_pending_async(self):
+        """取消适配器事件循环中仍在进行的抓取（如提前结束的 crawl_notes_comments）"""
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def close_async(self):
         """异步关闭浏览器"""
         if self._browser_context:
             await self._browser_context.close()
             self._browser_context = None
             self._context_page = None
             self._xhs_client = None
+        if self._remote_signer:
+            await self._remote_signer.close()
+            self._remote_signer = None
+            self._xhs_client = None
         if self._playwright:
             await self._playwright.stop()
             self._playwright = None
-        if self._loop and not self._loop.is_closed():
-            self._loop.close()
-        self._loop = None